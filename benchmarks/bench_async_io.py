@@ -0,0 +1,269 @@
+"""
+Benchmark the asyncio network I/O layer (nephro_async_io) of the CeRKiD
+transfer script offline: a synthetic share of year and case folders is
+written to a temporary directory and scanned and copied through
+LocalBackend with an injected latency per operation, as on the SMB share.
+
+Checks that the async scan finds the same reports and directory listings
+as the threaded iter_report_pdfs and that the async transfer gives the
+same outcomes as transfer_files (first run copies, second run skips);
+reports of different cases with the same file name get their own names.
+Checks that both scans raise IncompleteScanError when a directory cannot
+be read, that every report is found and copied with injected failures
+through the retries, that a copy that times out is waited for instead of
+run twice, and that an operation stuck past its timeout does not make the
+others time out behind it. Then times scan and transfer at several
+concurrency limits; a limit of 1 is the sequential baseline.
+
+Run from the repository root:
+    python -m benchmarks.bench_async_io
+    python -m benchmarks.bench_async_io --cases 200 --latency 0.02 --concurrency 1 8 32 64
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from nephro_async_io import AsyncFileIO, LocalBackend
+import nephro_pdf_index
+from nephro_pdf_index import IncompleteScanError, iter_report_pdfs, scan_report_pdfs_async
+from nephro_transfer import transfer_files, transfer_files_async
+
+
+def synthetic_share(root, n_cases, years=(2023, 2024)):
+    """
+    Year folders with n_cases case folders each: a report, a Laufzettel and
+    another PDF per case, every tenth case with a second report in a
+    subfolder, and a "Falscher" folder that is not entered.
+    """
+    for year in years:
+        for case in range(n_cases):
+            case_dir = os.path.join(root, str(year), f"{year}{case:05d}_Patient")
+            os.makedirs(case_dir)
+            # Reports are copied into one folder, so their names are unique as on the share
+            for name in [f"{year}{case:05d}_Befund.pdf", "Laufzettel_Befund.pdf", "Anforderung.pdf"]:
+                with open(os.path.join(case_dir, name), 'wb') as f:
+                    f.write(os.urandom(2048))
+            if case % 10 == 0:
+                os.makedirs(os.path.join(case_dir, "Nachbefund"))
+                with open(os.path.join(case_dir, "Nachbefund", f"{year}{case:05d}_Nachbefund.pdf"), 'wb') as f:
+                    f.write(os.urandom(2048))
+        os.makedirs(os.path.join(root, str(year), "Falscher Befund"))
+        with open(os.path.join(root, str(year), "Falscher Befund", "Befund.pdf"), 'wb') as f:
+            f.write(b"x")
+
+
+class SlowBackend(LocalBackend):
+    """
+    LocalBackend whose calls of some (operation, path) pairs take delay
+    seconds longer than latency, a given number of times; counts the copies
+    per source.
+    """
+
+    def __init__(self, delay, slow_calls, latency=0.0):
+        super().__init__(latency)
+        self.delay = delay
+        self.slow_calls = dict(slow_calls)
+        self.copies = {}
+        self._lock = threading.Lock()
+
+    def _round_trip(self, operation, path):
+        with self._lock:
+            slow = self.slow_calls.get((operation, path), 0)
+            if slow:
+                self.slow_calls[(operation, path)] = slow - 1
+            if operation == "copy":
+                self.copies[path] = self.copies.get(path, 0) + 1
+        if slow:
+            time.sleep(self.delay)
+        super()._round_trip(operation, path)
+
+
+def scan(root, file_io):
+    index = {}
+    reports = asyncio.run(scan_report_pdfs_async(root, index, file_io))
+    return reports, index
+
+
+def check_parity(root, dest_root):
+    file_io = AsyncFileIO()
+    threaded_index = {}
+    threaded = sorted(iter_report_pdfs(root, threaded_index))
+    reports, index = scan(root, file_io)
+    assert sorted(reports) == threaded, "async scan found different reports"
+    assert index["directories"] == threaded_index["directories"], "async scan gave different listings"
+
+    sources = [path for path, _, _ in threaded]
+    # Two cases with a report of the same name: neither may overwrite the other
+    same_named = [os.path.join(dest_root, "same_named", case, "Befund.pdf") for case in ("A", "B")]
+    for source in same_named:
+        os.makedirs(os.path.dirname(source))
+        with open(source, 'wb') as f:
+            f.write(os.urandom(2048))
+    os.makedirs(os.path.join(dest_root, "threaded"))
+    os.makedirs(os.path.join(dest_root, "async"))
+    for run in ("first", "second"):
+        expected = transfer_files(sources + same_named, os.path.join(dest_root, "threaded"))
+        actual = asyncio.run(transfer_files_async(sources + same_named, os.path.join(dest_root, "async"), file_io))
+        assert {source: (outcome["status"], outcome["reason"], os.path.basename(outcome["dest"]))
+                for source, outcome in actual.items()} == \
+            {source: (outcome["status"], outcome["reason"], os.path.basename(outcome["dest"]))
+             for source, outcome in expected.items()}, f"async transfer outcomes differ on the {run} run"
+        assert actual[same_named[0]]["dest"] != actual[same_named[1]]["dest"], "same-named reports share a name"
+    for source in same_named:
+        with open(source, 'rb') as f, open(actual[source]["dest"], 'rb') as copied:
+            assert f.read() == copied.read(), f"{source} not copied intact"
+    file_io.close()
+    return sources
+
+
+class UnreadableBackend(LocalBackend):
+    """
+    LocalBackend that cannot list one directory, as after a dropped SMB
+    connection that outlasts the retries.
+    """
+
+    def __init__(self, unreadable):
+        super().__init__()
+        self.unreadable = unreadable
+
+    def listdir(self, path):
+        if path == self.unreadable:
+            raise PermissionError(f"Injected failure: listdir {path}")
+        return super().listdir(path)
+
+
+def check_incomplete_scan(root):
+    """
+    A directory that cannot be read makes both scans raise
+    IncompleteScanError naming it, instead of returning fewer reports.
+    """
+    unreadable = f"{root}/2024"
+    file_io = AsyncFileIO(UnreadableBackend(unreadable))
+    try:
+        scan(root, file_io)
+        raise AssertionError("async scan did not report the unreadable directory")
+    except IncompleteScanError as e:
+        assert e.directories == [unreadable], e.directories
+    file_io.close()
+
+    list_directory = nephro_pdf_index._list_directory
+
+    def failing_list_directory(path, cached):
+        if path == unreadable:
+            raise PermissionError(f"Injected failure: scandir {path}")
+        return list_directory(path, cached)
+
+    nephro_pdf_index._list_directory = failing_list_directory
+    try:
+        list(iter_report_pdfs(root, {}))
+        raise AssertionError("threaded scan did not report the unreadable directory")
+    except IncompleteScanError as e:
+        assert e.directories == [unreadable], e.directories
+    finally:
+        nephro_pdf_index._list_directory = list_directory
+
+
+def check_retries(root, dest_dir, sources):
+    os.makedirs(dest_dir)
+    file_io = AsyncFileIO(LocalBackend(failure_rate=0.1, seed=1), retries=6, backoff_seconds=0.001)
+    reports, _ = scan(root, file_io)
+    assert sorted(path for path, _, _ in reports) == sorted(sources), "reports lost despite retries"
+    outcomes = asyncio.run(transfer_files_async(sources, dest_dir, file_io))
+    assert all(outcome["status"] == "copied" for outcome in outcomes.values()), "copies failed despite retries"
+    file_io.close()
+    return file_io.retried
+
+
+def check_timeouts(root, dest_dir, sources):
+    """
+    A copy that takes longer than the timeout is awaited and not started a
+    second time, a copy still running after twice the timeout fails without
+    a retry, and stats stuck past the timeout keep their concurrency
+    slots, so the other operations do not queue behind them and time out.
+    """
+    os.makedirs(dest_dir)
+    slow_source = sources[0]
+    backend = SlowBackend(0.15, {("copy", slow_source): 1})
+    file_io = AsyncFileIO(backend, max_concurrency=4, timeout_seconds=0.1, retries=2, backoff_seconds=0.001)
+    outcomes = asyncio.run(transfer_files_async(sources[:8], dest_dir, file_io))
+    file_io.close()
+    assert outcomes[slow_source]["status"] == "copied", f"slow copy failed: {outcomes[slow_source]}"
+    assert backend.copies[slow_source] == 1, "timed out copy was started again while still running"
+    assert not [name for name in os.listdir(dest_dir) if name.endswith(".part")], "partial files left behind"
+
+    # A copy hanging past twice the timeout fails without a second attempt
+    hung_source = sources[8]
+    backend = SlowBackend(1.0, {("copy", hung_source): 1})
+    file_io = AsyncFileIO(backend, max_concurrency=4, timeout_seconds=0.1, retries=2, backoff_seconds=0.001)
+    start = time.perf_counter()
+    outcomes = asyncio.run(transfer_files_async([hung_source], dest_dir, file_io))
+    waited = time.perf_counter() - start
+    file_io.close()
+    assert outcomes[hung_source]["status"] == "failed" and "TimeoutError" in outcomes[hung_source]["reason"], \
+        f"hung copy not reported as timed out: {outcomes[hung_source]}"
+    assert waited < 0.9, f"hung copy was waited for {waited:.2f}s, beyond its timeouts"
+    assert backend.copies[hung_source] == 1, "hung copy was retried"
+
+    # Three stats stuck once each: only they may time out, not the ones after them
+    stuck = sources[:3]
+    backend = SlowBackend(0.5, {("stat", path): 1 for path in stuck}, latency=0.04)
+    file_io = AsyncFileIO(backend, max_concurrency=4, timeout_seconds=0.1, retries=2, backoff_seconds=0.001)
+
+    async def stat_all():
+        return await asyncio.gather(*(file_io.stat(path) for path in sources[:30]), return_exceptions=True)
+
+    results = asyncio.run(stat_all())
+    file_io.close()
+    assert not [result for result in results if isinstance(result, BaseException)], "stats failed"
+    assert file_io.retried == len(stuck), \
+        f"{file_io.retried - len(stuck)} operations timed out behind the stuck ones"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the asyncio network I/O layer')
+    parser.add_argument('--cases', type=int, default=100, help='Case folders per year folder')
+    parser.add_argument('--latency', type=float, default=0.01, help='Injected latency per operation in seconds')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64],
+                        help='Concurrency limits to benchmark')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_async_io_")
+    try:
+        root = os.path.join(work_dir, "share").replace(os.sep, "/")
+        synthetic_share(root, args.cases)
+        sources = check_parity(root, os.path.join(work_dir, "parity"))
+        check_incomplete_scan(root)
+        retried = check_retries(root, os.path.join(work_dir, "retries"), sources)
+        check_timeouts(root, os.path.join(work_dir, "timeouts"), sources)
+        print(f"✓ Parity check passed: {len(sources)} reports, same listings and transfer outcomes, "
+              f"same-named reports copied under their own names")
+        print("✓ Incomplete scan check passed: an unreadable directory fails both scans")
+        print(f"✓ Retry check passed: all reports found and copied with 10% injected failures ({retried} retries)")
+        print("✓ Timeout check passed: a slow copy is not started twice, a hung copy fails, stuck stats do not make others time out\n")
+
+        print(f"Latency {args.latency * 1000:.0f} ms per operation")
+        print(f"{'concurrency':>11} {'scan [s]':>9} {'transfer [s]':>13} {'speedup':>9}")
+        baseline = None
+        for concurrency in args.concurrency:
+            file_io = AsyncFileIO(LocalBackend(latency=args.latency), max_concurrency=concurrency)
+            dest_dir = os.path.join(work_dir, f"dest_{concurrency}")
+            os.makedirs(dest_dir)
+            start = time.perf_counter()
+            scan(root, file_io)
+            scanned = time.perf_counter() - start
+            start = time.perf_counter()
+            asyncio.run(transfer_files_async(sources, dest_dir, file_io))
+            transferred = time.perf_counter() - start
+            file_io.close()
+            baseline = baseline or scanned + transferred
+            print(f"{concurrency:>11} {scanned:>9.2f} {transferred:>13.2f} {baseline / (scanned + transferred):>8.1f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark the Excel-only pipeline with and without categorical storage of
+the low-cardinality columns (data_processing.categorical_columns).
+
+Runs the in-process pipeline stages on a synthetic sheet both ways, checks
+that the final long tables serialize to byte-identical CSV, and reports the
+transform time and the memory of the prepared sheet.
+
+Run from the repository root:
+    python -m benchmarks.bench_categorical
+    python -m benchmarks.bench_categorical --rows 100000 1000000
+"""
+import argparse
+import copy
+import json
+import time
+
+from benchmarks.synthetic_data import generate_uebersicht
+from nephro_pipeline import LongTablePipeline
+
+
+def run_transform(sheet, config):
+    """
+    Prepare and transform sheet without the external filter. Returns the
+    final long table, the memory of the prepared sheet in bytes and the
+    wall time in seconds.
+    """
+    pipeline = LongTablePipeline(config, verbose=False)
+    start = time.perf_counter()
+    selected = pipeline.prepare(sheet.copy())
+    prepared_bytes = selected.memory_usage(deep=True).sum()
+    filtered, all_cols = pipeline.build_long_table(selected)
+    long_table = pipeline.expand(filtered[all_cols].drop_duplicates().reset_index(drop=True))
+    return long_table, prepared_bytes, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark categorical low-cardinality columns')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000], help='Sheet sizes to benchmark')
+    parser.add_argument('--config', default='config.json', help='Base configuration file')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    object_config = copy.deepcopy(config)
+    object_config.setdefault("data_processing", {})["categorical_columns"] = []
+
+    print(f"{'rows':>10} {'object [s]':>11} {'categorical [s]':>16} {'object [MB]':>12} {'categorical [MB]':>17}")
+    for n_rows in args.rows:
+        sheet = generate_uebersicht(n_rows, config)
+        expected, object_bytes, object_time = run_transform(sheet, object_config)
+        actual, categorical_bytes, categorical_time = run_transform(sheet, config)
+        assert actual.to_csv(index=False) == expected.to_csv(index=False), "CSV output differs"
+
+        print(f"{n_rows:>10} {object_time:>11.3f} {categorical_time:>16.3f} "
+              f"{object_bytes / 1024 / 1024:>12.1f} {categorical_bytes / 1024 / 1024:>17.1f}")
+    print("\n✓ Parity check passed: CSV output is byte-identical")
+
+
+if __name__ == '__main__':
+    main()
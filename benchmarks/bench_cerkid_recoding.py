@@ -0,0 +1,218 @@
+"""
+Benchmark the vectorized recoding of the CeRKiD transfer script
+(nephro_reports_processor.py) against its original element-wise and
+row-wise recoders (Series.apply / DataFrame.apply(axis=1), a mapping dict
+built on every call and two re.search calls per row).
+
+Checks that the cerkid_recoding tables in config.json reproduce the
+original mappings and that every recoded column is identical on the
+generated tables, then times both at several scales.
+
+Run from the repository root:
+    python -m benchmarks.bench_cerkid_recoding
+    python -m benchmarks.bench_cerkid_recoding --rows 10000 100000 1000000
+"""
+import argparse
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import time_call
+from nephro_transforms import (
+    compile_cerkid_recoding,
+    compile_klassifizierung_rules,
+    recode_klassifizierung,
+    recode_outcome,
+    recode_values,
+)
+
+
+# Original recoders of nephro_reports_processor.py, kept as the parity reference
+def recode_datatransfer(x):
+    return "yes" if x in ["X", "x"] else "no"
+
+
+def recode_befunder(x):
+    if x in ["Johannes", "Johannes/Angela", "Grünhagen ablegen validieren", "in Arbeit Grünhagen", "Privat KVA erstellt am 13.12", "Grünhangen"]:
+        return "Grünhagen"
+    elif x in ["Angela/ Johannes", "Angela/Johannes", "Angela", "Abad/Grünhagen", "Privat KVA erstellt am 13.12."]:
+        return "Abad"
+    else:
+        return x
+
+
+def recode_einsender(x):
+    mapping = {
+        "Bachmann": "Bachmann Charité",
+        "Bachmann / Weber / Seelow": "Bachmann Charité",
+        "Canaan-Kühl": "Canaan-Kühl Charité",
+        "Grün Charité MVZ, gehört zum Cerkid": "Grün Charité",
+        "Hawkins": "Hawkins Charité",
+        "Liefeldt Charite": "Liefeldt Charité",
+        "Rehfeldt Charié": "Rehfeldt Charité",
+        "Schreiber Charié": "Schreiber Charité",
+        "Schreiber": "Schreiber Charité",
+        "Ulrike Weber": "Weber Charité",
+        "Weber": "Weber Charité",
+        "Ulrike Weber AGZ Charité": "Weber Charité",
+        "Zöllner MVZ der Charité": "Zöllner Charité",
+        "ZukunftCharité": "Zukunft Charité",
+        "Berns Charité Station 32i": "Berns Charité",
+        "Sima Charité": "Canaan-Kühl Charité",
+        "Otto Charité": "Grün (ehem. Otto) Charité"
+    }
+    return mapping.get(x, x)
+
+
+def recode_outcome_row(row):
+    bemerkung = row['Bemerkung']
+    gen = row['Gen']
+    if pd.isna(bemerkung) and not pd.isna(gen):
+        return "positiv"
+    if pd.isna(bemerkung) and pd.isna(gen):
+        return "in_process"
+    if isinstance(bemerkung, str):
+        if re.search("negativ|neagiv|neagtiv", bemerkung):
+            return "negativ"
+        if re.search("positiv|Deletion COL4A4", bemerkung):
+            return "positiv"
+    return bemerkung
+
+
+def recode_gen(x):
+    mapping = {
+        "CCDC41(CEP83)": "CEP83",
+        "CFHR1 CFHR3 homozygote Deletion": "CFHR1",
+        "CFHR1 und CFHR3": "CFHR1",
+        "Deletion homozygot": "CFHR1",
+        "HBA1/HBA2 Cluster Deletion berichtet": "HBA1",
+        "MT-ND5 (nicht bestätigt!)": "MT-ND5",
+        "negativ": "",
+        "SCNN1G [Ex2]": "SCNN1G"
+    }
+    return mapping.get(x, x)
+
+
+LEGACY_KLASSIFIZIERUNG_RULES = {
+    "klassifizierung_mapping": {
+        "class_2_variants": {
+            "input_values": ["Klasse II (Risiko-Poly)", "Klasse II, Risk Factor"],
+            "output_value": "Risk factor"
+        },
+        "class_3_variants": {
+            "input_values": ["Klasse III", "Klasse III-IV", "Klasse III (heiß)", "Klasse III (kalt)", "Klasse III funct. Poly", "Klasse IIII", "Klasse III-II"],
+            "output_value": "VUS"
+        },
+        "class_4_variants": {
+            "input_values": ["Klasse IV", "Klasse IV - V", "Klasse IV - V?", "KlasseIV"],
+            "output_value": "Likely pathogenic"
+        },
+        "class_5_variants": {
+            "input_values": ["Klasse V"],
+            "output_value": "Pathogenic"
+        }
+    },
+    "special_variant_rules": [
+        {"condition": "missing_klassifizierung_and_cdna_equals", "cdna_value": "c.4523-1G>A", "output_value": "Likely pathogenic"},
+        {"condition": "missing_klassifizierung_and_cdna_in", "cdna_values": ["CFHR1 und CFHR3", "c.9661dup"], "output_value": "Risk factor"},
+        {"condition": "missing_klassifizierung_and_cdna_equals", "cdna_value": "c.110A>C", "output_value": "VUS"},
+        {"condition": "missing_klassifizierung_and_gen_equals", "gen_value": "HBA1/HBA2 Cluster Deletion berichtet", "output_value": "VUS"},
+        {"condition": "missing_klassifizierung_and_cdna_equals", "cdna_value": "c.647C>T hom", "output_value": "Likely pathogenic"}
+    ]
+}
+
+
+def recode_apply(df):
+    """
+    Recoding steps of the original script, in its order.
+    """
+    df = df.copy()
+    df['Datatransfer'] = df['Datatransfer'].apply(recode_datatransfer)
+    df['Befunder'] = df['Befunder'].apply(recode_befunder)
+    df['Einsender'] = df['Einsender'].apply(recode_einsender)
+    df['Outcome'] = df.apply(recode_outcome_row, axis=1)
+    df['Klassifizierung'] = recode_klassifizierung(df, compile_klassifizierung_rules(LEGACY_KLASSIFIZIERUNG_RULES))
+    df['Gen'] = df['Gen'].apply(recode_gen)
+    df['Gen'] = df['Gen'].replace("", np.nan)
+    return df
+
+
+def recode_vectorized(df, recoding):
+    """
+    Recoding steps of the script with the compiled cerkid_recoding tables.
+    """
+    df = df.copy()
+    df['Datatransfer'] = recode_values(df['Datatransfer'], recoding["datatransfer_map"],
+                                       default=recoding["datatransfer_default"])
+    df['Befunder'] = recode_values(df['Befunder'], recoding["befunder_map"])
+    df['Einsender'] = recode_values(df['Einsender'], recoding["einsender_map"])
+    df['Outcome'] = recode_outcome(df, recoding["outcome_rules"])
+    df['Klassifizierung'] = recode_klassifizierung(df, recoding["klassifizierung_rules"])
+    df['Gen'] = recode_values(df['Gen'], recoding["gen_map"])
+    df['Gen'] = df['Gen'].replace("", np.nan)
+    return df
+
+
+def _values(mapping):
+    return [value for group in mapping.values() for value in group["input_values"]]
+
+
+def synthetic_cases(n_rows, recoding_config, seed=0):
+    """
+    Case table with every mapped spelling, unmapped values and missing
+    values in the recoded columns, read as strings like the script does.
+    """
+    rng = np.random.default_rng(seed)
+
+    def column(values, missing_share):
+        picked = rng.choice(np.array(values, dtype=object), n_rows)
+        picked[rng.random(n_rows) < missing_share] = np.nan
+        return picked
+
+    special_cdna = []
+    for rule in recoding_config["special_variant_rules"]:
+        special_cdna.extend(rule.get("cdna_values", [rule.get("cdna_value")]))
+    return pd.DataFrame({
+        'Datatransfer': column(["X", "x", "x ", "erledigt 12.03.2024"], 0.5),
+        'Befunder': column(_values(recoding_config["befunder_mapping"]) + ["Müller", "Abad"], 0.2),
+        'Einsender': column(_values(recoding_config["einsender_mapping"]) + ["extern", "Bachmann Charité"], 0.1),
+        'Gen': column(_values(recoding_config["gen_mapping"]) + ["PKD1", "COL4A5", "UMOD"], 0.3),
+        'Bemerkung': column(["negativ", "Befund neagtiv", "neagiv", "positiv", "positiv, Segregation empfohlen",
+                             "Deletion COL4A4 bestätigt", "negativ, positiv bei Mutter", "Befund in Arbeit"], 0.5),
+        'cDNA': column([value for value in special_cdna if value] + ["c.1A>G", "c.2C>T"], 0.3),
+        'Klassifizierung': column(_values(recoding_config["klassifizierung_mapping"]) + ["Klasse I", "unklar"], 0.3),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the CeRKiD recoding')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='Table sizes to benchmark')
+    parser.add_argument('--config', default='config.json', help='Configuration file with cerkid_recoding')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions per size')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        recoding_config = json.load(f)["cerkid_recoding"]
+    recoding = compile_cerkid_recoding(recoding_config)
+    assert recoding["klassifizierung_rules"] == compile_klassifizierung_rules(LEGACY_KLASSIFIZIERUNG_RULES), \
+        "cerkid_recoding Klassifizierung rules differ from the script's original rules"
+
+    print(f"{'rows':>10} {'apply [s]':>11} {'vectorized [s]':>16} {'speedup':>9}")
+    for n_rows in args.rows:
+        df = synthetic_cases(n_rows, recoding_config)
+
+        expected = recode_apply(df)
+        actual = recode_vectorized(df, recoding)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+        legacy = time_call(recode_apply, df, repeat=1)
+        vectorized = time_call(recode_vectorized, df, recoding, repeat=args.repeat)
+        print(f"{n_rows:>10} {legacy:>11.3f} {vectorized:>16.3f} {legacy / vectorized:>8.1f}x")
+    print("\n✓ Parity check passed: every recoded column is identical")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark the vectorized semicolon expansion against the original iterrows loop.
+
+Checks that both implementations give identical results on a set of edge cases
+and on every generated table, then times them at several scales.
+
+Run from the repository root:
+    python -m benchmarks.bench_expand_semicolon
+    python -m benchmarks.bench_expand_semicolon --rows 10000 100000 1000000
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import time_call
+from nephro_transforms import expand_semicolon_rows
+
+
+def expand_semicolon_rows_iterrows(df):
+    """
+    Original row-by-row implementation, kept as the parity reference.
+    """
+    expanded_rows = []
+
+    for idx, row in df.iterrows():
+        semicolon_cols = {}
+        max_splits = 1
+
+        for col in df.columns:
+            cell_value = str(row[col]) if pd.notna(row[col]) else ''
+            if ';' in cell_value:
+                split_values = [val.strip() for val in cell_value.split(';')]
+                split_values = [val for val in split_values if val]
+                if split_values:
+                    semicolon_cols[col] = split_values
+                    max_splits = max(max_splits, len(split_values))
+
+        if semicolon_cols:
+            for i in range(max_splits):
+                new_row = row.copy()
+                for col in df.columns:
+                    if col in semicolon_cols:
+                        split_values = semicolon_cols[col]
+                        if i < len(split_values):
+                            new_row[col] = split_values[i]
+                        else:
+                            new_row[col] = split_values[-1]
+                expanded_rows.append(new_row)
+        else:
+            expanded_rows.append(row)
+
+    return pd.DataFrame(expanded_rows).reset_index(drop=True)
+
+
+def edge_case_table():
+    """
+    Small table covering the expansion rules: positional matching, repeating the
+    last value, dropping empty tokens, separator-only cells and missing values.
+    """
+    return pd.DataFrame({
+        'Blutbuch_nummer': ['LB21-1', 'LB21-2', 'LB21-3', 'LB21-4', 'LB21-5', 'LB21-6', 'LB21-7'],
+        'Gen': ['PKD1; PKD2', 'COL4A3', 'NPHS2;', ';', np.nan, 'A; ;B', 'COL4A4;COL4A5;COL4A3'],
+        'cDNA': ['c.1A>G; c.2C>T', 'c.3G>A', np.nan, 'c.4del', 'c.5dup; c.6dup', ' ; ', 'c.7A>T'],
+        'Protein': ['p.(Met1?)', 'p.Arg2Ter', 'p.Gly3Ser', np.nan, np.nan, np.nan, 'p.X; p.Y'],
+        'Klassifizierung': ['VUS; Pathogenic', 'VUS', 'Likely pathogenic', np.nan, 'VUS', 'VUS', 'VUS'],
+    }, index=[10, 3, 3, 7, 1, 0, 2])
+
+
+def synthetic_long_table(n_rows, seed=0):
+    """
+    Long table with roughly 20% semicolon-packed genetic cells.
+    """
+    rng = np.random.default_rng(seed)
+    genes = np.array(['PKD1', 'PKD2', 'COL4A3', 'COL4A4', 'COL4A5', 'NPHS1', 'NPHS2', 'UMOD'])
+    classes = np.array(['VUS', 'Likely pathogenic', 'Pathogenic', 'Risk factor'])
+
+    def packed(choices, prefix=''):
+        first = rng.choice(choices, n_rows).astype(object)
+        second = rng.choice(choices, n_rows).astype(object)
+        values = np.array([prefix + v for v in first], dtype=object)
+        pack = rng.random(n_rows) < 0.2
+        values[pack] = [f"{prefix}{a}; {prefix}{b}" for a, b in zip(first[pack], second[pack])]
+        values[rng.random(n_rows) < 0.1] = np.nan
+        return values
+
+    return pd.DataFrame({
+        'Blutbuch_nummer': [f"LB{20 + i % 5}-{i}" for i in range(n_rows)],
+        'Gen': packed(genes),
+        'cDNA': packed(np.array(['1A>G', '2C>T', '3G>A', '4del']), 'c.'),
+        'Protein': packed(np.array(['Arg1Ter', 'Gly2Ser', 'Met3?']), 'p.'),
+        'Klassifizierung': packed(classes),
+    })
+
+
+def check_parity(df):
+    """
+    Raise AssertionError if the two implementations disagree on df.
+    """
+    expected = expand_semicolon_rows_iterrows(df)
+    actual = expand_semicolon_rows(df)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark semicolon row expansion')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='Table sizes to benchmark')
+    parser.add_argument('--legacy-max-rows', type=int, default=100_000,
+                        help='Skip the iterrows implementation above this size')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions per size')
+    args = parser.parse_args()
+
+    check_parity(edge_case_table())
+    print("✓ Parity check passed on edge cases")
+
+    print(f"\n{'rows':>10} {'iterrows [s]':>14} {'vectorized [s]':>16} {'speedup':>9}")
+    for n_rows in args.rows:
+        df = synthetic_long_table(n_rows)
+        vectorized = time_call(expand_semicolon_rows, df, repeat=args.repeat)
+
+        if n_rows <= args.legacy_max_rows:
+            check_parity(df)
+            legacy = time_call(expand_semicolon_rows_iterrows, df, repeat=1)
+            print(f"{n_rows:>10} {legacy:>14.3f} {vectorized:>16.3f} {legacy / vectorized:>8.1f}x")
+        else:
+            print(f"{n_rows:>10} {'skipped':>14} {vectorized:>16.3f} {'-':>9}")
+
+
+if __name__ == '__main__':
+    main()
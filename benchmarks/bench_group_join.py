@@ -0,0 +1,118 @@
+"""
+Benchmark the case summary of the CeRKiD transfer script
+(nephro_reports_processor.py): join_unique_per_group and max_per_group
+against the original groupby().agg() with a lambda x: " | ".join(x.unique())
+per column and 'max' on the string columns Eingang and Outcome, both of
+which call Python once per group and column.
+
+Checks that both give the same summary on case tables without missing
+values (the original lambda raises TypeError on them), and that missing
+values are skipped on a table with gaps, then times both at several scales.
+
+Run from the repository root:
+    python -m benchmarks.bench_group_join
+    python -m benchmarks.bench_group_join --rows 10000 100000 1000000
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import time_call
+from nephro_transforms import join_unique_per_group, max_per_group
+
+GROUP_COLS = ['Geschlecht', 'Blutbuch_nummer']
+JOINED_COLS = ['Einsender', 'Sub_panel', 'Standort', 'Datatransfer', 'Befunder', 'Gen', 'Klassifizierung']
+SUMMARY_COLS = ['Einsender', 'Eingang', 'Sub_panel', 'Standort', 'Datatransfer', 'Befunder', 'Gen', 'Outcome',
+                'Klassifizierung']
+
+
+def summarize_lambda(df):
+    """
+    Summary of the original script, kept as the parity reference.
+    """
+    agg_dict = {col: 'max' if col in ('Eingang', 'Outcome') else (lambda x: " | ".join(x.unique()))
+                for col in SUMMARY_COLS}
+    return df.groupby(GROUP_COLS).agg(agg_dict).reset_index()
+
+
+def summarize_joined(df):
+    """
+    Summary of the script with join_unique_per_group and max_per_group.
+    """
+    summary = join_unique_per_group(df, GROUP_COLS, JOINED_COLS).join(
+        max_per_group(df, GROUP_COLS, ['Eingang', 'Outcome'])
+    )
+    return summary[SUMMARY_COLS].reset_index()
+
+
+def synthetic_cases(n_rows, missing_share=0.0, seed=0):
+    """
+    Filtered case table with about three rows per case and a few distinct
+    values per column, optionally with missing values in the joined columns.
+    """
+    rng = np.random.default_rng(seed)
+    n_cases = max(n_rows // 3, 1)
+
+    def column(values):
+        picked = rng.choice(np.array(values, dtype=object), n_rows)
+        if missing_share:
+            picked[rng.random(n_rows) < missing_share] = np.nan
+        return picked
+
+    case = rng.integers(0, n_cases, n_rows)
+    return pd.DataFrame({
+        'Geschlecht': np.array(["m", "w"], dtype=object)[case % 2],
+        'Blutbuch_nummer': pd.Series(case).map("BB{:07d}".format).to_numpy(dtype=object),
+        'Einsender': column(["Bachmann Charité", "Weber Charité", "Schreiber Charité", "Grün Charité"]),
+        'Eingang': rng.choice([f"2023-{month:02d}-01" for month in range(1, 13)], n_rows),
+        'Sub_panel': column(["Alport", "CAKUT", "Zysten", "aHUS", "Tubulopathie"]),
+        'Standort': column(["CVK", "CCM", "CBF"]),
+        'Datatransfer': column(["yes", "no"]),
+        'Befunder': column(["Grünhagen", "Abad", "Müller"]),
+        'Gen': column(["PKD1", "PKD2", "COL4A5", "COL4A3", "UMOD", "CFHR1"]),
+        'Outcome': rng.choice(["negativ", "positiv"], n_rows),
+        'Klassifizierung': column(["VUS", "Likely pathogenic", "Pathogenic", "Risk factor"]),
+    })
+
+
+def check_missing_values():
+    """
+    Missing values are skipped and a case without any value gets NaN.
+    """
+    df = synthetic_cases(3_000, missing_share=0.3, seed=1)
+    df.loc[df['Blutbuch_nummer'] == df['Blutbuch_nummer'].iloc[0], 'Gen'] = np.nan
+    agg_dict = {col: 'max' if col in ('Eingang', 'Outcome') else
+                (lambda x: " | ".join(x.dropna().unique()) if x.notna().any() else np.nan)
+                for col in SUMMARY_COLS}
+    expected = df.groupby(GROUP_COLS).agg(agg_dict).reset_index()
+    actual = summarize_joined(df)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    assert actual['Gen'].isna().any(), "a case without any Gen should be NaN"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the grouped string aggregation of the CeRKiD summary')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='Table sizes to benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions per size')
+    args = parser.parse_args()
+
+    check_missing_values()
+
+    print(f"{'rows':>10} {'cases':>9} {'lambda [s]':>11} {'joined [s]':>11} {'speedup':>9}")
+    for n_rows in args.rows:
+        df = synthetic_cases(n_rows)
+
+        expected = summarize_lambda(df)
+        actual = summarize_joined(df)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+        legacy = time_call(summarize_lambda, df, repeat=1)
+        joined = time_call(summarize_joined, df, repeat=args.repeat)
+        print(f"{n_rows:>10} {len(expected):>9} {legacy:>11.3f} {joined:>11.3f} {legacy / joined:>8.1f}x")
+    print("\n✓ Parity check passed: the summaries are identical, missing values are skipped")
+
+
+if __name__ == '__main__':
+    main()
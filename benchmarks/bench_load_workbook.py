@@ -0,0 +1,84 @@
+"""
+Benchmark the mapped-column workbook loader against pd.read_excel(dtype=str)
+on a wide synthetic Übersicht sheet.
+
+Checks that the loader returns exactly the mapped columns of the full read,
+then reports load time and tracemalloc peak of both. Generated workbooks are
+kept in the work directory and reused.
+
+Run from the repository root:
+    python -m benchmarks.bench_load_workbook
+    python -m benchmarks.bench_load_workbook --rows 10000 50000 --extra-columns 80
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_uebersicht
+from nephro_workbook import column_candidates, python_calamine, read_excel_columns
+
+
+def wide_workbook(path, n_rows, config, extra_columns, seed=0):
+    """
+    Write a synthetic sheet with extra_columns additional unmapped columns.
+    """
+    if os.path.exists(path):
+        return
+    rng = np.random.default_rng(seed)
+    sheet = generate_uebersicht(n_rows, config, seed=seed)
+    for i in range(extra_columns):
+        sheet[f"Zusatz {i}"] = rng.integers(0, 1000, n_rows).astype(str)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    sheet.to_excel(path + ".tmp.xlsx", index=False)
+    os.replace(path + ".tmp.xlsx", path)
+
+
+def measure(func):
+    """
+    Wall time in seconds and tracemalloc peak in bytes of one call, and its result.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark loading only the mapped workbook columns')
+    parser.add_argument('--rows', type=int, nargs='+', default=[5_000, 20_000], help='Sheet sizes to benchmark')
+    parser.add_argument('--extra-columns', type=int, default=40, help='Unmapped columns added to the sheet')
+    parser.add_argument('--config', default='config.json', help='Configuration file with the column schema')
+    parser.add_argument('--work-dir', default=os.path.join('results', 'benchmark_workbooks'),
+                        help='Directory for the generated workbooks')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    columns = column_candidates(config)
+    print(f"Mapped-column engine: {'calamine' if python_calamine is not None else 'openpyxl read-only'}")
+
+    print(f"\n{'rows':>8} {'cols':>5} {'read_excel [s]':>15} {'mapped [s]':>11} "
+          f"{'read_excel peak [MB]':>21} {'mapped peak [MB]':>17}")
+    for n_rows in args.rows:
+        path = os.path.join(args.work_dir, f"wide_{n_rows}_{args.extra_columns}.xlsx")
+        wide_workbook(path, n_rows, config, args.extra_columns)
+
+        full_time, full_peak, full = measure(lambda: pd.read_excel(path, dtype=str))
+        mapped_time, mapped_peak, mapped = measure(lambda: read_excel_columns(path, columns))
+        pd.testing.assert_frame_equal(mapped, full[list(mapped.columns)])
+
+        print(f"{n_rows:>8} {full.shape[1]:>5} {full_time:>15.3f} {mapped_time:>11.3f} "
+              f"{full_peak / 1024 / 1024:>21.1f} {mapped_peak / 1024 / 1024:>17.1f}")
+    print("\n✓ Parity check passed: mapped columns equal the full read")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark writing the final long table as xlsx, csv, parquet and arrow.
+
+Builds the long table from a synthetic sheet with the in-process pipeline
+stages, writes it in every format (and partitioned by Klassifizierung),
+checks that every file reads back to the same values,
+and reports write time and file size.
+
+Run from the repository root:
+    python -m benchmarks.bench_output_formats
+    python -m benchmarks.bench_output_formats --rows 100000 --skip-xlsx
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from benchmarks.common import time_call
+from benchmarks.synthetic_data import generate_uebersicht
+from nephro_output import save_long_table
+from nephro_pipeline import LongTablePipeline
+
+
+def build_long_table(n_rows, config):
+    """
+    Final long table of a synthetic sheet, without the external filter.
+    """
+    pipeline = LongTablePipeline(config, verbose=False)
+    filtered, all_cols = pipeline.build_long_table(pipeline.prepare(generate_uebersicht(n_rows, config)))
+    return pipeline.expand(filtered[all_cols].drop_duplicates().reset_index(drop=True))
+
+
+def read_back(path, output_format, partitioned):
+    """
+    Read an output file (or partition directory) as strings with empty
+    cells as '', for comparison across formats.
+    """
+    if partitioned:
+        import pyarrow.dataset as ds
+        df = ds.dataset(path, format='ipc' if output_format == 'arrow' else 'parquet',
+                        partitioning='hive').to_table().to_pandas()
+    elif output_format == 'csv':
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    elif output_format == 'xlsx':
+        df = pd.read_excel(path, dtype=str, keep_default_na=False)
+    elif output_format == 'parquet':
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_feather(path)
+    return df.astype(object).where(df.notna(), '').astype(str)
+
+
+def directory_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark long table output formats')
+    parser.add_argument('--rows', type=int, default=20_000, help='Rows of the synthetic sheet')
+    parser.add_argument('--config', default='config.json', help='Configuration file with the column schema')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions per format')
+    parser.add_argument('--skip-xlsx', action='store_true', help='Leave out the (slow) Excel output')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    long_table = build_long_table(args.rows, config)
+    columns = list(long_table.columns)
+
+    cases = [("csv", None, None), ("parquet", None, None), ("parquet", "zstd", None),
+             ("arrow", None, None), ("arrow", "zstd", None), ("parquet", None, "klassifizierung")]
+    if not args.skip_xlsx:
+        cases.insert(0, ("xlsx", None, None))
+
+    out_dir = tempfile.mkdtemp(prefix="bench_output_")
+    try:
+        expected = None
+        print(f"Long table: {len(long_table)} rows\n")
+        print(f"{'format':>10} {'compression':>12} {'partition':>16} {'write [s]':>10} {'size [MB]':>10}")
+        for output_format, compression, partition_by in cases:
+            path = os.path.join(out_dir, f"{output_format}_{compression}_{partition_by}.{output_format}")
+
+            def write():
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                save_long_table(long_table, path, output_format, compression=compression, partition_by=partition_by)
+
+            seconds = time_call(write, repeat=args.repeat)
+            actual = read_back(path, output_format, partition_by is not None)[columns]
+            actual = actual.sort_values(columns).reset_index(drop=True)
+            if expected is None:
+                expected = actual
+            else:
+                pd.testing.assert_frame_equal(actual, expected)
+            print(f"{output_format:>10} {compression or 'default':>12} {partition_by or '-':>16} "
+                  f"{seconds:>10.3f} {directory_size(path) / 1024 / 1024:>10.2f}")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    print("\n✓ Parity check passed: every format reads back to the same values")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark the compiled Klassifizierung recoder against the original
+DataFrame.apply(axis=1) implementation that scans config.json on every row.
+
+Checks that both implementations give identical results on every generated
+table, then times them at several scales.
+
+Run from the repository root:
+    python -m benchmarks.bench_recode_klassifizierung
+    python -m benchmarks.bench_recode_klassifizierung --rows 10000 100000 1000000
+"""
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import time_call
+from nephro_transforms import compile_klassifizierung_rules, recode_klassifizierung
+
+
+def recode_klassifizierung_apply(df, config):
+    """
+    Original row-wise implementation, kept as the parity reference.
+    """
+    def recode_row(row):
+        k = row['Klassifizierung']
+        cDNA = row['cDNA']
+        gen = row['Gen']
+
+        mapping = config["klassifizierung_mapping"]
+        for class_key, class_config in mapping.items():
+            if k in class_config["input_values"]:
+                return class_config["output_value"]
+
+        for rule in config["special_variant_rules"]:
+            if rule["condition"] == "missing_klassifizierung_and_cdna_equals":
+                if pd.isna(k) and cDNA == rule["cdna_value"]:
+                    return rule["output_value"]
+            elif rule["condition"] == "missing_klassifizierung_and_cdna_in":
+                if pd.isna(k) and cDNA in rule["cdna_values"]:
+                    return rule["output_value"]
+            elif rule["condition"] == "missing_klassifizierung_and_gen_equals":
+                if pd.isna(k) and gen == rule["gen_value"]:
+                    return rule["output_value"]
+
+        return k
+
+    return df.apply(recode_row, axis=1)
+
+
+def synthetic_variants(n_rows, config, seed=0):
+    """
+    Variant table drawing Klassifizierung values from every configured spelling,
+    unknown spellings and missing values, with cDNA/Gen values that trigger the
+    special variant rules.
+    """
+    rng = np.random.default_rng(seed)
+    spellings = [value for class_config in config["klassifizierung_mapping"].values()
+                 for value in class_config["input_values"]]
+    spellings += ["Klasse I", "benigne", "unklar"]
+    special_cdna = []
+    special_gen = []
+    for rule in config["special_variant_rules"]:
+        special_cdna.extend(rule.get("cdna_values", [rule.get("cdna_value")]))
+        special_gen.append(rule.get("gen_value"))
+    cdna_values = [value for value in special_cdna if value] + ["c.1A>G", "c.2C>T"]
+    gen_values = [value for value in special_gen if value] + ["PKD1", "COL4A3"]
+
+    klassifizierung = rng.choice(np.array(spellings, dtype=object), n_rows)
+    klassifizierung[rng.random(n_rows) < 0.2] = np.nan
+    return pd.DataFrame({
+        'Gen': rng.choice(np.array(gen_values, dtype=object), n_rows),
+        'cDNA': rng.choice(np.array(cdna_values, dtype=object), n_rows),
+        'Klassifizierung': klassifizierung,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Klassifizierung recoding')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='Table sizes to benchmark')
+    parser.add_argument('--config', default='config.json', help='Configuration file with the rules')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions per size')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    print(f"{'rows':>10} {'apply [s]':>11} {'compile [s]':>13} {'compiled [s]':>14} {'speedup':>9}")
+    for n_rows in args.rows:
+        df = synthetic_variants(n_rows, config)
+
+        expected = recode_klassifizierung_apply(df, config)
+        actual = recode_klassifizierung(df, compile_klassifizierung_rules(config))
+        pd.testing.assert_series_equal(actual, expected, check_dtype=False, check_names=False)
+
+        legacy = time_call(recode_klassifizierung_apply, df, config, repeat=1)
+        compile_time = time_call(compile_klassifizierung_rules, config, repeat=args.repeat)
+        rules = compile_klassifizierung_rules(config)
+        compiled = time_call(recode_klassifizierung, df, rules, repeat=args.repeat)
+        print(f"{n_rows:>10} {legacy:>11.3f} {compile_time:>13.5f} {compiled:>14.3f} {legacy / compiled:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark the report lookup of the CeRKiD transfer script
+(nephro_reports_processor.py): nephro_report_index.ReportIndex against
+the original membership filter (nephro_samples.match_ids) over the flat
+table of all report PDFs.
+
+Checks that both select the same reports for a case selection and that
+the index finds the same cases without a report, then times the
+selection, single-case lookups and the index update at several scales.
+
+Run from the repository root:
+    python -m benchmarks.bench_report_index
+    python -m benchmarks.bench_report_index --rows 10000 100000 1000000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_report_paths import ROOT, synthetic_reports
+from benchmarks.common import time_call
+from nephro_pdf_index import report_metadata_table
+from nephro_report_index import ReportIndex
+from nephro_samples import match_ids
+
+
+def select_original(reports, cases):
+    """
+    Transfer selection of the original script, kept as the parity reference.
+    """
+    mask, report = match_ids(reports['Blutbuch_Nummer'], cases)
+    return reports[mask].copy(), report['not_found']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the report index lookups')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='Numbers of report PDFs to benchmark')
+    parser.add_argument('--cases', type=int, default=2_000, help='Cases in the transfer selection')
+    parser.add_argument('--lookups', type=int, default=1_000, help='Single-case lookups to time')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions per size')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    work_dir = tempfile.mkdtemp(prefix="bench_report_index_")
+    print(f"{'reports':>10} {'sync [s]':>9} {'filter [s]':>11} {'index [s]':>10} "
+          f"{'filter/case [ms]':>17} {'index/case [ms]':>16}")
+    try:
+        for n_rows in args.rows:
+            # Random paths can repeat; a path exists only once on the share
+            reports = report_metadata_table(synthetic_reports(n_rows), ROOT).drop_duplicates('value')
+            known = reports['Blutbuch_Nummer'].unique()
+            cases = np.concatenate([rng.choice(known, args.cases // 2, replace=False),
+                                    np.array([f"X{number}" for number in range(args.cases // 2)], dtype=object)])
+
+            with ReportIndex(os.path.join(work_dir, f"reports_{n_rows}.sqlite")) as report_index:
+                start = time.perf_counter()
+                report_index.sync_reports(reports)
+                sync = time.perf_counter() - start
+
+                expected, expected_missing = select_original(reports, cases)
+                report_index.set_eligible_cases(cases)
+                actual = report_index.reports_for_cases(cases)
+                assert sorted(actual['value']) == sorted(expected['value']), "selected reports differ"
+                assert report_index.eligible_cases_without_reports() == sorted(expected_missing), \
+                    "cases without a report differ"
+
+                filtered = time_call(select_original, reports, cases, repeat=args.repeat)
+                indexed = time_call(report_index.reports_for_cases, cases, repeat=args.repeat)
+                lookups = cases[:args.lookups]
+                filter_case = time_call(lambda: [select_original(reports, [case]) for case in lookups], repeat=1)
+                index_case = time_call(lambda: [report_index.reports_for_case(case) for case in lookups], repeat=1)
+            print(f"{n_rows:>10} {sync:>9.3f} {filtered:>11.3f} {indexed:>10.3f} "
+                  f"{filter_case / len(lookups) * 1000:>17.3f} {index_case / len(lookups) * 1000:>16.3f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print("\n✓ Parity check passed: same reports and cases without a report")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark the report metadata extraction of the CeRKiD transfer script
+(nephro_reports_processor.py): nephro_pdf_index.report_metadata_table,
+which parses each path once with REPORT_PATH_PATTERN into a typed table,
+against the original report table with a re.sub per path through apply,
+str.split and a regex replace for the Blutbuch-Nummer. Also times a second run that takes the parsed
+metadata from the file index.
+
+Checks that subfolder, file and Blutbuch_Nummer are identical on the
+generated paths, then times the variants at several scales.
+
+Run from the repository root:
+    python -m benchmarks.bench_report_paths
+    python -m benchmarks.bench_report_paths --rows 10000 100000 1000000
+"""
+import argparse
+import re
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import time_call
+from nephro_pdf_index import report_metadata_table
+
+ROOT = "//10.28.149.154/hum/HGDiag/Befunde/Nephro"
+
+
+def parse_original(reports):
+    """
+    Report table and path processing of the original script, kept as the
+    parity reference (with the split count passed as n=1, which current
+    pandas requires).
+    """
+    def get_subfolder_and_file(path):
+        return re.sub(r"//10.28.149.154/hum/HGDiag/Befunde/Nephro/20[0-9][0-9]/", "", path)
+
+    pdf_lb = pd.DataFrame(list(reports), columns=['value', 'size', 'mtime_ns'])
+    pdf_reports = pdf_lb.copy()
+    pdf_reports['subfolder_and_file'] = pdf_reports['value'].apply(get_subfolder_and_file)
+    pdf_reports[['subfolder', 'file']] = pdf_reports['subfolder_and_file'].str.split("/", n=1, expand=True)
+    pdf_reports['Blutbuch_Nummer'] = pdf_reports['subfolder'].str.replace(r"[_| ].+", "", regex=True)
+    return pdf_reports
+
+
+def synthetic_reports(n_rows, seed=0):
+    """
+    (path, size, mtime_ns) of report PDFs in year folders, with the
+    subfolder spellings of the share (Blutbuch-Nummer followed by "_",
+    " " or "|" and a name, or alone) and nested report folders.
+    """
+    rng = np.random.default_rng(seed)
+    years = rng.integers(2015, 2026, n_rows)
+    numbers = rng.integers(100_000, 999_999, n_rows)
+    suffixes = rng.choice(np.array(["_Mueller", " Schmidt K", "|alt", "", "_", "__2"], dtype=object), n_rows)
+    files = rng.choice(np.array(["Befund.pdf", "Befund_final.pdf", "Nachbefund 2.pdf", "alt/Befund.pdf",
+                                 "2023-befund-Exom.pdf", "Zusatzbefund_CNV.pdf"], dtype=object), n_rows)
+    return [(f"{ROOT}/{year}/{number}{suffix}/{file}", 100_000, 1_700_000_000_000_000_000)
+            for year, number, suffix, file in zip(years.tolist(), numbers.tolist(), suffixes, files)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the report path parsing')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='Numbers of report paths to benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions per size')
+    args = parser.parse_args()
+
+    print(f"{'paths':>10} {'original [s]':>13} {'parsed [s]':>11} {'from index [s]':>15} {'speedup':>9}")
+    for n_rows in args.rows:
+        reports = synthetic_reports(n_rows)
+
+        expected = parse_original(reports)
+        index = {}
+        actual = report_metadata_table(reports, ROOT, index)
+        for col in ['value', 'subfolder', 'file', 'Blutbuch_Nummer']:
+            pd.testing.assert_series_equal(actual[col], expected[col], check_dtype=False)
+        pd.testing.assert_frame_equal(report_metadata_table(reports, ROOT, index), actual)
+
+        original = time_call(parse_original, reports, repeat=args.repeat)
+        parsed = time_call(report_metadata_table, reports, ROOT, repeat=args.repeat)
+        cached = time_call(report_metadata_table, reports, ROOT, index, repeat=args.repeat)
+        print(f"{n_rows:>10} {original:>13.3f} {parsed:>11.3f} {cached:>15.3f} {original / parsed:>8.1f}x")
+    print("\n✓ Parity check passed: subfolder, file and Blutbuch_Nummer are identical")
+
+
+if __name__ == '__main__':
+    main()
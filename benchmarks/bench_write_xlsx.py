@@ -0,0 +1,103 @@
+"""
+Benchmark the Excel writers for the final long table: DataFrame.to_excel
+(openpyxl, whole workbook in memory) against the streaming writers
+(xlsxwriter constant_memory mode and openpyxl write-only mode).
+
+Checks that every writer produces a file that reads back to the same
+table, then reports write time, rows per second and peak Python memory
+(tracemalloc) while writing.
+
+Run from the repository root:
+    python -m benchmarks.bench_write_xlsx
+    python -m benchmarks.bench_write_xlsx --rows 100000 500000 --no-check
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import nephro_output
+from nephro_output import write_xlsx
+
+
+def synthetic_long_table(n_rows, seed=0):
+    """
+    Long table with the output columns, low-cardinality categorical
+    columns and about a third of the optional cells empty.
+    """
+    rng = np.random.default_rng(seed)
+    genes = np.array(["PKD1", "PKD2", "COL4A3", "COL4A4", "COL4A5", "NPHS1", "NPHS2", "HNF1B"], dtype=object)
+    classes = np.array(["Pathogenic", "Likely pathogenic", "VUS", "Risk factor"], dtype=object)
+    empty = rng.random((n_rows, 3)) < 0.35
+    return pd.DataFrame({
+        "Blutbuch_nummer": [f"LB{23 + i % 3}-{i // 2:06d}" for i in range(n_rows)],
+        "AF_Nummer_MEDAT": np.where(empty[:, 0], None, [f"AF{i:07d}" for i in range(n_rows)]),
+        "Panel_oder_segregation": pd.Categorical(["Exom/Nephro"] * n_rows),
+        "Bemerkung": np.where(empty[:, 1], None, "Befund an Einsender"),
+        "Befunddatum": np.where(empty[:, 2], None, "2024-03-15"),
+        "Gen": pd.Categorical(genes[rng.integers(0, len(genes), n_rows)]),
+        "cDNA": [f"c.{position}G>A" for position in rng.integers(1, 12_000, n_rows)],
+        "Protein": [f"p.(Arg{position}His)" for position in rng.integers(1, 4_000, n_rows)],
+        "Klassifizierung": pd.Categorical(classes[rng.integers(0, len(classes), n_rows)]),
+    })
+
+
+def measure(write):
+    """
+    Wall time in seconds of one call, and the tracemalloc peak in MB of a
+    second call (tracing slows the writers down, so it is not timed).
+    """
+    start = time.perf_counter()
+    write()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    write()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Excel writers')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 50_000], help='Table sizes to benchmark')
+    parser.add_argument('--no-check', action='store_true', help='Skip reading the files back (slow for large tables)')
+    args = parser.parse_args()
+
+    writers = ["pandas", "xlsxwriter", "openpyxl"] if nephro_output.xlsxwriter is not None else ["pandas", "openpyxl"]
+    out_dir = tempfile.mkdtemp(prefix="bench_xlsx_")
+    xlsxwriter_module = nephro_output.xlsxwriter
+    try:
+        print(f"{'rows':>10} {'writer':>11} {'write [s]':>10} {'rows/s':>10} {'peak [MB]':>10} {'size [MB]':>10}")
+        for n_rows in args.rows:
+            long_table = synthetic_long_table(n_rows)
+            expected = None
+            for writer in writers:
+                path = os.path.join(out_dir, f"{writer}_{n_rows}.xlsx")
+                # Threshold None keeps DataFrame.to_excel, 0 streams; hiding
+                # xlsxwriter selects the openpyxl write-only writer
+                nephro_output.xlsxwriter = None if writer == "openpyxl" else xlsxwriter_module
+                seconds, peak_mb = measure(lambda: write_xlsx(long_table, path, None if writer == "pandas" else 0))
+                nephro_output.xlsxwriter = xlsxwriter_module
+
+                if not args.no_check:
+                    actual = pd.read_excel(path, dtype=str)
+                    if expected is None:
+                        expected = actual
+                    else:
+                        pd.testing.assert_frame_equal(actual, expected)
+                print(f"{n_rows:>10} {writer:>11} {seconds:>10.2f} {n_rows / seconds:>10.0f} "
+                      f"{peak_mb:>10.1f} {os.path.getsize(path) / 1024 / 1024:>10.1f}")
+    finally:
+        nephro_output.xlsxwriter = xlsxwriter_module
+        shutil.rmtree(out_dir, ignore_errors=True)
+    if not args.no_check:
+        print("\n✓ Parity check passed: every writer produces the same table")
+
+
+if __name__ == '__main__':
+    main()
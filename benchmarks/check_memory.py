@@ -0,0 +1,97 @@
+"""
+Memory regression check for the Excel-only pipeline.
+
+Writes a synthetic Übersicht workbook and runs the whole pipeline on it
+(load, transform and CSV output, without the workbook cache) with the
+stage profiler. The check compares the highest tracemalloc peak of the
+stages after loading with the memory the loaded sheet takes. Fails with
+exit code 1 when that peak exceeds --max-ratio times the sheet, so a
+change that keeps the sheet or intermediate tables alive, or adds
+full-table copies, shows up as a failed check.
+
+Run from the repository root:
+    python -m benchmarks.check_memory
+    python -m benchmarks.check_memory --rows 50000 --max-ratio 2.0
+    python -m benchmarks.check_memory --pre-recode-summary
+"""
+import argparse
+import copy
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks.bench_load_workbook import wide_workbook
+from nephro_pipeline import LongTablePipeline
+from nephro_profiling import StageProfiler
+
+# Highest peak after loading relative to the loaded sheet; measured at 1.7 to
+# 1.8 on 20,000 to 60,000 synthetic rows (2.5 to 2.8 while the sheet and the
+# intermediate tables were kept alive), with headroom for pandas versions
+DEFAULT_MAX_RATIO = 2.0
+
+
+def measure_memory(config, rows, work_dir, pre_recode_summary=False):
+    """
+    Run the pipeline on a synthetic sheet of rows rows written to work_dir
+    and return a dict with the loaded sheet size (sheet_bytes), the highest
+    peak after loading (peak_bytes) in stage peak_stage, their ratio and
+    the number of output rows.
+    """
+    workbook = os.path.join(work_dir, f"uebersicht_{rows}_0.xlsx")
+    wide_workbook(workbook, rows, config, extra_columns=0)
+
+    config = copy.deepcopy(config)
+    config["file_paths"]["input_excel_file"] = workbook
+    config["data_processing"] = dict(config.get("data_processing", {}), pre_recode_summary=pre_recode_summary)
+    config["sample_lists"] = dict(config.get("sample_lists", {}), lists=[])
+    config["output"] = dict(config.get("output", {}), partition_by=None)
+
+    out_dir = tempfile.mkdtemp(prefix="check_memory_")
+    profiler = StageProfiler(enabled=True)
+    try:
+        pipeline = LongTablePipeline(config, verbose=False, profiler=profiler, workbook_cache={"enabled": False})
+        result = pipeline.run('csv', output_path=os.path.join(out_dir, "long_table.csv"))
+    finally:
+        tracemalloc.stop()
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    stages = profiler.stages
+    sheet_bytes = next(stage["traced_delta_bytes"] for stage in stages if stage["name"] == "load")
+    peak_stage = max((stage for stage in stages if stage["name"] != "load"),
+                     key=lambda stage: stage["traced_total_peak_bytes"])
+    peak = peak_stage["traced_total_peak_bytes"]
+    return {"sheet_bytes": sheet_bytes, "peak_bytes": peak, "peak_stage": peak_stage["name"],
+            "ratio": peak / sheet_bytes, "output_rows": len(result["long_table"])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the peak memory of a pipeline run')
+    parser.add_argument('--rows', type=int, default=20_000, help='Rows of the synthetic sheet')
+    parser.add_argument('--max-ratio', type=float, default=DEFAULT_MAX_RATIO,
+                        help='Allowed peak memory after loading as a multiple of the loaded sheet')
+    parser.add_argument('--pre-recode-summary', action='store_true',
+                        help='Also build the unique combinations before recoding')
+    parser.add_argument('--config', default='config.json', help='Base configuration file')
+    parser.add_argument('--work-dir', default=os.path.join('results', 'benchmark_workbooks'),
+                        help='Directory for the generated workbooks')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    measured = measure_memory(config, args.rows, args.work_dir, args.pre_recode_summary)
+
+    print(f"Sheet: {args.rows} rows, {measured['sheet_bytes'] / 1024 / 1024:.1f} MB loaded, "
+          f"output: {measured['output_rows']} rows")
+    print(f"Peak after loading: {measured['peak_bytes'] / 1024 / 1024:.1f} MB in {measured['peak_stage']} "
+          f"({measured['ratio']:.2f}x the sheet, limit {args.max_ratio:.2f}x)")
+    if measured["ratio"] > args.max_ratio:
+        print("❌ Memory regression: peak usage exceeds the limit")
+        sys.exit(1)
+    print("✓ Peak memory within the limit")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Correctness check for the CeRKiD report transfer (nephro_transfer).
+
+Writes reports with distinct contents to a temporary share, among them
+reports of different cases with the same file name, and checks that:
+- every report arrives byte-identical under its own destination name
+  (same-named reports with their case folder in front) and a second run
+  skips all of them,
+- files already in the destination folder are never replaced by a
+  different report, and a case added later keeps the names of earlier
+  runs from the manifest intact,
+- concurrent copy_one calls to one destination (as after a retry) each
+  use their own temporary file, so the destination is exactly one of the
+  sources and no partial files are left.
+
+Run from the repository root:
+    python -m benchmarks.check_transfer
+    python -m benchmarks.check_transfer --size-mb 30 --copies 8
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from nephro_transfer import copy_one, transfer_files
+
+
+def write_report(path, size, fill):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(bytes([fill]) * size)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def check_outcomes(outcomes, sources, expected_status, failures, run):
+    """
+    Every source has the expected status and its destination holds its
+    contents; no two sources share a destination.
+    """
+    for source in sources:
+        outcome = outcomes[source]
+        if outcome["status"] != expected_status or read(outcome["dest"]) != read(source):
+            failures.append(f"{run} run: {source} not {expected_status} intact: {outcome}")
+    dests = [os.path.normcase(outcomes[source]["dest"]).lower() for source in sources]
+    if len(set(dests)) != len(dests):
+        failures.append(f"{run} run: several reports share a destination")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the report transfer with same-named reports')
+    parser.add_argument('--size-mb', type=float, default=4, help='Size of each report')
+    parser.add_argument('--copies', type=int, default=8, help='Same-named reports copied at the same time')
+    args = parser.parse_args()
+    size = int(args.size_mb * 1024 * 1024)
+
+    work_dir = tempfile.mkdtemp(prefix="check_transfer_")
+    failures = []
+    try:
+        share = os.path.join(work_dir, "share")
+        same_named = [os.path.join(share, f"2024{case:05d}_Patient", "Befund.pdf") for case in range(args.copies)]
+        unique = [os.path.join(share, f"2024{case:05d}_Patient", f"2024{case:05d}_Befund.pdf")
+                  for case in range(args.copies)]
+        for fill, path in enumerate(same_named + unique):
+            write_report(path, size, fill)
+
+        dest_dir = os.path.join(work_dir, "dest")
+        manifest_path = os.path.join(work_dir, "manifest.jsonl")
+        # A report copied under the bare name by an older run, and an unrelated
+        # file under the name of one of the unique reports
+        write_report(os.path.join(dest_dir, "Befund.pdf"), 10, 200)
+        write_report(os.path.join(dest_dir, os.path.basename(unique[0])), 10, 201)
+
+        for run, expected_status in (("first", "copied"), ("second", "skipped")):
+            outcomes = transfer_files(same_named + unique, dest_dir, manifest_path, max_workers=args.copies)
+            check_outcomes(outcomes, same_named + unique, expected_status, failures, run)
+        for source in same_named:
+            expected_name = f"{os.path.basename(os.path.dirname(source))}_Befund.pdf"
+            if os.path.basename(outcomes[source]["dest"]) != expected_name:
+                failures.append(f"{source} copied as {outcomes[source]['dest']}, not {expected_name}")
+        if read(os.path.join(dest_dir, "Befund.pdf")) != bytes([200]) * 10:
+            failures.append("a report replaced the file of an older run")
+        if read(os.path.join(dest_dir, os.path.basename(unique[0]))) != bytes([201]) * 10:
+            failures.append("a report replaced a different file with its name")
+
+        # A new case with a report of the same name: earlier names stay as they are
+        added = os.path.join(share, "2025", "202500001_Patient", "Befund.pdf")
+        write_report(added, size, 150)
+        dests = {source: outcomes[source]["dest"] for source in same_named + unique}
+        outcomes = transfer_files(same_named + unique + [added], dest_dir, manifest_path)
+        check_outcomes(outcomes, [added], "copied", failures, "third")
+        check_outcomes(outcomes, same_named + unique, "skipped", failures, "third")
+        if any(outcomes[source]["dest"] != dest for source, dest in dests.items()):
+            failures.append("destination names changed when a report was added")
+        if [name for name in os.listdir(dest_dir) if name.endswith(".part")]:
+            failures.append("partial files left behind")
+
+        race_dir = os.path.join(work_dir, "race")
+        os.makedirs(race_dir)
+        with ThreadPoolExecutor(max_workers=args.copies) as pool:
+            outcomes = list(pool.map(lambda source: copy_one(source, race_dir), same_named))
+        contents = {read(source) for source in same_named}
+        if any(outcome["status"] != "copied" for outcome in outcomes):
+            failures.append(f"concurrent copies failed: {[outcome['reason'] for outcome in outcomes]}")
+        if read(os.path.join(race_dir, "Befund.pdf")) not in contents:
+            failures.append("concurrent copies produced a destination mixed from several sources")
+        if [name for name in os.listdir(race_dir) if name.endswith(".part")]:
+            failures.append("partial files left behind")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print(f"✓ Transfer check passed: {2 * args.copies} reports copied intact under unique names, "
+          f"existing files kept, concurrent copies to one destination not mixed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+import time
+
+
+def time_call(func, *args, repeat=3):
+    """
+    Return the best wall-clock time in seconds over repeat calls.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -0,0 +1,181 @@
+"""
+Benchmark harness for the Excel-only pipeline on synthetic data.
+
+Two modes, each run at several scales:
+  pipeline  runs nephro_reports_processor_excel_only.py on a synthetic workbook
+            in a fresh process with --profile and collects its stage report
+  stages    times the transformation stages in-process on a synthetic sheet,
+            without Excel I/O, so it also works at 1M rows
+
+Throughput (rows/s) and peak memory per stage are written to a JSON results
+file. Generated workbooks are kept in the work directory and reused.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --mode stages --rows 1000 10000 100000 1000000
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_sample_list, generate_uebersicht
+from nephro_pipeline import LongTablePipeline, unique_combinations
+from nephro_profiling import StageProfiler
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT_PATH = os.path.join(REPO_DIR, "nephro_reports_processor_excel_only.py")
+EXTERNAL_SAMPLES_PATH = r"data\AGDE_Nephrology_Samples_2025-06-19.xlsx"
+
+
+def prepare_run_directory(work_dir, n_rows, config, seed):
+    """
+    Create a run directory with a synthetic workbook, the external sample
+    list at the path the script expects, and a config.json pointing at them.
+    """
+    run_dir = os.path.join(work_dir, f"rows_{n_rows}_seed_{seed}")
+    workbook_path = os.path.join(run_dir, "Uebersicht_Nierenfaelle_synthetic.xlsx")
+    os.makedirs(os.path.join(run_dir, "data"), exist_ok=True)
+
+    if not os.path.exists(workbook_path):
+        print(f"Generating synthetic workbook with {n_rows} rows...")
+        sheet = generate_uebersicht(n_rows, config, seed=seed)
+        sheet.to_excel(workbook_path + ".tmp.xlsx", index=False)
+        os.replace(workbook_path + ".tmp.xlsx", workbook_path)
+        generate_sample_list(sheet, seed=seed).to_excel(os.path.join(run_dir, EXTERNAL_SAMPLES_PATH), index=False)
+
+    run_config = json.loads(json.dumps(config))
+    run_config["file_paths"].update(
+        input_excel_file=os.path.basename(workbook_path),
+        output_directory="results",
+        state_directory="state",
+    )
+    with open(os.path.join(run_dir, "config.json"), 'w', encoding='utf-8') as f:
+        json.dump(run_config, f, ensure_ascii=False, indent=2)
+    return run_dir
+
+
+def run_pipeline(run_dir, output_format):
+    """
+    Run the Excel-only script with --profile in run_dir and return its
+    stage report.
+    """
+    command = [sys.executable, SCRIPT_PATH, "--format", output_format, "--profile", "--no-cache"]
+    completed = subprocess.run(command, cwd=run_dir, capture_output=True, text=True, encoding='utf-8')
+    if completed.returncode != 0:
+        print(completed.stdout[-2000:])
+        print(completed.stderr[-2000:])
+        raise RuntimeError(f"Pipeline run failed in {run_dir}")
+
+    reports = sorted(glob.glob(os.path.join(run_dir, "results", "*.profile.json")), key=os.path.getmtime)
+    with open(reports[-1], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_stages(n_rows, config, seed):
+    """
+    Time the transformation stages in-process and return a profile report.
+    Uses the quiet LongTablePipeline stages, so the numbers match the script
+    minus Excel I/O and the external sample filter.
+    """
+    sheet = generate_uebersicht(n_rows, config, seed=seed)
+    profiler = StageProfiler(enabled=True)
+    pipeline = LongTablePipeline(config, verbose=False, profiler=profiler)
+
+    selected = pipeline.prepare(sheet)
+    filtered, all_cols = pipeline.build_long_table(selected)
+
+    profiler.start("unique_combinations", rows_in=len(filtered))
+    long_table = unique_combinations(filtered, all_cols)
+    profiler.stop(rows_out=len(long_table))
+
+    pipeline.expand(long_table)
+    return profiler.report()
+
+
+def stage_records(report, mode, n_rows):
+    """
+    Flatten a profile report into one record per stage.
+    """
+    records = []
+    for stage in report["stages"]:
+        rows = stage["rows_in"] if stage["rows_in"] is not None else stage["rows_out"]
+        records.append({
+            "mode": mode,
+            "rows": n_rows,
+            "stage": stage["name"],
+            "wall_seconds": stage["wall_seconds"],
+            "cpu_seconds": stage["cpu_seconds"],
+            "rows_per_second": round(rows / stage["wall_seconds"], 1) if rows and stage["wall_seconds"] else None,
+            "traced_peak_bytes": stage["traced_peak_bytes"],
+            "peak_rss_bytes": stage["peak_rss_bytes"],
+        })
+    records.append({
+        "mode": mode,
+        "rows": n_rows,
+        "stage": "total",
+        "wall_seconds": report["total_wall_seconds"],
+        "rows_per_second": round(n_rows / report["total_wall_seconds"], 1),
+        "peak_rss_bytes": report["peak_rss_bytes"],
+    })
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Excel-only pipeline on synthetic data')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help='Sheet sizes to benchmark')
+    parser.add_argument('--mode', choices=['pipeline', 'stages', 'both'], default='both',
+                        help='Run the full script, the in-process stages, or both')
+    parser.add_argument('--format', choices=['xlsx', 'csv'], default='csv', help='Output format of the pipeline runs')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the synthetic data')
+    parser.add_argument('--config', default=os.path.join(REPO_DIR, 'config.json'), help='Base configuration file')
+    parser.add_argument('--work-dir', default=os.path.join('results', 'benchmark_runs'),
+                        help='Directory for generated workbooks and pipeline outputs')
+    parser.add_argument('--output', default=None, help='Results file (default: results/benchmark.<timestamp>.json)')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    records = []
+    for n_rows in args.rows:
+        if args.mode in ('pipeline', 'both'):
+            print(f"\nPipeline run with {n_rows} rows...")
+            run_dir = prepare_run_directory(os.path.abspath(args.work_dir), n_rows, config, args.seed)
+            records.extend(stage_records(run_pipeline(run_dir, args.format), 'pipeline', n_rows))
+        if args.mode in ('stages', 'both'):
+            print(f"\nIn-process stages with {n_rows} rows...")
+            records.extend(stage_records(run_stages(n_rows, config, args.seed), 'stages', n_rows))
+
+    results = {
+        "created": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "python": sys.version.split()[0],
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "records": records,
+    }
+    output_path = args.output or os.path.join(
+        'results', f"benchmark.{datetime.utcnow().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\n{'mode':<9} {'rows':>9} {'stage':<22} {'wall [s]':>10} {'rows/s':>12} {'peak RSS [MB]':>14}")
+    for record in records:
+        rows_per_second = f"{record['rows_per_second']:.0f}" if record['rows_per_second'] else '-'
+        peak_rss = f"{record['peak_rss_bytes'] / 1024 / 1024:.0f}" if record['peak_rss_bytes'] else '-'
+        print(f"{record['mode']:<9} {record['rows']:>9} {record['stage']:<22} "
+              f"{record['wall_seconds']:>10.3f} {rows_per_second:>12} {peak_rss:>14}")
+    print(f"\n✓ Benchmark results saved to: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
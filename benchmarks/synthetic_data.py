@@ -0,0 +1,164 @@
+"""
+Synthetic Übersicht_Nierenfälle workbooks for benchmarks.
+
+The generated sheet follows the column schema of config.json: mapped headers,
+the Gen...17/Protein...19 alternative headers, extra unmapped columns, patient
+blocks where only the first row carries Blutbuch-Nummer and Panel / Segregation
+(forward-fill gaps), semicolon-packed variant cells and Klassifizierung spelling
+variants taken from klassifizierung_mapping.
+
+Run from the repository root to write a workbook:
+    python -m benchmarks.synthetic_data --rows 10000 --output synthetic.xlsx
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+GENES = ['PKD1', 'PKD2', 'COL4A3', 'COL4A4', 'COL4A5', 'NPHS1', 'NPHS2', 'UMOD', 'HNF1B', 'PAX2',
+         'CFHR1', 'MT-ND5', 'SCNN1G', 'CEP83']
+PANELS = ['Exom/Nephro', 'Exom/Nephro', 'Exom/Nephro', 'Panel', 'Segregation']
+BEMERKUNGEN = ['negativ', 'positiv', 'neagiv', 'Deletion COL4A4', 'Befund in Arbeit', 'positiv, Segregation empfohlen']
+EINSENDER = ['Bachmann Charité', 'Weber', 'Schreiber Charié', 'Canaan-Kühl', 'extern']
+
+# Unmapped columns present in the real sheet, to get a realistic width
+EXTRA_COLUMNS = ['Geburtsjahr', 'Eingang/Freigabe', 'Geschlecht', 'einsender', 'Index-Nummer',
+                 'Sub-Panel', 'Klinik', 'Befunder', 'Gen...16', 'Protein...18']
+
+
+def _klassifizierung_spellings(config):
+    spellings = [value for class_config in config["klassifizierung_mapping"].values()
+                 for value in class_config["input_values"]]
+    # Unmapped spellings and stray whitespace, as typed by hand in the sheet
+    return spellings + ['Klasse I', 'benigne', ' Klasse III ', 'Klasse IV ']
+
+
+def _special_rule_values(config):
+    cdna_values = []
+    gen_values = []
+    for rule in config.get("special_variant_rules", []):
+        cdna_values.extend(rule.get("cdna_values", []))
+        if "cdna_value" in rule:
+            cdna_values.append(rule["cdna_value"])
+        if "gen_value" in rule:
+            gen_values.append(rule["gen_value"])
+    return cdna_values, gen_values
+
+
+def _pick(rng, choices, n_rows):
+    return rng.choice(np.array(choices, dtype=object), n_rows)
+
+
+def _with_missing(rng, values, share):
+    values = values.astype(object)
+    values[rng.random(len(values)) < share] = np.nan
+    return values
+
+
+def generate_uebersicht(n_rows, config, seed=0, use_alternative_headers=True,
+                        mean_rows_per_patient=2.5, semicolon_share=0.1):
+    """
+    Build a synthetic Übersicht_Nierenfälle sheet with n_rows rows as it
+    would be read with pd.read_excel(..., dtype=str) before any cleaning.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Patient blocks: only the first row of a block has Blutbuch-Nummer
+    starts_block = rng.random(n_rows) < 1 / mean_rows_per_patient
+    starts_block[0] = True
+    block_id = np.cumsum(starts_block)
+    years = rng.integers(18, 26, n_rows)
+    blutbuch = np.array([f"LB{year}-{block:05d}" for year, block in zip(years, block_id)], dtype=object)
+    blutbuch[~starts_block] = np.nan
+    panel = _pick(rng, PANELS, n_rows)
+    panel[~starts_block & (rng.random(n_rows) < 0.9)] = np.nan
+
+    cdna_special, gen_special = _special_rule_values(config)
+    genes = _pick(rng, GENES + gen_special, n_rows)
+    ref = rng.integers(0, 4, 60)
+    alt = (ref + rng.integers(1, 4, 60)) % 4
+    cdna_common = [f"c.{pos}{'ACGT'[r]}>{'ACGT'[a]}" for pos, r, a in zip(rng.integers(1, 9000, 60), ref, alt)]
+    cdna = _pick(rng, cdna_common + cdna_special, n_rows)
+    protein = np.array([f"p.(Arg{pos}Ter)" for pos in rng.integers(1, 3000, n_rows)], dtype=object)
+    klassifizierung = _pick(rng, _klassifizierung_spellings(config), n_rows)
+
+    has_variant = rng.random(n_rows) < 0.7
+    genes[~has_variant] = np.nan
+    cdna[~has_variant] = np.nan
+    protein[~has_variant] = np.nan
+    klassifizierung[~has_variant | (rng.random(n_rows) < 0.05)] = np.nan
+
+    packed = has_variant & (rng.random(n_rows) < semicolon_share)
+    genes[packed] = genes[packed] + '; ' + _pick(rng, GENES, packed.sum())
+    cdna[packed] = cdna[packed] + ';' + _pick(rng, ['c.1A>G', 'c.2C>T', 'c.3del'], packed.sum())
+    klassifizierung[packed & (rng.random(n_rows) < 0.5)] = 'Klasse III; Klasse IV'
+
+    befunddatum = pd.to_datetime('2018-01-01') + pd.to_timedelta(rng.integers(0, 2900, n_rows), unit='D')
+    befunddatum = _with_missing(rng, befunddatum.strftime('%Y-%m-%d %H:%M:%S').to_numpy(dtype=object), 0.6)
+
+    mapping = {target: target for target in config["column_mapping"]}
+    alternatives = config.get("alternative_column_names", {})
+    if use_alternative_headers:
+        for target, names in alternatives.items():
+            if target in mapping and names:
+                mapping[target] = names[0]
+
+    columns = {
+        "Blutbuch-Nummer": blutbuch,
+        "AF-Nummer (MEDAT)": _with_missing(rng, np.array([f"AF{n:06d}" for n in block_id], dtype=object), 0.5),
+        "Panel / Segregation": panel,
+        "Gen": genes,
+        "cDNA": cdna,
+        "Protein": protein,
+        "Klassifizierung": klassifizierung,
+        "Bemerkung": _with_missing(rng, _pick(rng, BEMERKUNGEN, n_rows), 0.6),
+        "variant_explains_phenotype": _with_missing(rng, _pick(rng, ['ja', 'nein', 'teilweise'], n_rows), 0.6),
+        "Befunddatum": befunddatum,
+    }
+    sheet = {mapping.get(name, name): values for name, values in columns.items() if name in mapping}
+
+    for name in EXTRA_COLUMNS:
+        if name in sheet:
+            continue
+        if name == 'einsender':
+            sheet[name] = _pick(rng, EINSENDER, n_rows)
+        else:
+            sheet[name] = _with_missing(rng, rng.integers(0, 100, n_rows).astype(str).astype(object), 0.3)
+
+    return pd.DataFrame(sheet)
+
+
+def generate_sample_list(uebersicht, share=0.8, seed=0):
+    """
+    External sample list (AGDE_Nephrology_Samples) with a share of the
+    Blutbuch-Nummer values of the synthetic sheet.
+    """
+    rng = np.random.default_rng(seed + 1)
+    ids = uebersicht["Blutbuch-Nummer"].dropna().unique()
+    return pd.DataFrame({"Blutbuch-Nummer": ids[rng.random(len(ids)) < share]})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic Übersicht_Nierenfälle workbook')
+    parser.add_argument('--rows', type=int, default=10_000, help='Number of rows')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--config', default='config.json', help='Configuration file with the column schema')
+    parser.add_argument('--output', required=True, help='Output .xlsx or .csv file')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    df = generate_uebersicht(args.rows, config, seed=args.seed)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    if args.output.endswith(".csv"):
+        df.to_csv(args.output, index=False)
+    else:
+        df.to_excel(args.output, index=False)
+    print(f"✓ Wrote {len(df)} synthetic rows to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
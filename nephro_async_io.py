@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from nephro_logging import get_logger
+from nephro_transfer import copy_via_partial
+
+DEFAULT_NETWORK_IO_SETTINGS = {
+    "enabled": False,
+    "max_concurrency": 16,
+    "timeout_seconds": 60,
+    "retries": 3,
+    "backoff_seconds": 0.5,
+}
+
+logger = get_logger("async_io")
+
+
+def network_io_settings(settings=None):
+    """
+    Merge user settings (the "network_io" section of config.json) with the
+    defaults.
+    """
+    merged = dict(DEFAULT_NETWORK_IO_SETTINGS)
+    merged.update(settings or {})
+    return merged
+
+
+def _retrieve_exception(future):
+    # Abandoned attempts are never awaited; keep asyncio from logging their errors
+    if not future.cancelled():
+        future.exception()
+
+
+class LocalBackend:
+    """
+    Blocking file operations on a mounted path (local disk or SMB share).
+
+    latency (seconds) is added to every operation and failure_rate is the
+    share of operations that fail with an OSError before touching the file,
+    so the share's round trips and dropped connections can be simulated
+    offline.
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+    def _round_trip(self, operation, path):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise ConnectionError(f"Injected failure: {operation} {path}")
+
+    def stat(self, path):
+        self._round_trip("stat", path)
+        return os.stat(path)
+
+    def listdir(self, path):
+        """
+        Entries of a directory as (name, is_dir, size, mtime_ns); size is 0
+        for directories.
+        """
+        self._round_trip("listdir", path)
+        entries = []
+        with os.scandir(path) as found:
+            for entry in found:
+                if entry.is_dir(follow_symlinks=False):
+                    entries.append((entry.name, True, 0, entry.stat(follow_symlinks=False).st_mtime_ns))
+                elif entry.is_file():
+                    stat = entry.stat()
+                    entries.append((entry.name, False, stat.st_size, stat.st_mtime_ns))
+        return entries
+
+    def checksum(self, path, chunk_size=1024 * 1024):
+        self._round_trip("checksum", path)
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def copy(self, source, dest):
+        """
+        Copy with metadata to a temporary name unique to this attempt and
+        rename it (nephro_transfer.copy_via_partial).
+        """
+        self._round_trip("copy", source)
+        copy_via_partial(source, dest)
+
+    def set_mtime(self, path, atime_ns, mtime_ns):
+        self._round_trip("set_mtime", path)
+        os.utime(path, ns=(atime_ns, mtime_ns))
+
+
+class AsyncFileIO:
+    """
+    asyncio front end to a blocking backend (LocalBackend by default).
+
+    At most max_concurrency operations run at a time, each in a worker
+    thread of its own pool. An operation that takes longer than
+    timeout_seconds or fails with an OSError is retried up to retries times,
+    waiting backoff_seconds * 2 ** attempt (with jitter) in between; missing
+    files and permission errors are not retried.
+
+    A timed out operation cannot be interrupted, so its thread keeps its
+    concurrency slot until it has really finished; new operations never
+    queue behind abandoned threads and lose their own timeout there. Reads
+    (stat, listdir, checksum) are retried at once. Writes (copy, set_mtime)
+    are not run twice side by side: after a timeout the attempt gets another
+    timeout_seconds to finish and is only retried if it fails within them.
+    A write still running after twice timeout_seconds raises TimeoutError
+    without a retry, as a second attempt would run next to the hung one.
+    """
+
+    NOT_RETRIED = (FileNotFoundError, NotADirectoryError, IsADirectoryError, PermissionError)
+    RETRIED_AFTER_TIMEOUT = ("stat", "listdir", "checksum")
+
+    def __init__(self, backend=None, max_concurrency=16, timeout_seconds=60, retries=3, backoff_seconds=0.5):
+        self.backend = backend if backend is not None else LocalBackend()
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.retried = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._running = set()
+
+    @classmethod
+    def from_settings(cls, settings, backend=None):
+        settings = network_io_settings(settings)
+        return cls(backend, settings["max_concurrency"], settings["timeout_seconds"],
+                   settings["retries"], settings["backoff_seconds"])
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def _release_when_done(self, job, loop, semaphore):
+        """
+        Give the concurrency slot of an executor job back once its thread has
+        finished, even if nobody awaits it any more.
+        """
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                pass  # the event loop of the slot is already closed
+        job.add_done_callback(release)
+
+    async def _submit(self, loop, func, *args):
+        await self._semaphore.acquire()
+        job = self._executor.submit(func, *args)
+        self._running.add(job)
+        job.add_done_callback(self._running.discard)
+        self._release_when_done(job, loop, self._semaphore)
+        future = asyncio.wrap_future(job, loop=loop)
+        future.add_done_callback(_retrieve_exception)
+        return future
+
+    async def call(self, operation, *args):
+        """
+        Run one backend operation (a method name) with the concurrency limit,
+        timeout and retries.
+        """
+        loop = asyncio.get_running_loop()
+        # A semaphore belongs to one event loop; each asyncio.run() gets its own
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+            # Threads abandoned under an earlier event loop still occupy workers
+            for job in list(self._running):
+                await self._semaphore.acquire()
+                self._release_when_done(job, loop, self._semaphore)
+        func = getattr(self.backend, operation)
+        for attempt in range(self.retries + 1):
+            hung = False
+            try:
+                future = await self._submit(loop, func, *args)
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), self.timeout_seconds)
+                except asyncio.TimeoutError:
+                    if operation in self.RETRIED_AFTER_TIMEOUT:
+                        raise
+                    logger.debug(f"{operation} {args[0]} timed out, waiting for it to finish before a retry")
+                    try:
+                        return await asyncio.wait_for(asyncio.shield(future), self.timeout_seconds)
+                    except asyncio.TimeoutError:
+                        hung = True
+                        raise asyncio.TimeoutError(f"{operation} still running after {2 * self.timeout_seconds}s")
+            except self.NOT_RETRIED:
+                raise
+            except (OSError, asyncio.TimeoutError) as e:
+                if attempt == self.retries or hung:
+                    raise
+                self.retried += 1
+                delay = self.backoff_seconds * 2 ** attempt * random.uniform(0.5, 1.0)
+                reason = "timed out" if isinstance(e, asyncio.TimeoutError) else f"{type(e).__name__}: {e}"
+                logger.debug(f"{operation} {args[0]} {reason}, retry {attempt + 1}/{self.retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def stat(self, path):
+        return await self.call("stat", path)
+
+    async def listdir(self, path):
+        return await self.call("listdir", path)
+
+    async def checksum(self, path):
+        return await self.call("checksum", path)
+
+    async def copy(self, source, dest):
+        return await self.call("copy", source, dest)
+
+    async def set_mtime(self, path, atime_ns, mtime_ns):
+        return await self.call("set_mtime", path, atime_ns, mtime_ns)
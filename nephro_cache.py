@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from nephro_logging import get_logger
+
+DEFAULT_CACHE_SETTINGS = {
+    "enabled": True,
+    "directory": ".cache/workbooks",
+    "format": "parquet",
+    "max_size_mb": 500,
+    "max_age_days": 30,
+}
+
+INDEX_FILE = "index.json"
+
+logger = get_logger("cache")
+
+
+def cache_settings(settings=None):
+    """
+    Merge user cache settings (e.g. the "workbook_cache" section of config.json)
+    with the defaults.
+    """
+    merged = dict(DEFAULT_CACHE_SETTINGS)
+    merged.update(settings or {})
+    return merged
+
+
+def file_content_hash(path, chunk_size=1024 * 1024):
+    """
+    SHA-256 of the file contents, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_index(cache_dir, index):
+    index_path = os.path.join(cache_dir, INDEX_FILE)
+    # Per-process temporary name, batch mode workers share the cache
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, index_path)
+
+
+def _remove_entry(cache_dir, index, key):
+    entry = index.pop(key)
+    try:
+        os.remove(os.path.join(cache_dir, entry["file"]))
+    except FileNotFoundError:
+        pass
+
+
+def _write_frame(df, path_without_suffix, cache_format):
+    """
+    Store df as Parquet when pyarrow is available and can represent the
+    frame, otherwise as pickle. Returns the file name that was written.
+    """
+    if cache_format == "parquet":
+        try:
+            df.to_parquet(path_without_suffix + ".parquet", index=False)
+            return os.path.basename(path_without_suffix) + ".parquet"
+        except Exception:
+            # pyarrow missing, or mixed-type object columns it cannot convert
+            pass
+    df.to_pickle(path_without_suffix + ".pkl")
+    return os.path.basename(path_without_suffix) + ".pkl"
+
+
+def _read_frame(path):
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+        # Parquet returns missing strings as None, the pipeline expects NaN
+        object_cols = df.columns[df.dtypes == object]
+        if len(object_cols):
+            df[object_cols] = df[object_cols].where(df[object_cols].notna(), np.nan)
+        return df
+    return pd.read_pickle(path)
+
+
+def evict(cache_dir, index, max_size_mb, max_age_days):
+    """
+    Drop entries older than max_age_days (by last use), then the least
+    recently used entries until the cache fits into max_size_mb.
+    """
+    now = time.time()
+    for key in [key for key, entry in index.items() if now - entry["last_used"] > max_age_days * 86400]:
+        _remove_entry(cache_dir, index, key)
+
+    total_bytes = sum(entry["bytes"] for entry in index.values())
+    for key in sorted(index, key=lambda key: index[key]["last_used"]):
+        if total_bytes <= max_size_mb * 1024 * 1024:
+            break
+        total_bytes -= index[key]["bytes"]
+        _remove_entry(cache_dir, index, key)
+
+
+def read_excel_cached(path, cache=None, reader=None, **read_kwargs):
+    """
+    pd.read_excel (or another reader(path, **read_kwargs) returning a
+    DataFrame) with a local cache of the parsed DataFrame.
+
+    Entries are keyed by the absolute path, reader and read arguments, and validated
+    by file size and mtime; if those changed, the content hash decides whether
+    the cached frame can still be used. Set "enabled": false in the cache
+    settings to always read the workbook.
+    """
+    reader = reader or pd.read_excel
+    settings = cache_settings(cache)
+    if not settings["enabled"]:
+        return reader(path, **read_kwargs)
+
+    stat = os.stat(path)
+    cache_dir = settings["directory"]
+    os.makedirs(cache_dir, exist_ok=True)
+    index = _load_index(cache_dir)
+
+    key_fields = {"path": os.path.abspath(path), "read_kwargs": read_kwargs}
+    if reader is not pd.read_excel:
+        key_fields["reader"] = f"{reader.__module__}.{reader.__name__}"
+    key_source = json.dumps(key_fields, sort_keys=True, default=str)
+    key = hashlib.sha256(key_source.encode('utf-8')).hexdigest()[:32]
+    entry = index.get(key)
+    cached_file = os.path.join(cache_dir, entry["file"]) if entry else None
+
+    if entry and os.path.exists(cached_file):
+        content_hash = entry["content_hash"]
+        if (entry["size"], entry["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            content_hash = file_content_hash(path)
+        if content_hash == entry["content_hash"]:
+            df = _read_frame(cached_file)
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, last_used=time.time())
+            _save_index(cache_dir, index)
+            logger.info(f"✓ Using cached copy of {path}")
+            return df
+    if entry:
+        _remove_entry(cache_dir, index, key)
+
+    df = reader(path, **read_kwargs)
+    file_name = _write_frame(df, os.path.join(cache_dir, key), settings["format"])
+    index[key] = {
+        "path": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "content_hash": file_content_hash(path),
+        "file": file_name,
+        "bytes": os.path.getsize(os.path.join(cache_dir, file_name)),
+        "last_used": time.time(),
+    }
+    evict(cache_dir, index, settings["max_size_mb"], settings["max_age_days"])
+    _save_index(cache_dir, index)
+    return df
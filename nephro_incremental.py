@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from nephro_logging import get_logger
+
+# Bump when the per-patient processing changes, so cached results are rebuilt
+STATE_VERSION = 2
+
+# Config sections that influence the per-patient long table
+FINGERPRINT_CONFIG_KEYS = [
+    "column_mapping",
+    "alternative_column_names",
+    "genetic_columns",
+    "klassifizierung_mapping",
+    "special_variant_rules",
+    "data_processing",
+]
+
+BLOCK_HASHES_FILE = "block_hashes.json"
+LONG_TABLE_FILE = "long_table.pkl"
+# Column of the cached long table: number of the source row within its block
+BLOCK_ROW_COLUMN = "_block_row"
+
+logger = get_logger("incremental")
+
+
+def config_fingerprint(config, columns):
+    """
+    Hash the config sections and input columns that the cached long table
+    depends on. A different fingerprint invalidates the whole state.
+    """
+    payload = {
+        "state_version": STATE_VERSION,
+        "config": {key: config.get(key) for key in FINGERPRINT_CONFIG_KEYS},
+        "columns": list(columns),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def hash_blocks(df, group_col):
+    """
+    Compute a content hash per patient block (all rows sharing group_col).
+    The hash covers every column and the order of the rows within the block.
+    Rows without a group value are not hashed.
+    """
+    keys = df[group_col]
+    has_key = keys.notna().to_numpy()
+    if not has_key.any():
+        return {}
+
+    row_hashes = pd.util.hash_pandas_object(df[has_key], index=False).to_numpy()
+    codes, uniques = pd.factorize(keys[has_key])
+
+    # Sort rows by block (stable, so rows keep their order inside a block)
+    order = np.argsort(codes, kind='stable')
+    boundaries = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+
+    block_hashes = {}
+    for key, block in zip(uniques, np.split(row_hashes[order], boundaries)):
+        block_hashes[str(key)] = hashlib.blake2b(block.tobytes(), digest_size=16).hexdigest()
+    return block_hashes
+
+
+def load_state(state_dir):
+    """
+    Load the previous run's block hashes and long table.
+    Returns None if there is no usable state.
+    """
+    hashes_path = os.path.join(state_dir, BLOCK_HASHES_FILE)
+    long_table_path = os.path.join(state_dir, LONG_TABLE_FILE)
+    if not (os.path.exists(hashes_path) and os.path.exists(long_table_path)):
+        return None
+
+    try:
+        with open(hashes_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        state["long_table"] = pd.read_pickle(long_table_path)
+    except Exception as e:
+        logger.warning(f"⚠ Could not read incremental state from {state_dir}: {e}")
+        return None
+    return state
+
+
+def save_state(state_dir, fingerprint, block_hashes, long_table):
+    """
+    Persist the block hashes and long table of this run. Files are written
+    to a temporary name first, so an interrupted run keeps the old state.
+    """
+    os.makedirs(state_dir, exist_ok=True)
+    hashes_path = os.path.join(state_dir, BLOCK_HASHES_FILE)
+    long_table_path = os.path.join(state_dir, LONG_TABLE_FILE)
+
+    long_table.to_pickle(long_table_path + ".tmp")
+    with open(hashes_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({"fingerprint": fingerprint, "block_hashes": block_hashes}, f, ensure_ascii=False)
+
+    os.replace(long_table_path + ".tmp", long_table_path)
+    os.replace(hashes_path + ".tmp", hashes_path)
+
+
+def plan_incremental_run(state, fingerprint, block_hashes):
+    """
+    Compare this run's block hashes with the stored state.
+
+    Returns (blocks_to_process, blocks_removed, full_rebuild). Without state or
+    with a different fingerprint every block is processed.
+    """
+    if state is None or state.get("fingerprint") != fingerprint:
+        return set(block_hashes), set(), True
+
+    previous = state["block_hashes"]
+    blocks_to_process = {key for key, digest in block_hashes.items() if previous.get(key) != digest}
+    blocks_removed = set(previous) - set(block_hashes)
+    return blocks_to_process, blocks_removed, False
+
+
+def number_block_rows(df, group_col):
+    """
+    Number of every row within its block (0, 1, ... in sheet order). Rows
+    without a group value are numbered as one block of their own.
+    """
+    return df.groupby(group_col, sort=False, dropna=False).cumcount().to_numpy()
+
+
+def sheet_rows(df, group_col, block_rows):
+    """
+    Index of (block key, row number in the block) in sheet order, so
+    get_indexer finds the position of such a row in the sheet.
+    """
+    return pd.MultiIndex.from_arrays([df[group_col].astype(str), block_rows])
+
+
+def select_blocks(df, group_col, blocks):
+    """
+    Rows belonging to the given blocks. Rows without a group value are always
+    selected, since they are not tracked in the state.
+    """
+    keys = df[group_col]
+    return df[keys.isna() | keys.astype(str).isin(blocks)]
+
+
+def merge_cached_long_table(state, group_col, blocks_to_process, blocks_removed, long_table,
+                            sheet_index=None, detail_columns=None):
+    """
+    Combine the freshly computed long table rows with the cached rows of all
+    unchanged blocks.
+
+    With sheet_index (see sheet_rows) the rows are put in the order of a
+    full run. Both tables then carry BLOCK_ROW_COLUMN, the number of the
+    source row of each long table row within its block. An unchanged
+    block has the same rows in the same order as when it was cached, so
+    that number locates the source row in the current sheet. Rows with no
+    value in any of detail_columns (patients without genetic information)
+    come last, as a full run appends them.
+    """
+    if state is None:
+        return long_table.reset_index(drop=True)
+
+    cached = state["long_table"]
+    cached_keys = cached[group_col]
+    stale = blocks_to_process | blocks_removed
+    unchanged = cached[cached_keys.notna() & ~cached_keys.astype(str).isin(stale)]
+    # pd.concat warns about empty frames; with one non-empty part no concat is needed
+    frames = [frame for frame in (unchanged, long_table) if len(frame)]
+    if len(frames) > 1:
+        merged = pd.concat(frames, ignore_index=True)
+    else:
+        merged = (frames[0] if frames else long_table).reset_index(drop=True)
+    if sheet_index is None or merged.empty:
+        return merged
+
+    position = sheet_index.get_indexer(sheet_rows(merged, group_col, merged[BLOCK_ROW_COLUMN].to_numpy()))
+    columns = [col for col in (detail_columns or []) if col in merged.columns]
+    last = merged[columns].isna().all(axis=1).to_numpy() if columns else np.zeros(len(merged), dtype=bool)
+    order = np.lexsort((position, last))
+    if (order == np.arange(len(merged))).all():
+        return merged
+    return merged.take(order).reset_index(drop=True)
@@ -0,0 +1,69 @@
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+LOGGER_NAME = "nephro"
+LOG_LEVELS = {
+    "quiet": logging.WARNING,
+    "info": logging.INFO,
+    "debug": logging.DEBUG,
+}
+DEFAULT_LOG_LEVEL = "info"
+
+
+def get_logger(name=None):
+    """
+    Logger of one module below the common "nephro" logger, so
+    configure_logging() applies to all of them.
+    """
+    return logging.getLogger(LOGGER_NAME if name is None else f"{LOGGER_NAME}.{name}")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, logger, message and the
+    structured values passed as extra={"fields": {...}}.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            # Leading newlines only separate sections on the console
+            "message": record.getMessage().strip(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level=DEFAULT_LOG_LEVEL, json_path=None):
+    """
+    Send the messages of all nephro loggers at the given level (quiet,
+    info or debug) to stdout as plain text, and also as JSON lines to
+    json_path if given (appended). Quiet keeps warnings and errors only;
+    debug adds the diagnostics that need extra passes over the data.
+    Replaces the handlers of a previous call.
+    """
+    if level not in LOG_LEVELS:
+        raise ValueError(f"Unknown log level '{level}', expected one of {list(LOG_LEVELS)}")
+    logger = get_logger()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.setLevel(LOG_LEVELS[level])
+    logger.propagate = False
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(console)
+    if json_path:
+        os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
+        json_lines = logging.FileHandler(json_path, mode='a', encoding='utf-8')
+        json_lines.setFormatter(JsonLinesFormatter())
+        logger.addHandler(json_lines)
+    return logger
@@ -0,0 +1,317 @@
+import os
+from urllib.parse import quote
+
+import pandas as pd
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+OUTPUT_FORMATS = ["xlsx", "csv", "parquet", "arrow"]
+# Formats written through pyarrow; these support compression and partitioning
+ARROW_FORMATS = ["parquet", "arrow"]
+FORMAT_LABELS = {"xlsx": "Excel", "csv": "CSV", "parquet": "Parquet", "arrow": "Arrow IPC"}
+COMPRESSION_CODECS = {
+    "parquet": ["snappy", "gzip", "brotli", "zstd", "lz4", "none"],
+    "arrow": ["zstd", "lz4", "none"],
+}
+# --partition-by choices: partition key -> column of the long table
+PARTITION_COLUMNS = {"klassifizierung": "Klassifizierung", "year": "Befunddatum_Jahr"}
+# Directory name used by Hive-style readers (pyarrow, Spark, DuckDB) for missing values
+HIVE_NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Header style of DataFrame.to_excel, repeated by the streaming writers
+HEADER_STYLE = {"bold": True, "border": "thin", "horizontal": "center", "vertical": "top"}
+# Column widths of streamed Excel output, in characters
+MIN_COLUMN_WIDTH = 8
+MAX_COLUMN_WIDTH = 60
+
+DEFAULT_OUTPUT_SETTINGS = {
+    "compression": None,
+    "partition_by": None,
+    # Tables with more rows are written to xlsx by a constant-memory streaming writer
+    "xlsx_streaming_rows": 50_000,
+}
+
+
+def output_settings(config):
+    """
+    Merge the "output" section of config.json with the defaults.
+    """
+    merged = dict(DEFAULT_OUTPUT_SETTINGS)
+    merged.update(config.get("output", {}))
+    return merged
+
+
+def check_output_options(output_format, compression=None, partition_by=None):
+    """
+    Validate an output format with its options before any work is done.
+    Raises ValueError for unsupported combinations and ImportError if the
+    packages needed to write the format (pyarrow, openpyxl or xlsxwriter)
+    are not installed.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}' (expected one of {OUTPUT_FORMATS})")
+    if output_format not in ARROW_FORMATS:
+        if compression or partition_by:
+            raise ValueError(f"Compression and partitioning are only available for {ARROW_FORMATS} output")
+        if output_format == 'xlsx' and xlsxwriter is None and openpyxl is None:
+            raise ImportError("openpyxl or xlsxwriter package required for Excel output")
+        return
+    if compression and compression not in COMPRESSION_CODECS[output_format]:
+        raise ValueError(f"Compression '{compression}' is not supported for {output_format} output "
+                         f"(expected one of {COMPRESSION_CODECS[output_format]})")
+    if partition_by and partition_by not in PARTITION_COLUMNS:
+        raise ValueError(f"Unknown partition key '{partition_by}' (expected one of {list(PARTITION_COLUMNS)})")
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError(f"pyarrow package required for {output_format} output") from None
+
+
+def _write_arrow_file(df, path, output_format, compression):
+    if output_format == "parquet":
+        df.to_parquet(path, index=False, compression=None if compression == "none" else compression or "snappy")
+    else:
+        df.reset_index(drop=True).to_feather(path, compression="uncompressed" if compression == "none" else compression)
+
+
+def partition_values(long_table, partition_by):
+    """
+    Partition column values of the long table. The Befunddatum year is
+    derived from the YYYY-MM-DD date string.
+    """
+    column = PARTITION_COLUMNS[partition_by]
+    if column == "Befunddatum_Jahr":
+        if 'Befunddatum' not in long_table.columns:
+            return pd.Series(None, index=long_table.index, dtype=object, name=column)
+        return long_table['Befunddatum'].astype(object).str[:4].rename(column)
+    return long_table[column].astype(object)
+
+
+def write_partitioned(long_table, output_dir, output_format, compression=None, partition_by="klassifizierung"):
+    """
+    Write one file per partition value in Hive layout:
+    output_dir/<column>=<value>/part-0.<format>. The partition column is
+    stored in the directory name only, as Hive-style readers expect, so
+    pd.read_parquet(output_dir) or pyarrow.dataset restore it as a column
+    and can skip the partitions a query does not need. Row order within a
+    partition is kept. Returns the list of written files.
+    """
+    values = partition_values(long_table, partition_by)
+    data = long_table.drop(columns=[values.name], errors='ignore')
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for value, positions in data.groupby(values.fillna(HIVE_NULL_PARTITION).to_numpy(), sort=True).indices.items():
+        partition_dir = os.path.join(output_dir, f"{values.name}={quote(str(value), safe='')}")
+        os.makedirs(partition_dir, exist_ok=True)
+        path = os.path.join(partition_dir, f"part-0.{output_format}")
+        _write_arrow_file(data.iloc[positions], path, output_format, compression)
+        written.append(path)
+    return written
+
+
+def excel_writer(n_rows, streaming_rows=DEFAULT_OUTPUT_SETTINGS["xlsx_streaming_rows"]):
+    """
+    Excel writer used for a table of n_rows rows: "pandas" (DataFrame.to_excel,
+    which holds the whole workbook in memory) up to streaming_rows rows,
+    above that "xlsxwriter" (constant_memory mode) or, if xlsxwriter is not
+    installed, "openpyxl" (write-only mode).
+    """
+    if streaming_rows is not None and n_rows > streaming_rows:
+        return "xlsxwriter" if xlsxwriter is not None else "openpyxl"
+    return "pandas"
+
+
+def column_widths(df, chunk_size=10_000):
+    """
+    Column width per column that fits the header and the longest value,
+    limited to MIN_COLUMN_WIDTH..MAX_COLUMN_WIDTH characters. Values are
+    measured in chunks of chunk_size rows (categorical columns by their
+    categories), so no full-length string copy of a column is made.
+    """
+    widths = []
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            chunks = [series.cat.categories.to_series()]
+        else:
+            chunks = (series.iloc[start:start + chunk_size] for start in range(0, len(series), chunk_size))
+        longest = len(str(col))
+        for chunk in chunks:
+            lengths = chunk.dropna().astype(str).str.len()
+            if len(lengths):
+                longest = max(longest, int(lengths.max()))
+        widths.append(min(max(longest + 2, MIN_COLUMN_WIDTH), MAX_COLUMN_WIDTH))
+    return widths
+
+
+def iter_row_blocks(df, chunk_size=10_000):
+    """
+    Rows of df as object arrays in blocks of chunk_size rows, with missing
+    values as None (written as empty cells).
+    """
+    for start in range(0, len(df), chunk_size):
+        block = df.iloc[start:start + chunk_size].to_numpy(dtype=object)
+        block[pd.isna(block)] = None
+        yield block
+
+
+class LongTableWriter:
+    """
+    Append-only writer for the long table: rows are written chunk by chunk
+    with append() and the file is finished with close(), so the whole table
+    never has to be in memory.
+
+    csv output is appended with to_csv. xlsx output is streamed with
+    xlsxwriter (constant_memory mode) or openpyxl (write-only mode), with
+    the header style of DataFrame.to_excel and column widths fitted to the
+    contents (with openpyxl, to the contents of the first chunk). parquet
+    and arrow output is written as one row group / record batch per chunk
+    with every column stored as string.
+    """
+
+    def __init__(self, path, output_format, columns, compression=None, excel_engine=None):
+        check_output_options(output_format, compression)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.output_format = output_format
+        self.columns = list(columns)
+        self.rows = 0
+        self._writer = None
+        if output_format == 'csv':
+            pd.DataFrame(columns=self.columns).to_csv(path, index=False)
+        elif output_format == 'xlsx':
+            self.excel_engine = excel_engine or ("xlsxwriter" if xlsxwriter is not None else "openpyxl")
+            self._widths = [min(max(len(str(col)) + 2, MIN_COLUMN_WIDTH), MAX_COLUMN_WIDTH) for col in self.columns]
+            if self.excel_engine == "xlsxwriter":
+                self._open_xlsxwriter()
+            else:
+                self._workbook = openpyxl.Workbook(write_only=True)
+                self._worksheet = self._workbook.create_sheet("Sheet1")
+        else:
+            import pyarrow as pa
+            self._schema = pa.schema([(str(col), pa.string()) for col in self.columns])
+            codec = None if compression == "none" else compression
+            if output_format == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(path, self._schema, compression=codec or "snappy")
+            else:
+                options = pa.ipc.IpcWriteOptions(compression=None if compression == "none" else compression or "lz4")
+                self._writer = pa.ipc.new_file(path, self._schema, options=options)
+
+    def _open_xlsxwriter(self):
+        # Rows are flushed to disk as soon as the next row is started; strings
+        # are written as text, never converted to formulas or links
+        self._workbook = xlsxwriter.Workbook(self.path, {"constant_memory": True, "strings_to_formulas": False,
+                                                         "strings_to_urls": False})
+        self._worksheet = self._workbook.add_worksheet("Sheet1")
+        header_format = self._workbook.add_format({"bold": HEADER_STYLE["bold"], "border": 1,
+                                                   "align": HEADER_STYLE["horizontal"],
+                                                   "valign": HEADER_STYLE["vertical"]})
+        self._worksheet.write_row(0, 0, [str(col) for col in self.columns], header_format)
+
+    def _openpyxl_header(self):
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Border, Font, Side
+        from openpyxl.utils import get_column_letter
+
+        # Write-only sheets write the column widths with the first row
+        for col, width in enumerate(self._widths, start=1):
+            self._worksheet.column_dimensions[get_column_letter(col)].width = width
+        side = Side(style=HEADER_STYLE["border"])
+        header = []
+        for col in self.columns:
+            cell = WriteOnlyCell(self._worksheet, value=str(col))
+            cell.font = Font(bold=HEADER_STYLE["bold"])
+            cell.border = Border(top=side, right=side, bottom=side, left=side)
+            cell.alignment = Alignment(horizontal=HEADER_STYLE["horizontal"], vertical=HEADER_STYLE["vertical"])
+            header.append(cell)
+        self._worksheet.append(header)
+
+    def append(self, df):
+        """
+        Append the rows of df (with the writer's columns) to the file.
+        """
+        df = df[self.columns]
+        if self.output_format == 'csv':
+            df.to_csv(self.path, mode='a', header=False, index=False, na_rep="")
+        elif self.output_format == 'xlsx':
+            self._widths = [max(width, fitted) for width, fitted in zip(self._widths, column_widths(df))]
+            if self.excel_engine == "openpyxl" and self.rows == 0:
+                self._openpyxl_header()
+            row = self.rows + 1
+            for block in iter_row_blocks(df):
+                for values in block:
+                    if self.excel_engine == "xlsxwriter":
+                        self._worksheet.write_row(row, 0, values)
+                    else:
+                        self._worksheet.append(list(values))
+                    row += 1
+        else:
+            import pyarrow as pa
+            table = pa.Table.from_pandas(df.astype(object), schema=self._schema, preserve_index=False)
+            self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        """
+        Finish the file and return its path.
+        """
+        if self.output_format == 'xlsx':
+            if self.excel_engine == "xlsxwriter":
+                for col, width in enumerate(self._widths):
+                    self._worksheet.set_column(col, col, width)
+                self._workbook.close()
+            else:
+                if self.rows == 0:
+                    self._openpyxl_header()
+                self._workbook.save(self.path)
+        elif self._writer is not None:
+            self._writer.close()
+        return self.path
+
+
+def write_xlsx(df, path, streaming_rows=DEFAULT_OUTPUT_SETTINGS["xlsx_streaming_rows"]):
+    """
+    Write df to an xlsx file without the index and with empty cells for
+    missing values. Large tables are streamed row by row in constant memory
+    (see excel_writer); the streamed file has the same bold, bordered header
+    and column widths fitted to the contents. Returns the writer used.
+    """
+    writer = excel_writer(len(df), streaming_rows)
+    if writer != "pandas":
+        streamed = LongTableWriter(path, 'xlsx', df.columns, excel_engine=writer)
+        streamed.append(df)
+        streamed.close()
+    else:
+        df.to_excel(path, index=False, na_rep="", engine="openpyxl" if openpyxl is not None else "xlsxwriter")
+    return writer
+
+
+def save_long_table(long_table, output_path, output_format, compression=None, partition_by=None,
+                    xlsx_streaming_rows=DEFAULT_OUTPUT_SETTINGS["xlsx_streaming_rows"]):
+    """
+    Write the long table as xlsx, csv, parquet or arrow (Feather v2 / Arrow
+    IPC). With partition_by ("klassifizierung" or "year") parquet and arrow
+    output is a directory with one file per partition instead of a single
+    file. xlsx output with more than xlsx_streaming_rows rows is streamed in
+    constant memory.
+    """
+    check_output_options(output_format, compression, partition_by)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    if partition_by:
+        write_partitioned(long_table, output_path, output_format, compression, partition_by)
+    elif output_format in ARROW_FORMATS:
+        _write_arrow_file(long_table, output_path, output_format, compression)
+    elif output_format == 'xlsx':
+        write_xlsx(long_table, output_path, xlsx_streaming_rows)
+    else:
+        long_table.to_csv(output_path, index=False, na_rep="")
+    return output_path
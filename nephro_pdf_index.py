@@ -0,0 +1,260 @@
+import asyncio
+import json
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from nephro_logging import get_logger
+
+YEAR_FOLDER_PATTERN = re.compile(r"20[0-9][0-9]")
+REPORT_FILE_PATTERN = re.compile(r"[Bb]efund")
+EXCLUDED_PATH_TEXT = "Falscher"
+EXCLUDED_FILE_TEXT = "Laufzettel"
+# "<year>/<subfolder>/<file>" below the report root. The Blutbuch-Nummer is the
+# subfolder up to the first "_", "|" or " " that is followed by more text
+# (the original str.replace(r"[_| ].+", "")); the report type is the first
+# word of the file part containing "Befund"/"befund".
+REPORT_PATH_PATTERN = re.compile(
+    r"(?P<year>20[0-9][0-9])/"
+    r"(?P<subfolder>(?P<blutbuch>[^/_| ]*(?:[_| ](?=/))?)(?:[_| ][^/]+)?)/"
+    r"(?P<file>.*?(?<![^\W\d_])(?P<report_type>[^\W\d_]*?[Bb]efund[^\W\d_]*).*)"
+)
+MISSING_REPORT_METADATA = (None, None, None, None, None)
+
+INDEX_VERSION = 2
+
+logger = get_logger("pdf_index")
+
+
+class IncompleteScanError(OSError):
+    """
+    Raised after a walk of the share in which some directories could not be
+    read; directories lists their paths. The reports found are incomplete,
+    so they must not replace the reports of an earlier scan.
+    """
+
+    def __init__(self, directories):
+        super().__init__(f"{len(directories)} directories could not be read: {', '.join(directories[:5])}"
+                         + (", ..." if len(directories) > 5 else ""))
+        self.directories = directories
+
+
+def load_file_index(index_path):
+    """
+    Load the persisted directory listing index, or an empty one.
+    """
+    empty_index = {"version": INDEX_VERSION, "directories": {}, "reports": {}}
+    if not index_path or not os.path.exists(index_path):
+        return empty_index
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except ValueError:
+        logger.warning(f"⚠ Could not read file index {index_path}, rebuilding it")
+        return empty_index
+    if index.get("version") != INDEX_VERSION:
+        return empty_index
+    return index
+
+
+def save_file_index(index_path, index):
+    """
+    Write the index to a temporary file first, so an interrupted run keeps
+    the previous index.
+    """
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    with open(index_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(index_path + ".tmp", index_path)
+
+
+def _list_directory(path, cached):
+    """
+    List one directory: PDF files with (name, size, mtime_ns) and subfolder
+    names. If the directory mtime matches the cached listing, the cached
+    listing is returned without reading the directory.
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+    if cached is not None and cached["mtime_ns"] == mtime_ns:
+        return cached
+
+    files = []
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.name)
+            elif entry.name.lower().endswith(".pdf") and entry.is_file():
+                stat = entry.stat()
+                files.append([entry.name, stat.st_size, stat.st_mtime_ns])
+    return {"mtime_ns": mtime_ns, "files": files, "subdirs": subdirs}
+
+
+def is_report_file(relative_path):
+    """
+    Apply the report filters to a path relative to its year folder
+    ("<subfolder>/<file>"): no "Falscher" anywhere, the file part must
+    contain "Befund"/"befund" and must not be a "Laufzettel".
+    """
+    if EXCLUDED_PATH_TEXT in relative_path:
+        return False
+    parts = relative_path.split("/", 1)
+    if len(parts) < 2:
+        return False
+    return REPORT_FILE_PATTERN.search(parts[1]) is not None and EXCLUDED_FILE_TEXT not in parts[1]
+
+
+def iter_report_pdfs(root, index, max_workers=16):
+    """
+    Walk the year folders below root concurrently and yield
+    (path, size, mtime_ns) for every report PDF as soon as it is found.
+
+    Directories are listed with os.scandir in a thread pool. Subfolders with
+    "Falscher" in their name are not entered, and directories whose mtime
+    matches the index are not listed again. index["directories"] is replaced
+    with the listings of this walk once the generator is exhausted; if a
+    directory could not be read, IncompleteScanError is raised after that.
+    Paths use "/" as separator.
+    """
+    cached_directories = index.get("directories", {})
+    directories = {}
+    unreadable = []
+
+    with os.scandir(root) as entries:
+        year_folders = sorted(entry.name for entry in entries
+                              if entry.is_dir() and YEAR_FOLDER_PATTERN.fullmatch(entry.name))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {}
+
+        def submit(path, relative_dir):
+            future = pool.submit(_list_directory, path, cached_directories.get(path))
+            pending[future] = (path, relative_dir)
+
+        for year_folder in year_folders:
+            logger.info(f"Found year folder: {root}/{year_folder}")
+            submit(f"{root}/{year_folder}", "")
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, relative_dir = pending.pop(future)
+                try:
+                    listing = future.result()
+                except OSError as e:
+                    logger.warning(f"⚠ Could not read directory {path}: {e}")
+                    unreadable.append(path)
+                    continue
+                directories[path] = listing
+
+                for name in listing["subdirs"]:
+                    if EXCLUDED_PATH_TEXT not in name:
+                        submit(f"{path}/{name}", f"{relative_dir}{name}/")
+
+                for name, size, mtime_ns in listing["files"]:
+                    if is_report_file(relative_dir + name):
+                        yield f"{path}/{name}", size, mtime_ns
+
+    index["version"] = INDEX_VERSION
+    index["directories"] = directories
+    if unreadable:
+        raise IncompleteScanError(sorted(unreadable))
+
+
+async def scan_report_pdfs_async(root, index, file_io):
+    """
+    Same walk as iter_report_pdfs, with the directory operations of an
+    nephro_async_io.AsyncFileIO, so many round trips to the share are in
+    flight at once. Returns the list of (path, size, mtime_ns) of every
+    report PDF and replaces index["directories"] like iter_report_pdfs,
+    raising IncompleteScanError like it if a directory could not be read.
+
+    The mtime of a subfolder comes with the listing of its parent, so an
+    unchanged subfolder costs no round trip of its own unless the parent
+    listing itself came from the index.
+    """
+    cached_directories = index.get("directories", {})
+    directories = {}
+    reports = []
+    unreadable = []
+
+    async def walk(path, relative_dir, mtime_ns=None):
+        try:
+            if mtime_ns is None:
+                mtime_ns = (await file_io.stat(path)).st_mtime_ns
+            listing = cached_directories.get(path)
+            if listing is None or listing["mtime_ns"] != mtime_ns:
+                entries = await file_io.listdir(path)
+                listing = {
+                    "mtime_ns": mtime_ns,
+                    "files": [[name, size, file_mtime_ns] for name, is_dir, size, file_mtime_ns in entries
+                              if not is_dir and name.lower().endswith(".pdf")],
+                    "subdirs": [name for name, is_dir, _, _ in entries if is_dir],
+                    "subdir_mtimes": {name: subdir_mtime_ns for name, is_dir, _, subdir_mtime_ns in entries
+                                      if is_dir},
+                }
+        except OSError as e:
+            logger.warning(f"⚠ Could not read directory {path}: {e}")
+            unreadable.append(path)
+            return
+        subdir_mtimes = listing.pop("subdir_mtimes", {})
+        directories[path] = listing
+
+        for name, size, file_mtime_ns in listing["files"]:
+            if is_report_file(relative_dir + name):
+                reports.append((f"{path}/{name}", size, file_mtime_ns))
+        await asyncio.gather(*(walk(f"{path}/{name}", f"{relative_dir}{name}/", subdir_mtimes.get(name))
+                               for name in listing["subdirs"] if EXCLUDED_PATH_TEXT not in name))
+
+    year_folders = sorted((name, mtime_ns) for name, is_dir, _, mtime_ns in await file_io.listdir(root)
+                          if is_dir and YEAR_FOLDER_PATTERN.fullmatch(name))
+    for year_folder, _ in year_folders:
+        logger.info(f"Found year folder: {root}/{year_folder}")
+    await asyncio.gather(*(walk(f"{root}/{year_folder}", "", mtime_ns) for year_folder, mtime_ns in year_folders))
+
+    index["version"] = INDEX_VERSION
+    index["directories"] = directories
+    if unreadable:
+        raise IncompleteScanError(sorted(unreadable))
+    return reports
+
+
+def report_metadata_table(reports, root, index=None):
+    """
+    Table of the (path, size, mtime_ns) reports found below root, with the
+    metadata parsed from each path: year (Int16), subfolder, file,
+    Blutbuch_Nummer and report_type (capitalized, category). Paths without
+    the "<root>/<year>/<subfolder>/<file>" layout get missing metadata.
+
+    Every path is matched once against REPORT_PATH_PATTERN anchored at
+    root. A path always parses to the same metadata, so with a file index
+    the parsed values are taken from index["reports"] and only new paths
+    are parsed; index["reports"] is replaced with the paths of this table.
+    """
+    table = pd.DataFrame.from_records(list(reports), columns=['value', 'size', 'mtime_ns'])
+    table = table.astype({'value': object, 'size': 'int64', 'mtime_ns': 'int64'})
+    paths = table['value'].tolist()
+
+    cached_reports = index.get("reports", {}) if index is not None else {}
+    metadata = [cached_reports.get(path) for path in paths]
+    new_paths = [path for path, values in zip(paths, metadata) if values is None]
+    if new_paths:
+        match = re.compile(re.escape(root) + "/" + REPORT_PATH_PATTERN.pattern).fullmatch
+        parsed = iter([found.groups() if found else MISSING_REPORT_METADATA for found in map(match, new_paths)])
+        metadata = [next(parsed) if values is None else values for values in metadata]
+    if index is not None:
+        index["reports"] = dict(zip(paths, metadata))
+
+    parsed = pd.DataFrame.from_records(metadata, columns=['year', 'subfolder', 'Blutbuch_Nummer', 'file', 'report_type'])
+    # Few distinct years and report types: convert the categories, not every row
+    year = parsed['year'].astype('category')
+    table['year'] = year.cat.rename_categories(year.cat.categories.astype(int)).astype('Int16')
+    table['subfolder'] = parsed['subfolder'].astype(object)
+    table['file'] = parsed['file'].astype(object)
+    table['Blutbuch_Nummer'] = parsed['Blutbuch_Nummer'].astype(object)
+    report_type = parsed['report_type'].astype('category')
+    capitalized = {value: value.capitalize() for value in report_type.cat.categories}
+    table['report_type'] = report_type.map(capitalized).astype('category')
+    return table
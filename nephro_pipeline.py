@@ -0,0 +1,975 @@
+import copy
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from nephro_cache import read_excel_cached
+from nephro_incremental import (
+    BLOCK_ROW_COLUMN,
+    config_fingerprint,
+    hash_blocks,
+    load_state,
+    merge_cached_long_table,
+    number_block_rows,
+    plan_incremental_run,
+    save_state,
+    select_blocks,
+    sheet_rows,
+)
+from nephro_output import (
+    FORMAT_LABELS,
+    LongTableWriter,
+    check_output_options,
+    excel_writer,
+    output_settings,
+    save_long_table,
+)
+from nephro_logging import get_logger
+from nephro_profiling import StageProfiler
+from nephro_samples import SampleRegistry, match_ids
+from nephro_streaming import SeenRows, ffill_from, last_value, split_trailing_block
+from nephro_transforms import (
+    compile_klassifizierung_rules,
+    expand_semicolon_rows,
+    fill_missing_per_group,
+    normalize_text,
+    recode_klassifizierung,
+    to_categorical,
+)
+from nephro_workbook import column_candidates, iter_column_chunks, read_excel_columns, read_header
+
+DEFAULT_GROUP_FILL_COLUMNS = ["AF_Nummer_MEDAT", "Bemerkung", "variant_explains_phenotype", "Befunddatum"]
+DEFAULT_CATEGORICAL_COLUMNS = ["Panel_oder_segregation", "Gen", "Klassifizierung", "variant_explains_phenotype"]
+# Identifier columns kept in the long table, in output order, when present
+IDENTIFIER_COLUMNS = ['Blutbuch_nummer', 'AF_Nummer_MEDAT', 'Panel_oder_segregation', 'Bemerkung',
+                      'variant_explains_phenotype', 'Befunddatum']
+IDENTIFIER_LABELS = {'AF_Nummer_MEDAT': 'AF-Nummer (MEDAT)', 'Panel_oder_segregation': 'Panel/Segregation'}
+DEFAULT_NULL_VALUES = ['nan']
+DEFAULT_GENETIC_NULL_VALUES = ['', 'nan', 'NaN', 'null', 'NULL']
+PANEL_FILTER_VALUE = "Exom/Nephro"
+# Rows read from the workbook per chunk in streaming mode
+DEFAULT_STREAM_CHUNK_ROWS = 10_000
+
+logger = get_logger("pipeline")
+
+
+class PipelineError(Exception):
+    """
+    Fatal pipeline error (missing configuration, input file or required columns).
+    """
+
+
+def load_config(config_path="config.json"):
+    """
+    Load the JSON configuration.
+    """
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise PipelineError(f"Configuration file not found at {config_path}")
+    except Exception as e:
+        raise PipelineError(f"Error loading configuration: {e}")
+
+
+def load_uebersicht(config, path=None, cache=None):
+    """
+    Read the Übersicht workbook (input_excel_file from config unless path is
+    given) through the local workbook cache. Only the columns named in
+    column_mapping and alternative_column_names are parsed.
+    """
+    path = path or config["file_paths"]["input_excel_file"]
+    if cache is None:
+        cache = config.get("workbook_cache", {})
+    try:
+        return read_excel_cached(path, cache=cache, reader=read_excel_columns,
+                                 columns=column_candidates(config), dtype=config["data_types"]["excel_dtype"])
+    except FileNotFoundError:
+        raise PipelineError(f"File not found at {path}")
+    except Exception as e:
+        raise PipelineError(f"Error loading Excel file: {e}")
+
+
+def resolve_columns(columns, config):
+    """
+    Match column_mapping against the sheet columns, falling back to the
+    alternative_column_names. Returns ({source column: new name}, missing
+    target columns, [(alternative, target)] used).
+    """
+    alternative_names = config["alternative_column_names"]
+    available_columns = {}
+    missing_columns = []
+    alternatives_used = []
+
+    for target_col, new_name in config["column_mapping"].items():
+        if target_col in columns:
+            available_columns[target_col] = new_name
+            continue
+        for alt_name in alternative_names.get(target_col, []):
+            if alt_name in columns:
+                available_columns[alt_name] = new_name
+                alternatives_used.append((alt_name, target_col))
+                break
+        else:
+            missing_columns.append(target_col)
+
+    return available_columns, missing_columns, alternatives_used
+
+
+def select_columns(df, available_columns):
+    """
+    Keep the resolved columns and rename them to their standardized names.
+    The columns are copied once; renaming in place avoids a second copy.
+    """
+    if not available_columns:
+        raise PipelineError("No required columns found!")
+    selected = df.take(df.columns.get_indexer(list(available_columns.keys())), axis=1)
+    selected.columns = list(available_columns.values())
+    return selected
+
+
+def clean_whitespace(df, null_values=DEFAULT_NULL_VALUES, column_null_values=None):
+    """
+    Strip whitespace from all cells and turn null sentinels into NaN, one
+    vectorized pass per column. null_values apply to every column,
+    column_null_values ({column: sentinels}) add sentinels for single columns.
+    """
+    column_null_values = column_null_values or {}
+    for col in df.columns:
+        sentinels = set(null_values) | set(column_null_values.get(col, ()))
+        df[col] = normalize_text(df[col], list(sentinels))
+    return df
+
+
+def befunddatum_format(df):
+    """
+    Date format pd.to_datetime infers for Befunddatum: guessed from the first
+    value, or "mixed" (each value parsed on its own) if it cannot be guessed.
+    None if the column has no values. Streaming mode fixes the format of the
+    first chunk, so all chunks are parsed like the whole column would be.
+    """
+    values = df['Befunddatum'].dropna() if 'Befunddatum' in df.columns else []
+    if not len(values):
+        return None
+    return guess_datetime_format(str(values.iloc[0])) or "mixed"
+
+
+def format_befunddatum(df, date_format=None):
+    """
+    Format Befunddatum as a date-only string (YYYY-MM-DD).
+    """
+    if 'Befunddatum' in df.columns:
+        df['Befunddatum'] = pd.to_datetime(df['Befunddatum'], errors='coerce',
+                                           format=date_format).dt.strftime('%Y-%m-%d')
+        df['Befunddatum'] = df['Befunddatum'].replace('NaT', np.nan)
+    return df
+
+
+def filter_panel(df, panel=PANEL_FILTER_VALUE, carry=None):
+    """
+    Forward fill Panel/Segregation and keep only rows of the given panel.
+    carry is the last value of the previous chunk in streaming mode.
+    Returns the filtered frame and the number of filled values.
+    """
+    missing_before = df['Panel_oder_segregation'].isna().sum()
+    df['Panel_oder_segregation'] = ffill_from(df['Panel_oder_segregation'], carry)
+    filled = missing_before - df['Panel_oder_segregation'].isna().sum()
+    return df[df['Panel_oder_segregation'] == panel], filled
+
+
+def fill_blutbuch_nummer(df, carry=None):
+    """
+    Forward fill Blutbuch-Nummer, starting from carry (the last value of the
+    previous chunk in streaming mode). Returns the number of values still
+    missing.
+    """
+    if 'Blutbuch_nummer' not in df.columns:
+        raise PipelineError("Blutbuch-Nummer column not found!")
+    df['Blutbuch_nummer'] = ffill_from(df['Blutbuch_nummer'], carry)
+    return df['Blutbuch_nummer'].isna().sum()
+
+
+def build_long_table_rows(df, genetic_cols):
+    """
+    Keep rows with genetic information and add one row for every
+    Blutbuch-Nummer without any, so each patient appears at least once.
+    Null sentinels in the genetic columns must already be NaN (see
+    clean_whitespace). Returns the rows and the number of patients without
+    genetic information. df is owned by the caller's pipeline and is
+    returned as is when there are no genetic columns; otherwise the rows
+    are new frames, not views of df.
+    """
+    if not genetic_cols:
+        return df, 0
+
+    has_genetic_info = df[genetic_cols].notna().any(axis=1).to_numpy()
+    # take() copies once and, unlike boolean indexing, does not mark the
+    # result as a possible view of df, so no defensive .copy() is needed
+    rows_with_genetics = df.take(np.flatnonzero(has_genetic_info))
+    unique_blutbuch = df.drop_duplicates(subset=['Blutbuch_nummer'])
+
+    blutbuch_with_genetics = set(rows_with_genetics['Blutbuch_nummer'].unique())
+    blutbuch_without_genetics = set(unique_blutbuch['Blutbuch_nummer'].unique()) - blutbuch_with_genetics
+    if not blutbuch_without_genetics:
+        return rows_with_genetics, 0
+
+    empty_genetic_rows = unique_blutbuch[unique_blutbuch['Blutbuch_nummer'].isin(blutbuch_without_genetics)]
+    return pd.concat([rows_with_genetics, empty_genetic_rows], ignore_index=True), len(blutbuch_without_genetics)
+
+
+def long_table_columns(df, genetic_cols):
+    """
+    Output columns: the identifier columns present in df, then the genetic columns.
+    """
+    return [col for col in IDENTIFIER_COLUMNS if col in df.columns] + list(genetic_cols)
+
+
+def unique_combinations(df, columns, keep_columns=()):
+    """
+    Unique rows over the given columns. keep_columns are taken along from
+    the first row of every combination.
+    """
+    if not keep_columns:
+        return df[columns].drop_duplicates().reset_index(drop=True)
+    first = np.flatnonzero(~df.duplicated(subset=columns).to_numpy())
+    return df[list(columns) + list(keep_columns)].take(first).reset_index(drop=True)
+
+
+def filter_by_sample_ids(long_table, sample_ids):
+    """
+    Keep only rows whose Blutbuch-Nummer is in sample_ids. Returns the
+    filtered table and the membership report of match_ids.
+    """
+    mask, report = match_ids(long_table['Blutbuch_nummer'], sample_ids)
+    return long_table.take(np.flatnonzero(mask)), report
+
+
+def expand_and_deduplicate(long_table):
+    """
+    Expand semicolon-separated values into rows and drop the duplicates this creates.
+    Returns the expanded and the deduplicated table.
+    """
+    expanded = expand_semicolon_rows(long_table)
+    return expanded, expanded.drop_duplicates().reset_index(drop=True)
+
+
+def column_summary(df, columns):
+    """
+    (column, non-null count, unique count) for each column present in df.
+    """
+    return [(col, df[col].notna().sum(), df[col].nunique()) for col in columns if col in df.columns]
+
+
+def merge_config(base, overrides):
+    """
+    Copy of base with overrides merged in; nested dicts are merged key by key.
+    """
+    merged = copy.deepcopy(base)
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def resolve_batch_inputs(config, inputs=None):
+    """
+    Expand batch inputs (paths, glob patterns or {"path": ..., "overrides":
+    {...}} entries; default file_paths.input_excel_files) into a list of
+    (path, config) pairs. Each workbook gets the config with its overrides
+    applied and, for incremental runs, its own state directory. Paths that
+    match nothing are kept, so they are reported as missing.
+    """
+    entries = inputs if inputs is not None else config["file_paths"].get("input_excel_files", [])
+    jobs = []
+    seen = set()
+    for entry in entries:
+        if isinstance(entry, dict):
+            pattern, overrides = entry["path"], entry.get("overrides", {})
+        else:
+            pattern, overrides = entry, {}
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            if os.path.abspath(path) in seen:
+                continue
+            seen.add(os.path.abspath(path))
+            job_config = merge_config(config, overrides)
+            file_paths = job_config["file_paths"]
+            path_hash = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:12]
+            file_paths["state_directory"] = os.path.join(
+                file_paths.get("state_directory", "state"),
+                f"{os.path.splitext(os.path.basename(path))[0]}.{path_hash}",
+            )
+            jobs.append((path, job_config))
+    return jobs
+
+
+def _build_workbook_combinations(args):
+    """
+    Process pool worker of run_batch: load one workbook, build its recoded
+    unique combinations, filter them by the external sample lists and
+    expand them, all with the config of this workbook (overrides applied).
+    """
+    config, path, workbook_cache, incremental = args
+    start = time.perf_counter()
+    stats = {"path": path}
+    try:
+        pipeline = LongTablePipeline(config, verbose=False, workbook_cache=workbook_cache)
+        result = pipeline.build_combinations(incremental=incremental, path=path)
+        filtered_external = pipeline.filter_external(result.pop("long_table"))
+        result["rows_after_filter"] = len(filtered_external)
+        long_table = pipeline.expand(filtered_external)
+        del filtered_external
+    except Exception as e:
+        stats.update(error=str(e), seconds=round(time.perf_counter() - start, 3))
+        return {"stats": stats, "long_table": None}
+    stats.update(result)
+    stats.update(patients=int(long_table['Blutbuch_nummer'].nunique()),
+                 seconds=round(time.perf_counter() - start, 3))
+    return {"stats": stats, "long_table": long_table}
+
+
+class LongTablePipeline:
+    """
+    The Excel-only long-table pipeline as a reusable object.
+
+    The configuration, compiled Klassifizierung rules and external sample
+    lists are loaded once and reused, so a warm process (service, notebook)
+    can call transform() or run() many times. Progress goes to the
+    "nephro.pipeline" logger (see nephro_logging.configure_logging) unless
+    verbose is False; the diagnostics that need extra passes over the
+    tables (unique counts, column summaries) only run at debug level.
+    """
+
+    def __init__(self, config, verbose=True, profiler=None, workbook_cache=None):
+        self.config = config
+        self.verbose = verbose
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self.workbook_cache = config.get("workbook_cache", {}) if workbook_cache is None else workbook_cache
+        self.klassifizierung_rules = compile_klassifizierung_rules(config)
+        data_processing = config.get("data_processing", {})
+        self.group_fill_columns = data_processing.get("group_fill_columns", DEFAULT_GROUP_FILL_COLUMNS)
+        self.categorical_columns = data_processing.get("categorical_columns", DEFAULT_CATEGORICAL_COLUMNS)
+        self.null_values = data_processing.get("null_values", DEFAULT_NULL_VALUES)
+        genetic_null_values = data_processing.get("genetic_null_values", DEFAULT_GENETIC_NULL_VALUES)
+        self.column_null_values = {col: genetic_null_values for col in config["genetic_columns"]}
+        self.pre_recode_summary = data_processing.get("pre_recode_summary", False)
+        self.sample_registry = SampleRegistry(config, use_cache=self.workbook_cache.get("enabled", True))
+        self.output_settings = output_settings(config)
+        self.source_path = None
+        self.source_rows = None
+
+    def log(self, message, level=logging.INFO):
+        if self.verbose:
+            logger.log(level, message)
+
+    def diagnostics(self):
+        """
+        True if debug-level diagnostics are logged. Check this before
+        computing them, so quiet and info runs skip the extra scans.
+        """
+        return self.verbose and logger.isEnabledFor(logging.DEBUG)
+
+    def load(self, path=None):
+        """
+        Load the Übersicht workbook.
+        """
+        path = path or self.config["file_paths"]["input_excel_file"]
+        self.log(f"Loading Excel file from: {path}")
+        self.profiler.start("load")
+        uebersicht = load_uebersicht(self.config, path, cache=self.workbook_cache)
+        self.profiler.stop(rows_out=len(uebersicht))
+        self.source_path = path
+        self.log("✓ Loaded Uebersicht_Nierenfaelle successfully")
+        self.log(f"  Shape: {uebersicht.shape}")
+        self.log(f"  Columns loaded: {list(uebersicht.columns)}", logging.DEBUG)
+        return uebersicht
+
+    def prepare(self, uebersicht):
+        """
+        Select, clean and forward fill the sheet: one row per source row of
+        the Exom/Nephro panel with a Blutbuch-Nummer. The sheet is released
+        once its columns are selected, so it is freed here unless the
+        caller keeps a reference to it.
+        """
+        self.log("\nProcessing Excel data...")
+        profiler = self.profiler
+        self.source_rows = len(uebersicht)
+
+        profiler.start("select_columns", rows_in=len(uebersicht))
+        available_columns, missing_columns, alternatives_used = resolve_columns(uebersicht.columns, self.config)
+        for alt_name, target_col in alternatives_used:
+            self.log(f"✓ Using '{alt_name}' for '{target_col}'")
+        if missing_columns:
+            self.log(f"⚠ Warning: Missing columns: {missing_columns}", logging.WARNING)
+            sheet_columns = read_header(self.source_path) if self.source_path else list(uebersicht.columns)
+            self.log(f"Available columns in file: {sheet_columns}")
+        selected = select_columns(uebersicht, available_columns)
+        del uebersicht
+        self.log(f"✓ Selected and renamed {len(available_columns)} columns")
+        categorical = to_categorical(selected, self.categorical_columns)
+        if categorical:
+            self.log(f"✓ Stored low-cardinality columns as categorical: {categorical}")
+        profiler.stop(rows_out=len(selected))
+
+        self.log("\nCleaning whitespace from all cells...")
+        profiler.start("clean_whitespace", rows_in=len(selected))
+        selected = clean_whitespace(selected, self.null_values, self.column_null_values)
+        if 'Befunddatum' in selected.columns:
+            self.log("✓ Formatting Befunddatum to date-only format...")
+            selected = format_befunddatum(selected)
+            self.log("✓ Befunddatum formatted to show date only (YYYY-MM-DD)")
+        self.log("✓ Cleaned whitespace from all cells")
+        profiler.stop(rows_out=len(selected))
+
+        self.log("\nHandling Panel/Segregation column...")
+        profiler.start("panel_filter", rows_in=len(selected))
+        if 'Panel_oder_segregation' in selected.columns:
+            rows_before = len(selected)
+            selected, filled = filter_panel(selected)
+            self.log(f"✓ Filled missing Panel/Segregation values: {filled} values filled")
+            self.log(f"✓ Filtered for '{PANEL_FILTER_VALUE}' only: {rows_before - len(selected)} rows removed, "
+                     f"{len(selected)} rows remaining")
+        else:
+            self.log("⚠ Panel/Segregation column not found, skipping panel filtering", logging.WARNING)
+        self.log("✓ Panel/Segregation handling completed")
+        profiler.stop(rows_out=len(selected))
+
+        self.log("\nStep 1: Filling missing Blutbuch-Nummer values...")
+        profiler.start("fill_blutbuch_nummer", rows_in=len(selected))
+        missing_before = selected['Blutbuch_nummer'].isna().sum() if 'Blutbuch_nummer' in selected.columns else 0
+        missing_after = fill_blutbuch_nummer(selected)
+        self.log(f"✓ Filled missing Blutbuch-Nummer values: {missing_before - missing_after} values filled")
+        self.log(f"  Total rows: {len(selected)}, Rows with Blutbuch-Nummer: {len(selected) - missing_after}")
+        profiler.stop(rows_out=len(selected))
+        return selected
+
+    def build_long_table(self, selected):
+        """
+        Per-patient fills, long-table rows and Klassifizierung recoding.
+        Returns the recoded rows and the long-table columns. The unique
+        combinations before recoding and their column summary are only
+        built when data_processing.pre_recode_summary is enabled.
+        """
+        profiler = self.profiler
+
+        self.log("\nStep 1.5: Filling missing values per Blutbuch-Nummer...")
+        profiler.start("group_fill", rows_in=len(selected))
+        group_fill_stats = fill_missing_per_group(selected, 'Blutbuch_nummer', self.group_fill_columns)
+        for col in self.group_fill_columns:
+            if col not in group_fill_stats:
+                self.log(f"⚠ {col} column not found, skipping {col} filling", logging.WARNING)
+                continue
+            col_stats = group_fill_stats[col]
+            self.log(f"✓ Filled missing {col} values: {col_stats['missing_before'] - col_stats['missing_after']} values filled")
+            self.log(f"  Total rows: {len(selected)}, Rows with {col}: {len(selected) - col_stats['missing_after']}")
+            if col_stats['groups_total']:
+                self.log(f"  Blutbuch-Nummer entries with {col}: {col_stats['groups_with_value']}/{col_stats['groups_total']} "
+                         f"({col_stats['groups_with_value']/col_stats['groups_total']*100:.1f}%)", logging.DEBUG)
+        profiler.stop(rows_out=len(selected))
+
+        self.log("\nStep 2: Creating long table format...")
+        profiler.start("long_table", rows_in=len(selected))
+        genetic_cols = [col for col in self.config["genetic_columns"] if col in selected.columns]
+        self.log(f"Available genetic columns: {genetic_cols}")
+        filtered, patients_without_genetics = build_long_table_rows(selected, genetic_cols)
+        if not genetic_cols:
+            self.log("⚠ No genetic columns found, keeping all rows", logging.WARNING)
+        else:
+            if patients_without_genetics:
+                self.log(f"✓ Found {patients_without_genetics} Blutbuch-Nummer entries without genetic information")
+            self.log(f"✓ Created comprehensive dataset: {len(filtered)} rows")
+            self.log(f"  - Rows with genetic information: {len(filtered) - patients_without_genetics}")
+            if self.diagnostics():
+                self.log(f"  - Unique Blutbuch-Nummer entries: {filtered['Blutbuch_nummer'].nunique()}", logging.DEBUG)
+
+        self.log("\nStep 3: Creating unique combinations...")
+        all_cols = long_table_columns(filtered, genetic_cols)
+        for col in all_cols[1:len(all_cols) - len(genetic_cols)]:
+            self.log(f"✓ Including {IDENTIFIER_LABELS.get(col, col)} in output")
+        if self.pre_recode_summary:
+            long_table = unique_combinations(filtered, all_cols)
+            self.log(f"✓ Created long table with unique combinations: {len(long_table)} rows")
+            self._log_long_table_summary(long_table, all_cols, "")
+            self.log(f"\nFirst 10 rows of the initial long table (before transformations):")
+            self.log(long_table.head(10).to_string(index=False))
+            del long_table
+        profiler.stop(rows_out=len(filtered))
+
+        self.log("\nApplying Klassifizierung transformations...")
+        profiler.start("recode", rows_in=len(filtered))
+        if 'Klassifizierung' in filtered.columns:
+            filtered['Klassifizierung'] = recode_klassifizierung(filtered, self.klassifizierung_rules)
+            self.log("✓ Applied Klassifizierung recoding to standardize variant classifications")
+        else:
+            self.log("⚠ Klassifizierung column not found, skipping recoding", logging.WARNING)
+        profiler.stop(rows_out=len(filtered))
+        return filtered, all_cols
+
+    def filter_external(self, long_table):
+        """
+        Keep only Blutbuch-Nummer values listed in the external sample lists
+        (sample_lists in config.json; a sample in any list is kept). Lists
+        that cannot be used are reported and skipped; without any usable
+        list the table itself is returned, not a copy.
+        """
+        self.log("\nStep 5: Filtering by Blutbuch-Nummer from external sample lists...")
+        self.profiler.start("external_filter", rows_in=len(long_table))
+        sample_ids = self.load_sample_ids()
+        if sample_ids is None:
+            self.log("⚠ No usable sample list. Proceeding without filtering...", logging.WARNING)
+            filtered = long_table
+        else:
+            filtered, report = filter_by_sample_ids(long_table, sample_ids)
+            self.log(f"✓ Filtered long table by external Blutbuch-Nummer list:")
+            self.log(f"  Rows before filtering: {len(long_table)}")
+            self.log(f"  Rows after filtering: {len(filtered)}")
+            self.log(f"  Rows removed: {len(long_table) - len(filtered)}")
+            if self.diagnostics():
+                self.log(f"  Unique patients remaining: {filtered['Blutbuch_nummer'].nunique()}", logging.DEBUG)
+            self.log(f"  Patients not in the sample lists: {len(report['unmatched'])}")
+            self.log(f"  Listed samples without rows in the long table: {len(report['not_found'])}")
+        self.profiler.stop(rows_out=len(filtered))
+        return filtered
+
+    def load_sample_ids(self):
+        """
+        Union of the IDs of all usable external sample lists, or None if no
+        list can be used. Lists that cannot be used are reported and skipped.
+        """
+        entries = []
+        for sample_list in self.sample_registry.lists:
+            try:
+                entry = self.sample_registry.load_list(sample_list)
+            except FileNotFoundError:
+                self.log(f"❌ Error: External file not found at {sample_list['path']}", logging.ERROR)
+                continue
+            except Exception as e:
+                self.log(f"❌ Error loading external file {sample_list['path']}: {e}", logging.ERROR)
+                continue
+            if entry["column"] is None:
+                self.log(f"⚠ Warning: Could not find Blutbuch-Nummer column in {entry['path']}.", logging.WARNING)
+                self.log(f"Expected one of: {self.sample_registry.id_columns}")
+                continue
+            source = "cached ID set" if entry["cached"] else "parsed"
+            self.log(f"✓ {entry['name']}: {len(entry['ids'])} unique Blutbuch-Nummer values in column "
+                     f"'{entry['column']}' of {entry['path']} ({source})")
+            entries.append(entry)
+        return self.sample_registry.union(entries) if entries else None
+
+    def expand(self, long_table):
+        """
+        Expand semicolon-separated values and deduplicate.
+        """
+        self.log("\nStep 6: Expanding rows for semicolon-separated values...")
+        self.profiler.start("expand_semicolons", rows_in=len(long_table))
+        expanded = expand_semicolon_rows(long_table)
+        self.profiler.stop(rows_out=len(expanded))
+        self.log(f"✓ Expanded semicolon-separated values:")
+        self.log(f"  Rows before expansion: {len(long_table)}")
+        self.log(f"  Rows after expansion: {len(expanded)}")
+        self.log(f"  New rows created: {len(expanded) - len(long_table)}")
+
+        self.profiler.start("deduplicate", rows_in=len(expanded))
+        final = expanded.drop_duplicates().reset_index(drop=True)
+        self.profiler.stop(rows_out=len(final))
+        if len(final) < len(expanded):
+            self.log(f"✓ Removed {len(expanded) - len(final)} duplicate rows after expansion")
+        self.log(f"  Final unique rows: {len(final)}")
+        return final
+
+    def build_combinations(self, uebersicht=None, incremental=False, path=None):
+        """
+        Run the stages from the raw sheet to the recoded unique combinations
+        (before the external filter and semicolon expansion). Without a
+        sheet, the workbook at path (default: the configured input) is
+        loaded here. Returns a dict with that long table and row counts.
+
+        Each stage owns its input and every intermediate table is dropped
+        as soon as the next one exists. A sheet passed in stays alive as
+        long as the caller holds it; leave it to this method to load the
+        workbook for the lowest peak memory.
+        """
+        # The loaded sheet is only referenced by prepare(), which drops it
+        selected = self.prepare(self.load(path) if uebersicht is None else uebersicht)
+
+        if incremental:
+            selected, incremental_run = self._plan_incremental(selected)
+
+        filtered, all_cols = self.build_long_table(selected)
+        del selected
+        rows_with_genetics = len(filtered)
+
+        self.log("\nStep 4: Creating unique combinations after recoding...")
+        self.profiler.start("unique_combinations", rows_in=rows_with_genetics)
+        long_table_recode = unique_combinations(filtered, all_cols,
+                                                keep_columns=[BLOCK_ROW_COLUMN] if incremental else ())
+        del filtered
+        if incremental:
+            long_table_recode = self._merge_incremental(incremental_run, long_table_recode)
+
+        self.log(f"✓ Created long table after recoding with unique combinations: {len(long_table_recode)} rows")
+        self._log_long_table_summary(long_table_recode, all_cols, " after recoding")
+        self.profiler.stop(rows_out=len(long_table_recode))
+
+        return {
+            "long_table": long_table_recode,
+            "original_rows": self.source_rows,
+            "rows_with_genetics": rows_with_genetics,
+            "unique_combinations": len(long_table_recode),
+        }
+
+    def transform(self, uebersicht=None, incremental=False, path=None):
+        """
+        Run all stages from the raw sheet (loaded from path if not given)
+        to the final long table. Returns a dict with the final long table
+        and row counts.
+        """
+        result = self.build_combinations(uebersicht, incremental=incremental, path=path)
+        filtered_external = self.filter_external(result.pop("long_table"))
+        result["long_table"] = self.expand(filtered_external)
+        return result
+
+    def run_batch(self, inputs=None, output_format='xlsx', incremental=False, max_workers=None, output_path=None):
+        """
+        Load and transform several workbooks in a process pool and save one
+        merged long table.
+
+        inputs are paths, glob patterns or {"path": ..., "overrides": {...}}
+        entries (default: file_paths.input_excel_files from the config). Each
+        workbook is parsed, turned into recoded unique combinations, filtered
+        by the external sample lists and expanded in its own process, with
+        its overrides applied to every stage; one final deduplication runs
+        on the merged table. Workbooks that fail are reported and skipped.
+        Returns the result dict of run() with per-workbook statistics under
+        "files".
+        """
+        self.check_output(output_format)
+        jobs = resolve_batch_inputs(self.config, inputs)
+        if not jobs:
+            raise PipelineError("No input workbooks found for batch mode!")
+        max_workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+        self.log(f"Batch mode: {len(jobs)} workbooks, {max_workers} worker processes")
+
+        self.profiler.start("batch_workbooks")
+        worker_args = [(job_config, path, self.workbook_cache, incremental) for path, job_config in jobs]
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            outcomes = list(pool.map(_build_workbook_combinations, worker_args))
+
+        files = []
+        long_tables = []
+        for outcome in outcomes:
+            stats = outcome["stats"]
+            files.append(stats)
+            if "error" in stats:
+                self.log(f"❌ {stats['path']}: {stats['error']}", logging.ERROR)
+                continue
+            long_tables.append(outcome.pop("long_table"))
+            self.log(f"✓ {stats['path']}: {stats['original_rows']} rows, {stats['unique_combinations']} unique "
+                     f"combinations, {stats['rows_after_filter']} after the sample list filter, "
+                     f"{len(long_tables[-1])} after expansion, {stats['patients']} patients "
+                     f"({stats['seconds']:.1f} s)")
+        if not long_tables:
+            raise PipelineError("None of the input workbooks could be processed!")
+
+        del outcomes
+        merged = pd.concat(long_tables, ignore_index=True)
+        self.profiler.stop(rows_out=len(merged))
+        self.log(f"✓ Merged {len(long_tables)} workbooks: {len(merged)} rows")
+        del long_tables
+
+        self.profiler.start("deduplicate", rows_in=len(merged))
+        long_table_final = merged.drop_duplicates().reset_index(drop=True)
+        self.profiler.stop(rows_out=len(long_table_final))
+        if len(long_table_final) < len(merged):
+            self.log(f"✓ Removed {len(merged) - len(long_table_final)} rows found in more than one workbook")
+        self.log(f"  Final unique rows: {len(long_table_final)}")
+        if self.diagnostics():
+            self.log(f"  Unique Blutbuch-Nummer values: {long_table_final['Blutbuch_nummer'].nunique()}",
+                     logging.DEBUG)
+        del merged
+
+        result = {
+            "long_table": long_table_final,
+            "original_rows": sum(stats.get("original_rows", 0) for stats in files),
+            "rows_with_genetics": sum(stats.get("rows_with_genetics", 0) for stats in files),
+            "unique_combinations": sum(stats.get("unique_combinations", 0) for stats in files),
+            "files": files,
+        }
+        self.log("\nSaving results...")
+        result["output_path"] = self.save(long_table_final, output_format, output_path)
+        return result
+
+    def output_path(self, output_format, timestamp=None):
+        """
+        Timestamped output file path from the config.
+        """
+        timestamp = timestamp or datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
+        file_paths = self.config["file_paths"]
+        return f"{file_paths['output_directory']}/{file_paths['output_filename_prefix']}.{timestamp}.{output_format}"
+
+    def check_output(self, output_format):
+        """
+        Fail early, before anything is loaded, if the output format cannot
+        be written with the configured compression and partitioning.
+        """
+        try:
+            check_output_options(output_format, self.output_settings["compression"],
+                                 self.output_settings["partition_by"])
+        except (ValueError, ImportError) as e:
+            raise PipelineError(str(e)) from None
+
+    def save(self, long_table, output_format='xlsx', output_path=None):
+        """
+        Save the final long table and return the output path (a directory
+        for partitioned parquet or arrow output).
+        """
+        output_path = output_path or self.output_path(output_format)
+        self.check_output(output_format)
+        partition_by = self.output_settings["partition_by"]
+        self.profiler.start("save", rows_in=len(long_table))
+        streaming_rows = self.output_settings["xlsx_streaming_rows"]
+        save_long_table(long_table, output_path, output_format, compression=self.output_settings["compression"],
+                        partition_by=partition_by, xlsx_streaming_rows=streaming_rows)
+        self.profiler.stop(rows_out=len(long_table))
+        kind = FORMAT_LABELS[output_format]
+        writer = excel_writer(len(long_table), streaming_rows) if output_format == 'xlsx' else "pandas"
+        if writer != "pandas":
+            kind += f" (streamed with {writer})"
+        if partition_by:
+            self.log(f"✓ Final long table (with transformations and expansions) saved as {kind} files "
+                     f"partitioned by {partition_by} to: {output_path}")
+        else:
+            self.log(f"✓ Final long table (with transformations and expansions) saved to {kind} file: {output_path}")
+        return output_path
+
+    def run(self, output_format='xlsx', incremental=False, uebersicht=None, output_path=None):
+        """
+        Load (unless a sheet is given), transform and save. Returns the
+        result dict of transform() with the output path added.
+        """
+        self.check_output(output_format)
+        result = self.transform(uebersicht, incremental=incremental)
+        result["output_path"] = self.save(result["long_table"], output_format, output_path)
+        return result
+
+    def run_streaming(self, output_format='csv', chunk_size=DEFAULT_STREAM_CHUNK_ROWS, output_path=None, path=None):
+        """
+        Process the workbook in chunks of chunk_size rows and append each
+        finished part to the output file, so memory is bounded by the chunk
+        size instead of the size of the sheet.
+
+        Chunks are cut at Blutbuch-Nummer block boundaries: the rows of the
+        last patient of a chunk are held back and processed with the next
+        chunk, so the per-patient fills see the whole block. The Panel and
+        Blutbuch-Nummer forward fills continue across chunks. Duplicates
+        across chunks are dropped by row hash. Patients without genetic
+        information are written at the end, as in a full run, so the
+        output is the same as run() gives when every Blutbuch-Nummer forms
+        one contiguous block in the sheet (the usual layout).
+
+        Returns a dict with the first rows of the output ("head"), row
+        counts and the output path.
+        """
+        if self.output_settings["partition_by"]:
+            raise PipelineError("Partitioned output is not available in streaming mode")
+        self.check_output(output_format)
+        path = path or self.config["file_paths"]["input_excel_file"]
+        if not os.path.exists(path):
+            raise PipelineError(f"File not found at {path}")
+        output_path = output_path or self.output_path(output_format)
+        self.source_path = path
+
+        self.log(f"Streaming Excel file from: {path} (chunks of {chunk_size} rows)")
+        sample_ids = self.load_sample_ids()
+        if sample_ids is None:
+            self.log("⚠ No usable sample list. Proceeding without filtering...", logging.WARNING)
+
+        self.profiler.start("streaming")
+        stream = {
+            "sample_ids": sample_ids,
+            "seen": SeenRows(),
+            "patients": set(),
+            "finished_patients": set(),
+            "repeated_patients": set(),
+            "without_genetics": [],
+            "head": [],
+            "original_rows": 0,
+            "rows_with_genetics": 0,
+            "unique_combinations": 0,
+            "final_rows": 0,
+            "writer": None,
+        }
+        available_columns = None
+        panel_carry = blutbuch_carry = date_format = None
+        held = None
+        try:
+            chunks = iter_column_chunks(path, column_candidates(self.config), chunk_size=chunk_size)
+            for number, raw in enumerate(chunks, start=1):
+                stream["original_rows"] += len(raw)
+                if available_columns is None:
+                    available_columns, missing_columns, alternatives_used = resolve_columns(raw.columns, self.config)
+                    for alt_name, target_col in alternatives_used:
+                        self.log(f"✓ Using '{alt_name}' for '{target_col}'")
+                    if missing_columns:
+                        self.log(f"⚠ Warning: Missing columns: {missing_columns}", logging.WARNING)
+                selected = select_columns(raw, available_columns)
+                del raw
+                to_categorical(selected, self.categorical_columns)
+                selected = clean_whitespace(selected, self.null_values, self.column_null_values)
+                date_format = date_format or befunddatum_format(selected)
+                selected = format_befunddatum(selected, date_format)
+                if 'Panel_oder_segregation' in selected.columns:
+                    unfiltered = selected
+                    selected, _ = filter_panel(selected, carry=panel_carry)
+                    # The fill continues from the last panel of the chunk, before filtering
+                    panel_carry = last_value(unfiltered['Panel_oder_segregation'], panel_carry)
+                    del unfiltered
+                fill_blutbuch_nummer(selected, carry=blutbuch_carry)
+                blutbuch_carry = last_value(selected['Blutbuch_nummer'], blutbuch_carry)
+
+                if stream["writer"] is None:
+                    genetic_cols = [col for col in self.config["genetic_columns"] if col in selected.columns]
+                    all_cols = long_table_columns(selected, genetic_cols)
+                    stream["writer"] = LongTableWriter(output_path, output_format, all_cols,
+                                                       compression=self.output_settings["compression"])
+                if held is not None and len(held):
+                    # Categories differ between chunks; concatenate as object and convert again
+                    selected = pd.concat([held.astype(object), selected.astype(object)], ignore_index=True)
+                    to_categorical(selected, self.categorical_columns)
+                complete, held = split_trailing_block(selected, 'Blutbuch_nummer')
+                self._stream_block(complete, genetic_cols, all_cols, stream)
+                self.log(f"✓ Chunk {number}: {stream['original_rows']} rows read, "
+                         f"{stream['final_rows']} rows written")
+
+            if held is not None:
+                self._stream_block(held, genetic_cols, all_cols, stream)
+            if stream["without_genetics"]:
+                # Patients without genetic information come last, as in build_long_table_rows
+                self._stream_rows(pd.concat(stream["without_genetics"], ignore_index=True), all_cols, stream)
+        finally:
+            if stream["writer"] is not None:
+                stream["writer"].close()
+        self.profiler.stop(rows_out=stream["final_rows"])
+
+        if stream["repeated_patients"]:
+            self.log(f"⚠ {len(stream['repeated_patients'])} Blutbuch-Nummer values reappear further down the sheet "
+                     f"after their block was written; their separate blocks were filled and deduplicated on their own",
+                     logging.WARNING)
+        kind = FORMAT_LABELS[output_format]
+        self.log(f"✓ Final long table (with transformations and expansions) streamed to {kind} file: {output_path}")
+        return {
+            "head": pd.concat(stream["head"], ignore_index=True).head(10) if stream["head"] else None,
+            "original_rows": stream["original_rows"],
+            "rows_with_genetics": stream["rows_with_genetics"],
+            "unique_combinations": stream["unique_combinations"],
+            "final_rows": stream["final_rows"],
+            "patients": len(stream["patients"]),
+            "output_path": output_path,
+        }
+
+    def _stream_block(self, block, genetic_cols, all_cols, stream):
+        # Fill, build and recode the long-table rows of complete patient blocks
+        if block.empty:
+            return
+        block = block.copy()
+        patients = set(block['Blutbuch_nummer'].dropna().unique())
+        stream["repeated_patients"].update(patients & stream["finished_patients"])
+        stream["finished_patients"].update(patients)
+
+        fill_missing_per_group(block, 'Blutbuch_nummer', self.group_fill_columns)
+        rows, patients_without_genetics = build_long_table_rows(block, genetic_cols)
+        del block
+        if 'Klassifizierung' in rows.columns:
+            rows['Klassifizierung'] = recode_klassifizierung(rows, self.klassifizierung_rules)
+        stream["rows_with_genetics"] += len(rows)
+        with_genetics = len(rows) - patients_without_genetics
+        if patients_without_genetics:
+            stream["without_genetics"].append(rows.iloc[with_genetics:][all_cols])
+        self._stream_rows(rows.iloc[:with_genetics], all_cols, stream)
+
+    def _stream_rows(self, rows, all_cols, stream):
+        # Unique combinations -> external filter -> expansion -> append new rows
+        long_table = unique_combinations(rows, all_cols)
+        stream["unique_combinations"] += len(long_table)
+        if stream["sample_ids"] is not None:
+            mask, _ = match_ids(long_table['Blutbuch_nummer'], stream["sample_ids"])
+            long_table = long_table[mask]
+        new_rows = stream["seen"].new_rows(expand_semicolon_rows(long_table))
+        if new_rows.empty:
+            return
+        stream["writer"].append(new_rows)
+        stream["final_rows"] += len(new_rows)
+        stream["patients"].update(new_rows['Blutbuch_nummer'].dropna().unique())
+        if sum(len(head) for head in stream["head"]) < 10:
+            stream["head"].append(new_rows.head(10).astype(object))
+
+    def _plan_incremental(self, selected):
+        self.log("\nIncremental mode: comparing Blutbuch-Nummer blocks with the previous run...")
+        self.profiler.start("incremental_plan", rows_in=len(selected))
+        state_dir = self.config["file_paths"].get("state_directory", "state")
+        state = load_state(state_dir)
+        fingerprint = config_fingerprint(self.config, selected.columns)
+        block_hashes = hash_blocks(selected, 'Blutbuch_nummer')
+        blocks_to_process, blocks_removed, full_rebuild = plan_incremental_run(state, fingerprint, block_hashes)
+        # Lets the merge put cached and new rows in the order of a full run
+        block_rows = number_block_rows(selected, 'Blutbuch_nummer')
+        sheet_index = sheet_rows(selected, 'Blutbuch_nummer', block_rows)
+        selected[BLOCK_ROW_COLUMN] = block_rows
+        if full_rebuild:
+            state = None
+            self.log("⚠ No matching previous state found, processing all Blutbuch-Nummer blocks", logging.WARNING)
+        else:
+            self.log(f"✓ {len(blocks_to_process)} changed or new, {len(blocks_removed)} removed, "
+                     f"{len(block_hashes) - len(blocks_to_process)} unchanged Blutbuch-Nummer blocks")
+        selected = select_blocks(selected, 'Blutbuch_nummer', blocks_to_process)
+        self.log(f"  Rows to process: {len(selected)}")
+        self.profiler.stop(rows_out=len(selected))
+        incremental_run = {
+            "state_dir": state_dir,
+            "state": state,
+            "fingerprint": fingerprint,
+            "block_hashes": block_hashes,
+            "blocks_to_process": blocks_to_process,
+            "blocks_removed": blocks_removed,
+            "sheet_index": sheet_index,
+        }
+        return selected, incremental_run
+
+    def _merge_incremental(self, incremental_run, long_table_recode):
+        # Merge the recomputed blocks into the cached long table and store the new state
+        long_table_recode = merge_cached_long_table(
+            incremental_run["state"], 'Blutbuch_nummer',
+            incremental_run["blocks_to_process"], incremental_run["blocks_removed"], long_table_recode,
+            sheet_index=incremental_run["sheet_index"],
+            detail_columns=[col for col in long_table_recode.columns
+                            if col not in IDENTIFIER_COLUMNS and col != BLOCK_ROW_COLUMN],
+        )
+        save_state(incremental_run["state_dir"], incremental_run["fingerprint"],
+                   incremental_run["block_hashes"], long_table_recode)
+        self.log(f"✓ Merged recomputed blocks with cached long table, state saved to: {incremental_run['state_dir']}")
+        return long_table_recode.drop(columns=BLOCK_ROW_COLUMN)
+
+    def _log_long_table_summary(self, long_table, all_cols, label):
+        # Unique counts per column and per patient: debug level only
+        if not self.diagnostics():
+            return
+        blutbuch_counts = long_table['Blutbuch_nummer'].value_counts()
+        self.log(f"  Unique Blutbuch-Nummer values: {len(blutbuch_counts)}", logging.DEBUG)
+        self.log(f"\nSummary of the long table{label}:", logging.DEBUG)
+        for col, non_null_count, unique_count in column_summary(long_table, all_cols):
+            self.log(f"  {col}: {non_null_count} non-null values, {unique_count} unique values", logging.DEBUG)
+
+        self.log(f"\nDistribution of combinations per Blutbuch-Nummer{label}:", logging.DEBUG)
+        self.log(f"  Mean combinations per patient: {blutbuch_counts.mean():.2f}", logging.DEBUG)
+        self.log(f"  Max combinations per patient: {blutbuch_counts.max()}", logging.DEBUG)
+        self.log(f"  Patients with multiple combinations: {(blutbuch_counts > 1).sum()}", logging.DEBUG)
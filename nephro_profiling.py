@@ -0,0 +1,124 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from nephro_logging import get_logger
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = get_logger("profiling")
+
+
+def peak_rss_bytes():
+    """
+    Peak resident set size of this process in bytes, or None if it cannot be
+    determined (needs psutil on Windows).
+    """
+    if psutil is not None:
+        memory = psutil.Process().memory_info()
+        # peak_wset is the peak working set on Windows
+        if hasattr(memory, "peak_wset"):
+            return memory.peak_wset
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+class StageProfiler:
+    """
+    Records wall-clock time, CPU time, peak RSS, tracemalloc deltas and
+    row counts for named pipeline stages.
+
+    Stages are bracketed with start(name, rows_in) and stop(rows_out). A
+    disabled profiler does nothing, so the calls can stay in the pipeline.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stages = []
+        self._current = None
+        self._started = time.perf_counter()
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start(self, name, rows_in=None):
+        if not self.enabled:
+            return
+        if self._current is not None:
+            self.stop()
+        tracemalloc.reset_peak()
+        traced_current, _ = tracemalloc.get_traced_memory()
+        self._current = {
+            "name": name,
+            "rows_in": rows_in,
+            "_wall": time.perf_counter(),
+            "_cpu": time.process_time(),
+            "_traced": traced_current,
+            "_peak_rss": peak_rss_bytes(),
+        }
+
+    def stop(self, rows_out=None):
+        if not self.enabled or self._current is None:
+            return
+        stage = self._current
+        self._current = None
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        peak_rss = peak_rss_bytes()
+        self.stages.append({
+            "name": stage["name"],
+            "rows_in": stage["rows_in"],
+            "rows_out": rows_out,
+            "wall_seconds": round(time.perf_counter() - stage["_wall"], 6),
+            "cpu_seconds": round(time.process_time() - stage["_cpu"], 6),
+            "peak_rss_bytes": peak_rss,
+            "peak_rss_growth_bytes": (peak_rss - stage["_peak_rss"]
+                                      if peak_rss is not None and stage["_peak_rss"] is not None else None),
+            "traced_delta_bytes": traced_current - stage["_traced"],
+            "traced_peak_bytes": traced_peak - stage["_traced"],
+            "traced_total_peak_bytes": traced_peak,
+        })
+
+    def report(self):
+        """
+        Machine-readable summary of all recorded stages.
+        """
+        return {
+            "created": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "python": sys.version.split()[0],
+            "total_wall_seconds": round(time.perf_counter() - self._started, 6),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": self.stages,
+        }
+
+    def write(self, path):
+        """
+        Write the report as JSON and log a short per-stage table.
+        """
+        if not self.enabled:
+            return
+        self.stop()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+        logger.info(f"\nStage profile (saved to {path}):")
+        for stage in self.stages:
+            peak_mb = stage["traced_peak_bytes"] / 1024 / 1024
+            logger.info(f"  {stage['name']:<22} {stage['wall_seconds']:>9.3f} s wall "
+                        f"{stage['cpu_seconds']:>9.3f} s cpu {peak_mb:>9.1f} MB traced peak  "
+                        f"rows {stage['rows_in']} -> {stage['rows_out']}", extra={"fields": {"stage": stage}})
@@ -0,0 +1,226 @@
+import argparse
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from nephro_logging import get_logger
+
+REPORT_INDEX_VERSION = 2
+DEFAULT_REPORT_INDEX_PATH = "state/nephro_report_index.sqlite"
+REPORT_COLUMNS = ['value', 'size', 'mtime_ns', 'year', 'subfolder', 'file', 'Blutbuch_Nummer', 'report_type',
+                  'transfer_status', 'transfer_reason', 'transfer_time']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    path TEXT PRIMARY KEY,
+    blutbuch_nummer TEXT NOT NULL,
+    year INTEGER,
+    subfolder TEXT,
+    file TEXT,
+    report_type TEXT,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    transfer_status TEXT,
+    transfer_reason TEXT,
+    transfer_time TEXT,
+    scan INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_by_case ON reports (blutbuch_nummer);
+CREATE TABLE IF NOT EXISTS eligible_cases (
+    blutbuch_nummer TEXT PRIMARY KEY,
+    selected_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scans (
+    scan INTEGER PRIMARY KEY,
+    completed_at TEXT NOT NULL,
+    reports INTEGER NOT NULL
+);
+"""
+
+REPORT_SELECT = """
+SELECT path AS value, size, mtime_ns, year, subfolder, file, blutbuch_nummer AS Blutbuch_Nummer, report_type,
+       transfer_status, transfer_reason, transfer_time
+FROM reports
+"""
+
+logger = get_logger("report_index")
+
+
+def _report_frame(rows):
+    """
+    Typed table of report rows in REPORT_COLUMNS order, like
+    nephro_pdf_index.report_metadata_table plus the transfer status.
+    """
+    table = pd.DataFrame.from_records(rows, columns=REPORT_COLUMNS)
+    return table.astype({'value': object, 'size': 'int64', 'mtime_ns': 'int64', 'year': 'Int16',
+                         'report_type': 'category'})
+
+
+class ReportIndex:
+    """
+    Persistent SQLite index of the report PDFs per Blutbuch-Nummer, with
+    size, mtime and transfer status of every file.
+
+    The reports of a case are an index lookup on blutbuch_nummer instead of
+    a filter over all reports, and the cases of the last transfer selection
+    without any report are answered from the index without scanning the
+    share. Open it with a with statement or call close().
+    """
+
+    def __init__(self, path=DEFAULT_REPORT_INDEX_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != REPORT_INDEX_VERSION:
+            if version:
+                logger.warning(f"⚠ Report index {path} has version {version}, rebuilding it")
+            with self.connection:
+                self.connection.execute("DROP TABLE IF EXISTS reports")
+                self.connection.execute("DROP TABLE IF EXISTS eligible_cases")
+                self.connection.execute("DROP TABLE IF EXISTS scans")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {REPORT_INDEX_VERSION}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def sync_reports(self, reports):
+        """
+        Replace the indexed reports with a completed scan of the share (a
+        nephro_pdf_index.report_metadata_table). Reports whose size and mtime
+        are unchanged keep their transfer status; changed files lose it and
+        files no longer found are removed. Rows without a Blutbuch-Nummer are
+        not indexed. Returns the number of indexed reports.
+        """
+        reports = reports[reports['Blutbuch_Nummer'].notna()]
+        scan = self.connection.execute("SELECT COALESCE(MAX(scan), 0) + 1 FROM scans").fetchone()[0]
+        rows = zip(reports['value'].tolist(), reports['Blutbuch_Nummer'].tolist(), reports['year'].tolist(),
+                   reports['subfolder'].tolist(), reports['file'].tolist(), reports['report_type'].tolist(),
+                   reports['size'].tolist(), reports['mtime_ns'].tolist(), [scan] * len(reports))
+        with self.connection:
+            self.connection.executemany("""
+                INSERT INTO reports (path, blutbuch_nummer, year, subfolder, file, report_type, size, mtime_ns,
+                                     scan)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (path) DO UPDATE SET
+                    transfer_status = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                                           THEN transfer_status END,
+                    transfer_reason = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                                           THEN transfer_reason END,
+                    transfer_time = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                                         THEN transfer_time END,
+                    blutbuch_nummer = excluded.blutbuch_nummer, year = excluded.year,
+                    subfolder = excluded.subfolder, file = excluded.file, report_type = excluded.report_type,
+                    size = excluded.size, mtime_ns = excluded.mtime_ns, scan = excluded.scan
+            """, rows)
+            removed = self.connection.execute("DELETE FROM reports WHERE scan != ?", (scan,)).rowcount
+            self.connection.execute("INSERT INTO scans VALUES (?, ?, ?)",
+                                    (scan, time.strftime("%Y-%m-%dT%H:%M:%S"), len(reports)))
+        if removed:
+            logger.info(f"Report index: {removed} reports no longer on the share removed")
+        return len(reports)
+
+    def last_scan_time(self):
+        """
+        Completion time of the last scan stored with sync_reports
+        (YYYY-MM-DDTHH:MM:SS), or None if the index has never been synced.
+        """
+        row = self.connection.execute("SELECT completed_at FROM scans ORDER BY scan DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def reports_for_case(self, blutbuch_nummer):
+        """
+        Reports of one case as a table with REPORT_COLUMNS.
+        """
+        rows = self.connection.execute(REPORT_SELECT + "WHERE blutbuch_nummer = ? ORDER BY path",
+                                       (blutbuch_nummer,)).fetchall()
+        return _report_frame(rows)
+
+    def reports_for_cases(self, blutbuch_nummern):
+        """
+        Reports of several cases as one table with REPORT_COLUMNS. The IDs
+        are loaded into a temporary table and joined through the case index.
+        """
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS wanted_cases (blutbuch_nummer TEXT PRIMARY KEY)")
+            self.connection.execute("DELETE FROM wanted_cases")
+            self.connection.executemany("INSERT OR IGNORE INTO wanted_cases VALUES (?)",
+                                        ((str(value),) for value in blutbuch_nummern))
+        rows = self.connection.execute(
+            REPORT_SELECT + "WHERE blutbuch_nummer IN (SELECT blutbuch_nummer FROM wanted_cases) ORDER BY path"
+        ).fetchall()
+        return _report_frame(rows)
+
+    def set_eligible_cases(self, blutbuch_nummern):
+        """
+        Store the cases selected for transfer, replacing the previous selection.
+        """
+        selected_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with self.connection:
+            self.connection.execute("DELETE FROM eligible_cases")
+            self.connection.executemany("INSERT OR IGNORE INTO eligible_cases VALUES (?, ?)",
+                                        ((str(value), selected_at) for value in blutbuch_nummern))
+
+    def eligible_cases_without_reports(self):
+        """
+        Blutbuch-Nummern of the stored selection that have no report PDF in
+        the index, sorted.
+        """
+        rows = self.connection.execute("""
+            SELECT blutbuch_nummer FROM eligible_cases AS eligible
+            WHERE NOT EXISTS (SELECT 1 FROM reports WHERE reports.blutbuch_nummer = eligible.blutbuch_nummer)
+            ORDER BY blutbuch_nummer
+        """).fetchall()
+        return [row[0] for row in rows]
+
+    def record_transfers(self, outcomes):
+        """
+        Store the status, reason and time of transfer outcomes
+        (nephro_transfer.copy_one) for the indexed reports.
+        """
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE reports SET transfer_status = ?, transfer_reason = ?, transfer_time = ? WHERE path = ?",
+                ((outcome["status"], outcome["reason"], outcome.get("time"), outcome["source"])
+                 for outcome in outcomes)
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Look up report PDFs in the report index')
+    parser.add_argument('blutbuch_nummern', nargs='*', help='Cases to list the reports of')
+    parser.add_argument('--index', default=DEFAULT_REPORT_INDEX_PATH, help='Report index file')
+    parser.add_argument('--without-reports', action='store_true',
+                        help='List the cases of the last transfer selection without a report PDF')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.index):
+        print(f"❌ Report index not found: {args.index}")
+        raise SystemExit(1)
+    with ReportIndex(args.index) as report_index:
+        print(f"Last completed scan: {report_index.last_scan_time() or 'none'}")
+        if args.without_reports:
+            missing = report_index.eligible_cases_without_reports()
+            print(f"Eligible cases without a report PDF: {len(missing)}")
+            for blutbuch_nummer in missing:
+                print(blutbuch_nummer)
+        for blutbuch_nummer in args.blutbuch_nummern:
+            reports = report_index.reports_for_case(blutbuch_nummer)
+            print(f"\n{blutbuch_nummer}: {len(reports)} reports")
+            if len(reports):
+                print(reports[['value', 'size', 'report_type', 'transfer_status']].to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
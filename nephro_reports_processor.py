@@ -1,87 +1,129 @@
+import argparse
+import asyncio
 import pandas as pd
 import numpy as np
 import os
-import re
-from pathlib import Path
 from datetime import datetime
-import shutil
-import glob
+
+from nephro_async_io import AsyncFileIO, network_io_settings
+from nephro_cache import read_excel_cached
+from nephro_logging import DEFAULT_LOG_LEVEL, LOG_LEVELS, configure_logging, get_logger
+from nephro_pdf_index import (
+    IncompleteScanError,
+    iter_report_pdfs,
+    load_file_index,
+    report_metadata_table,
+    save_file_index,
+    scan_report_pdfs_async,
+)
+from nephro_report_index import ReportIndex
+from nephro_pipeline import PipelineError, load_config
+from nephro_transfer import format_outcome, transfer_files, transfer_files_async
+from nephro_transforms import (
+    compile_cerkid_recoding,
+    join_unique_per_group,
+    max_per_group,
+    recode_klassifizierung,
+    recode_outcome,
+    recode_values,
+    to_categorical,
+)
+
+parser = argparse.ArgumentParser(description='Select the CeRKiD cases and copy their PDF reports')
+parser.add_argument('--log-level', choices=list(LOG_LEVELS), default=DEFAULT_LOG_LEVEL,
+                    help='quiet: warnings and errors only; info (default): progress; debug: also the sheet columns')
+parser.add_argument('--log-json', metavar='PATH', help='Also append all log messages as JSON lines to this file')
+parser.add_argument('--async-io', action='store_true',
+                    help='Scan the share and copy the reports with the asyncio I/O layer (network_io in config.json)')
+args = parser.parse_args()
+logger = configure_logging(args.log_level, args.log_json).getChild("cerkid")
 
 # Set working directory (using current directory)
 # os.chdir("C:/projects/copy_lb_reports_to_cerkid")
-print(f"Working directory: {os.getcwd()}")
+logger.info(f"Working directory: {os.getcwd()}")
+
+# Recoding tables (cerkid_recoding section)
+try:
+    config = load_config("config.json")
+except PipelineError as e:
+    logger.error(f"Error: {e}")
+    exit(1)
+
+# Network I/O: threads by default, or the asyncio layer with concurrency limit, timeouts and retries
+network_io = network_io_settings(config.get("network_io"))
+file_io = AsyncFileIO.from_settings(network_io) if args.async_io or network_io["enabled"] else None
+if file_io is not None:
+    logger.info(f"Async network I/O: up to {file_io.max_concurrency} operations, "
+                f"{file_io.timeout_seconds}s timeout, {file_io.retries} retries")
 
-# Find all PDF files in the network folders
-pdf_lb = []
-network_path = r"//10.28.149.154/hum/HGDiag/Befunde/Nephro/20[0-9][0-9]"
-print(f"Searching for PDF files in: {network_path}")
+# Find all report PDF files in the network folders
+network_root = "//10.28.149.154/hum/HGDiag/Befunde/Nephro"
+file_index_path = "state/nephro_pdf_file_index.json"
+# Reports per Blutbuch-Nummer with size, mtime and transfer status, kept between runs
+report_index = ReportIndex("state/nephro_report_index.sqlite")
+logger.info(f"Searching for PDF files in: {network_root}/20[0-9][0-9]")
 
+# Set once a scan of the share completed; otherwise the report index of the
+# last completed scan is used and no files are copied
+scan_completed = False
 try:
-    for year_folder in glob.glob(network_path):
-        print(f"Found year folder: {year_folder}")
-        pdf_files = list(Path(year_folder).rglob("*.pdf"))
-        print(f"Found {len(pdf_files)} PDF files in {year_folder}")
-        pdf_lb.extend(pdf_files)
-    
-    print(f"Total PDF files found: {len(pdf_lb)}")
-    
-    if len(pdf_lb) == 0:
-        print("Warning: No PDF files found. This might be due to network access issues.")
-        print("Creating empty DataFrame to continue script execution...")
-        pdf_lb = pd.DataFrame({'value': []})
+    # Year and subfolders are scanned concurrently; the Falscher/Befund/Laufzettel
+    # filters are applied while scanning and unchanged directories come from the index.
+    # Each path is parsed once into year, subfolder, file, Blutbuch_Nummer and report
+    # type; the parsed metadata is kept in the index as well
+    file_index = load_file_index(file_index_path)
+    if file_io is not None:
+        found_reports = asyncio.run(scan_report_pdfs_async(network_root, file_index, file_io))
     else:
-        pdf_lb = pd.DataFrame({'value': [str(f) for f in pdf_lb]})
-        
-except Exception as e:
-    print(f"Error accessing network path: {e}")
-    print("Creating empty DataFrame to continue script execution...")
-    pdf_lb = pd.DataFrame({'value': []})
+        found_reports = iter_report_pdfs(network_root, file_index)
+    pdf_reports = report_metadata_table(found_reports, network_root, file_index)
+    save_file_index(file_index_path, file_index)
 
-# Process PDF file paths
-def get_subfolder_and_file(path):
-    match = re.sub(r"//10.28.149.154/hum/HGDiag/Befunde/Nephro/20[0-9][0-9]/", "", path)
-    return match
+    logger.info(f"Total PDF report files found: {len(pdf_reports)}")
 
-pdf_reports = pdf_lb.copy()
+    if len(pdf_reports) == 0:
+        logger.warning("Warning: No PDF files found. This might be due to network access issues.")
+    else:
+        report_index.sync_reports(pdf_reports)
+        scan_completed = True
 
-if len(pdf_reports) > 0:
-    pdf_reports['subfolder_and_file'] = pdf_reports['value'].apply(get_subfolder_and_file)
-    pdf_reports = pdf_reports[~pdf_reports['subfolder_and_file'].str.contains("Falscher", na=False)]
-    pdf_reports[['subfolder', 'file']] = pdf_reports['subfolder_and_file'].str.split("/", 1, expand=True)
-    pdf_reports['Blutbuch_Nummer'] = pdf_reports['subfolder'].str.replace(r"[_| ].+", "", regex=True)
-    pdf_reports = pdf_reports[pdf_reports['file'].str.contains("[Bb]efund", na=False)]
-    pdf_reports = pdf_reports[~pdf_reports['file'].str.contains("Laufzettel", na=False)]
-    print(f"Processed PDF reports: {len(pdf_reports)} files")
-else:
-    print("No PDF files to process")
-    # Create empty DataFrame with required columns
-    pdf_reports = pd.DataFrame(columns=['value', 'subfolder_and_file', 'subfolder', 'file', 'Blutbuch_Nummer'])
+except IncompleteScanError as e:
+    # The listings that were read are still valid; the reports are not complete
+    save_file_index(file_index_path, file_index)
+    logger.error(f"Scan of the network path incomplete, the report index is not updated: {e}")
+except Exception as e:
+    logger.error(f"Error accessing network path: {e}")
+
+if not scan_completed:
+    logger.warning(f"⚠ Using the report index of the last completed scan "
+                   f"({report_index.last_scan_time() or 'never scanned'}); it may be out of date, "
+                   f"so no reports are transferred in this run")
 
 # Load Excel files
 try:
-    Einsender_charite_fixed = pd.read_excel("data/Einsender_charite.fixed.xlsx")
-    print("Loaded Einsender_charite_fixed successfully")
+    Einsender_charite_fixed = read_excel_cached("data/Einsender_charite.fixed.xlsx")
+    logger.info("Loaded Einsender_charite_fixed successfully")
 except FileNotFoundError:
-    print("Warning: Einsender_charite.fixed.xlsx not found, creating empty DataFrame")
+    logger.warning("Warning: Einsender_charite.fixed.xlsx not found, creating empty DataFrame")
     Einsender_charite_fixed = pd.DataFrame()
 
 try:
-    Sub_panel_fixed = pd.read_excel("data/Sub_panel.fixed.xlsx")
-    print("Loaded Sub_panel_fixed successfully")
+    Sub_panel_fixed = read_excel_cached("data/Sub_panel.fixed.xlsx")
+    logger.info("Loaded Sub_panel_fixed successfully")
 except FileNotFoundError:
-    print("Warning: Sub_panel.fixed.xlsx not found, creating empty DataFrame")
+    logger.warning("Warning: Sub_panel.fixed.xlsx not found, creating empty DataFrame")
     Sub_panel_fixed = pd.DataFrame()
 
 try:
-    Uebersicht_Nierenfaelle = pd.read_excel(r"H:\HGDiag\Befunde\Nephro\Übersicht_Nierenfälle.xlsx", dtype=str)
-    print("Loaded Uebersicht_Nierenfaelle successfully")
-    print(f"Shape: {Uebersicht_Nierenfaelle.shape}")
-    print(f"Columns: {list(Uebersicht_Nierenfaelle.columns)}")
+    Uebersicht_Nierenfaelle = read_excel_cached(r"H:\HGDiag\Befunde\Nephro\Übersicht_Nierenfälle.xlsx", dtype=str)
+    logger.info("Loaded Uebersicht_Nierenfaelle successfully")
+    logger.info(f"Shape: {Uebersicht_Nierenfaelle.shape}")
+    logger.debug(f"Columns: {list(Uebersicht_Nierenfaelle.columns)}")
 except FileNotFoundError:
-    print("Error: Uebersicht_Nierenfälle.xlsx not found at H:/HGDiag/Befunde/Nephro/")
+    logger.error("Error: Uebersicht_Nierenfälle.xlsx not found at H:/HGDiag/Befunde/Nephro/")
     exit(1)
 except Exception as e:
-    print(f"Error loading Excel file: {e}")
+    logger.error(f"Error loading Excel file: {e}")
     exit(1)
 
 # Fill down columns
@@ -111,99 +153,22 @@ columns_to_keep = {
 Uebersicht_Nierenfaelle = Uebersicht_Nierenfaelle[list(columns_to_keep.keys())]
 Uebersicht_Nierenfaelle = Uebersicht_Nierenfaelle.rename(columns=columns_to_keep)
 
-# Data cleaning and recoding
-def recode_datatransfer(x):
-    return "yes" if x in ["X", "x"] else "no"
-
-def recode_befunder(x):
-    if x in ["Johannes", "Johannes/Angela", "Grünhagen ablegen validieren", "in Arbeit Grünhagen", "Privat KVA erstellt am 13.12", "Grünhangen"]:
-        return "Grünhagen"
-    elif x in ["Angela/ Johannes", "Angela/Johannes", "Angela", "Abad/Grünhagen", "Privat KVA erstellt am 13.12."]:
-        return "Abad"
-    else:
-        return x
-
-def recode_einsender(x):
-    mapping = {
-        "Bachmann": "Bachmann Charité",
-        "Bachmann / Weber / Seelow": "Bachmann Charité",
-        "Canaan-Kühl": "Canaan-Kühl Charité",
-        "Grün Charité MVZ, gehört zum Cerkid": "Grün Charité",
-        "Hawkins": "Hawkins Charité",
-        "Liefeldt Charite": "Liefeldt Charité",
-        "Rehfeldt Charié": "Rehfeldt Charité",
-        "Schreiber Charié": "Schreiber Charité",
-        "Schreiber": "Schreiber Charité",
-        "Ulrike Weber": "Weber Charité",
-        "Weber": "Weber Charité",
-        "Ulrike Weber AGZ Charité": "Weber Charité",
-        "Zöllner MVZ der Charité": "Zöllner Charité",
-        "ZukunftCharité": "Zukunft Charité",
-        "Berns Charité Station 32i": "Berns Charité",
-        "Sima Charité": "Canaan-Kühl Charité",
-        "Otto Charité": "Grün (ehem. Otto) Charité"
-    }
-    return mapping.get(x, x)
-
-def recode_outcome(row):
-    bemerkung = row['Bemerkung']
-    gen = row['Gen']
-    if pd.isna(bemerkung) and not pd.isna(gen):
-        return "positiv"
-    if pd.isna(bemerkung) and pd.isna(gen):
-        return "in_process"
-    if isinstance(bemerkung, str):
-        if re.search("negativ|neagiv|neagtiv", bemerkung):
-            return "negativ"
-        if re.search("positiv|Deletion COL4A4", bemerkung):
-            return "positiv"
-    return bemerkung
-
-def recode_klassifizierung(row):
-    k = row['Klassifizierung']
-    cDNA = row['cDNA']
-    gen = row['Gen']
-    if k in ["Klasse II (Risiko-Poly)", "Klasse II, Risk Factor"]:
-        return "Risk factor"
-    if k in ["Klasse III", "Klasse III-IV", "Klasse III (heiß)", "Klasse III (kalt)", "Klasse III funct. Poly", "Klasse IIII", "Klasse III-II"]:
-        return "VUS"
-    if k in ["Klasse IV", "Klasse IV - V", "Klasse IV - V?", "KlasseIV"]:
-        return "Likely pathogenic"
-    if k == "Klasse V":
-        return "Pathogenic"
-    if pd.isna(k) and cDNA == "c.4523-1G>A":
-        return "Likely pathogenic"
-    if pd.isna(k) and cDNA in ["CFHR1 und CFHR3", "c.9661dup"]:
-        return "Risk factor"
-    if pd.isna(k) and cDNA == "c.110A>C":
-        return "VUS"
-    if pd.isna(k) and gen == "HBA1/HBA2 Cluster Deletion berichtet":
-        return "VUS"
-    if pd.isna(k) and cDNA == "c.647C>T hom":
-        return "Likely pathogenic"
-    return k
-
-def recode_gen(x):
-    mapping = {
-        "CCDC41(CEP83)": "CEP83",
-        "CFHR1 CFHR3 homozygote Deletion": "CFHR1",
-        "CFHR1 und CFHR3": "CFHR1",
-        "Deletion homozygot": "CFHR1",
-        "HBA1/HBA2 Cluster Deletion berichtet": "HBA1",
-        "MT-ND5 (nicht bestätigt!)": "MT-ND5",
-        "negativ": "",
-        "SCNN1G [Ex2]": "SCNN1G"
-    }
-    return mapping.get(x, x)
-
-Uebersicht_Nierenfaelle['Datatransfer'] = Uebersicht_Nierenfaelle['Datatransfer'].apply(recode_datatransfer)
-Uebersicht_Nierenfaelle['Befunder'] = Uebersicht_Nierenfaelle['Befunder'].apply(recode_befunder)
-Uebersicht_Nierenfaelle['Einsender'] = Uebersicht_Nierenfaelle['Einsender'].apply(recode_einsender)
-Uebersicht_Nierenfaelle['Outcome'] = Uebersicht_Nierenfaelle.apply(recode_outcome, axis=1)
-Uebersicht_Nierenfaelle['Klassifizierung'] = Uebersicht_Nierenfaelle.apply(recode_klassifizierung, axis=1)
-Uebersicht_Nierenfaelle['Gen'] = Uebersicht_Nierenfaelle['Gen'].apply(recode_gen)
+# Data cleaning and recoding: mapping tables and rules from cerkid_recoding in
+# config.json, compiled once and applied to whole columns
+recoding = compile_cerkid_recoding(config["cerkid_recoding"])
+Uebersicht_Nierenfaelle['Datatransfer'] = recode_values(
+    Uebersicht_Nierenfaelle['Datatransfer'], recoding["datatransfer_map"], default=recoding["datatransfer_default"]
+)
+Uebersicht_Nierenfaelle['Befunder'] = recode_values(Uebersicht_Nierenfaelle['Befunder'], recoding["befunder_map"])
+Uebersicht_Nierenfaelle['Einsender'] = recode_values(Uebersicht_Nierenfaelle['Einsender'], recoding["einsender_map"])
+Uebersicht_Nierenfaelle['Outcome'] = recode_outcome(Uebersicht_Nierenfaelle, recoding["outcome_rules"])
+Uebersicht_Nierenfaelle['Klassifizierung'] = recode_klassifizierung(Uebersicht_Nierenfaelle, recoding["klassifizierung_rules"])
+Uebersicht_Nierenfaelle['Gen'] = recode_values(Uebersicht_Nierenfaelle['Gen'], recoding["gen_map"])
 Uebersicht_Nierenfaelle['Gen'] = Uebersicht_Nierenfaelle['Gen'].replace("", np.nan)
 
+# Store low-cardinality columns as categorical for the joins, filters and summary
+to_categorical(Uebersicht_Nierenfaelle, ['Panel_oder_segregation', 'Einsender', 'Befunder', 'Gen', 'Klassifizierung'])
+
 # Join with curated tables
 Uebersicht_Nierenfaelle_join = Uebersicht_Nierenfaelle.merge(Einsender_charite_fixed, on="Einsender", how="left")
 Uebersicht_Nierenfaelle_join = Uebersicht_Nierenfaelle_join.merge(Sub_panel_fixed, on="Sub_panel", how="left")
@@ -221,18 +186,14 @@ Uebersicht_Nierenfaelle_filtered = Uebersicht_Nierenfaelle_join[
 
 # Summarize the table
 group_cols = ['Geschlecht', 'Blutbuch_nummer']
-agg_dict = {
-    'Einsender': lambda x: " | ".join(x.unique()),
-    'Eingang': 'max',
-    'Sub_panel': lambda x: " | ".join(x.unique()),
-    'Standort': lambda x: " | ".join(x.unique()),
-    'Datatransfer': lambda x: " | ".join(x.unique()),
-    'Befunder': lambda x: " | ".join(x.unique()),
-    'Gen': lambda x: " | ".join(x.unique()),
-    'Outcome': 'max',
-    'Klassifizierung': lambda x: " | ".join(x.unique())
-}
-Uebersicht_Nierenfaelle_filtered_summarized = Uebersicht_Nierenfaelle_filtered.groupby(group_cols).agg(agg_dict).reset_index()
+joined_cols = ['Einsender', 'Sub_panel', 'Standort', 'Datatransfer', 'Befunder', 'Gen', 'Klassifizierung']
+# Distinct values per case joined with " | " (missing values skipped), latest Eingang and Outcome
+Uebersicht_Nierenfaelle_filtered_summarized = join_unique_per_group(
+    Uebersicht_Nierenfaelle_filtered, group_cols, joined_cols
+).join(max_per_group(Uebersicht_Nierenfaelle_filtered, group_cols, ['Eingang', 'Outcome']))
+Uebersicht_Nierenfaelle_filtered_summarized = Uebersicht_Nierenfaelle_filtered_summarized[
+    ['Einsender', 'Eingang', 'Sub_panel', 'Standort', 'Datatransfer', 'Befunder', 'Gen', 'Outcome', 'Klassifizierung']
+].reset_index()
 Uebersicht_Nierenfaelle_filtered_summarized['Panels_requested_count'] = Uebersicht_Nierenfaelle_filtered_summarized['Sub_panel'].str.count("; ") + 1
 Uebersicht_Nierenfaelle_filtered_summarized['Panels_requested'] = np.where(
     Uebersicht_Nierenfaelle_filtered_summarized['Panels_requested_count'] > 1, "multiple", "single"
@@ -243,21 +204,52 @@ Uebersicht_Nierenfaelle_filtered_summarized_afterKUE = Uebersicht_Nierenfaelle_f
     Uebersicht_Nierenfaelle_filtered_summarized['Eingang'] >= '2022-01-01'
 ][['Blutbuch_nummer']]
 
-# Filter PDF table for transfer
-pdf_reports_for_transfer = pdf_reports[
-    pdf_reports['Blutbuch_Nummer'].isin(Uebersicht_Nierenfaelle_filtered_summarized_afterKUE['Blutbuch_nummer'])
-]
-
-# Copy files
-def copy_file(row):
-    try:
-        dest = r"S:/C13/CeRKiD/Daten/CeRKiD_Genetik Befunde"
-        shutil.copy(row['value'], dest)
-        return True
-    except Exception as e:
-        return False
+# Reports of the selected cases from the report index (an index lookup per case)
+eligible_cases = pd.unique(
+    Uebersicht_Nierenfaelle_filtered_summarized_afterKUE['Blutbuch_nummer'].dropna().to_numpy(dtype=object)
+)
+report_index.set_eligible_cases(eligible_cases)
+pdf_reports_for_transfer = report_index.reports_for_cases(eligible_cases)
+cases_without_report = report_index.eligible_cases_without_reports()
+logger.info(f"✓ Reports for transfer: {len(pdf_reports_for_transfer)} "
+            f"({pdf_reports_for_transfer['Blutbuch_Nummer'].nunique()} cases matched, "
+            f"{len(cases_without_report)} cases without a report)")
 
-pdf_reports_for_transfer['transfered'] = pdf_reports_for_transfer.apply(copy_file, axis=1)
+# Copy files concurrently, skipping identical files and resuming from the manifest
+transfer_destination = r"S:/C13/CeRKiD/Daten/CeRKiD_Genetik Befunde"
+transfer_manifest_path = "state/cerkid_transfer_manifest.jsonl"
+if not scan_completed:
+    # Indexed rows are not checked against the live files, so nothing is copied from them
+    transfer_outcomes = {
+        source: {"source": source, "dest": None, "status": "failed", "size": 0, "bytes_copied": 0,
+                 "reason": "not transferred, the share could not be scanned"}
+        for source in pdf_reports_for_transfer['value']
+    }
+    if file_io is not None:
+        file_io.close()
+elif file_io is not None:
+    transfer_outcomes = asyncio.run(transfer_files_async(
+        pdf_reports_for_transfer['value'], transfer_destination, file_io, manifest_path=transfer_manifest_path
+    ))
+    if file_io.retried:
+        logger.info(f"Network operations retried: {file_io.retried}")
+    file_io.close()
+else:
+    transfer_outcomes = transfer_files(
+        pdf_reports_for_transfer['value'], transfer_destination, manifest_path=transfer_manifest_path
+    )
+pdf_reports_for_transfer['transfered'] = pdf_reports_for_transfer['value'].map(
+    lambda source: format_outcome(transfer_outcomes[source])
+)
+pdf_reports_for_transfer['bytes_transfered'] = pdf_reports_for_transfer['value'].map(
+    lambda source: transfer_outcomes[source]['bytes_copied']
+)
+if scan_completed:
+    report_index.record_transfers(transfer_outcomes.values())
+report_index.close()
+transfer_status_counts = pd.Series([outcome['status'] for outcome in transfer_outcomes.values()]).value_counts()
+logger.info(f"Transfer finished: {transfer_status_counts.get('copied', 0)} copied, "
+            f"{transfer_status_counts.get('skipped', 0)} skipped, {transfer_status_counts.get('failed', 0)} failed")
 
 # Creation date
 creation_date = datetime.utcnow().strftime("%Y-%m-%d")
@@ -265,7 +257,8 @@ creation_date = datetime.utcnow().strftime("%Y-%m-%d")
 # Create summary table
 pdf_reports_for_transferd_summarized = pdf_reports_for_transfer.groupby('Blutbuch_Nummer').agg({
     'value': lambda x: "; ".join(x),
-    'transfered': lambda x: "; ".join(map(str, x))
+    'transfered': lambda x: "; ".join(map(str, x)),
+    'bytes_transfered': 'sum'
 }).reset_index()
 pdf_reports_for_transferd_summarized['date_tranfered'] = creation_date
 
@@ -273,4 +266,4 @@ pdf_reports_for_transferd_summarized['date_tranfered'] = creation_date
 output_path = f"results/pdf_reports_for_transferd_summarized.{creation_date}.csv"
 pdf_reports_for_transferd_summarized.to_csv(output_path, index=False, na_rep="NULL")
 
-print(f"Script completed successfully! Output saved to: {output_path}")
+logger.info(f"Script completed successfully! Output saved to: {output_path}")
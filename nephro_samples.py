@@ -0,0 +1,167 @@
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from nephro_cache import file_content_hash
+from nephro_workbook import read_excel_columns
+
+CACHE_VERSION = 1
+
+DEFAULT_SAMPLE_LIST_SETTINGS = {
+    "cache_directory": ".cache/sample_lists",
+    # Column names the Blutbuch-Nummer can have in an external list, by priority
+    "id_columns": ["Blutbuch-Nummer", "Blutbuch_nummer", "Blutbuch-Nr", "Blutbuch Nr", "BlutbuchNummer"],
+    "lists": [],
+}
+
+
+def sample_list_settings(config):
+    """
+    Merge the "sample_lists" section of config.json with the defaults.
+    """
+    merged = dict(DEFAULT_SAMPLE_LIST_SETTINGS)
+    merged.update(config.get("sample_lists", {}))
+    return merged
+
+
+def resolve_list_path(pattern):
+    """
+    Newest file matching a path or glob pattern. Dated file names sort by
+    date, so "Samples_*.xlsx" picks the latest export. Returns the pattern
+    itself if nothing matches.
+    """
+    matches = sorted(glob.glob(pattern))
+    return matches[-1] if matches else pattern
+
+
+def normalize_ids(values):
+    """
+    Unique sample IDs as stripped strings, without missing values.
+    """
+    ids = pd.Series(values, dtype=object).dropna().astype(str).str.strip()
+    return pd.unique(ids[ids != ''].to_numpy(dtype=object))
+
+
+def read_sample_ids(path, id_columns):
+    """
+    Read the first of id_columns present in an .xlsx or .csv sample list.
+    Returns (column, normalized IDs); column is None if none of the columns
+    exists.
+    """
+    if path.lower().endswith(".csv"):
+        wanted = set(id_columns)
+        df = pd.read_csv(path, dtype=str, usecols=lambda name: name in wanted)
+    else:
+        df = read_excel_columns(path, id_columns)
+    for column in id_columns:
+        if column in df.columns:
+            return column, normalize_ids(df[column])
+    return None, np.array([], dtype=object)
+
+
+def match_ids(values, ids):
+    """
+    Vectorized membership join of values against a set of IDs.
+
+    ids is hashed once into a pd.Index and all values are looked up with a
+    single get_indexer call. Returns the boolean row mask and a report with
+    the distinct values that matched ("matched"), those not in ids
+    ("unmatched") and the IDs no value refers to ("not_found").
+    """
+    if not (isinstance(ids, pd.Index) and ids.is_unique):
+        ids = pd.Index(pd.unique(np.asarray(ids, dtype=object)), dtype=object)
+    ids_index = ids
+    values = pd.Series(values)
+    mask = ids_index.get_indexer(values.to_numpy(dtype=object)) >= 0
+
+    distinct = pd.Index(pd.unique(values[values.notna()].to_numpy(dtype=object)))
+    distinct_found = ids_index.get_indexer(distinct) >= 0
+    report = {
+        "matched": distinct[distinct_found].to_numpy(),
+        "unmatched": distinct[~distinct_found].to_numpy(),
+        "not_found": ids_index[distinct.get_indexer(ids_index) < 0].to_numpy(),
+    }
+    return mask, report
+
+
+def _read_cached_ids(cache_file):
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached_ids = json.load(f)
+        return cached_ids if "column" in cached_ids and "ids" in cached_ids else None
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_cached_ids(cache_file, cached_ids):
+    os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+    tmp_path = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cached_ids, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_file)
+
+
+class SampleRegistry:
+    """
+    External sample lists configured in config.json ("sample_lists").
+
+    Each list is read once: the normalized ID set is cached on disk under
+    the SHA-256 of the file contents, so an unchanged list is never parsed
+    again, and kept in memory for the lifetime of the registry. With
+    use_cache=False the disk cache is neither read nor written.
+    """
+
+    def __init__(self, config, use_cache=True):
+        settings = sample_list_settings(config)
+        self.lists = settings["lists"]
+        self.id_columns = settings["id_columns"]
+        self.cache_directory = settings["cache_directory"]
+        self.use_cache = use_cache
+        self._loaded = {}
+
+    def _cache_key(self, content_hash, id_columns):
+        key_source = json.dumps({"version": CACHE_VERSION, "content_hash": content_hash, "id_columns": id_columns})
+        return hashlib.sha256(key_source.encode('utf-8')).hexdigest()[:32]
+
+    def load_list(self, sample_list):
+        """
+        Load one configured list ({"name", "path", optional "id_columns"}).
+        Returns a dict with name, path, column (None if no ID column was
+        found), ids (pd.Index) and cached (True if the file was not parsed).
+        Raises FileNotFoundError if the list does not exist.
+        """
+        path = resolve_list_path(sample_list["path"])
+        id_columns = sample_list.get("id_columns", self.id_columns)
+        key = self._cache_key(file_content_hash(path), id_columns)
+        if key in self._loaded:
+            return dict(self._loaded[key], cached=True)
+
+        cache_file = os.path.join(self.cache_directory, key + ".json")
+        cached_ids = _read_cached_ids(cache_file) if self.use_cache else None
+        cached = cached_ids is not None
+        if cached:
+            column, ids = cached_ids["column"], np.array(cached_ids["ids"], dtype=object)
+        else:
+            column, ids = read_sample_ids(path, id_columns)
+            if self.use_cache:
+                _write_cached_ids(cache_file, {"path": os.path.abspath(path), "column": column, "ids": list(ids)})
+
+        entry = {
+            "name": sample_list.get("name", os.path.basename(path)),
+            "path": path,
+            "column": column,
+            "ids": pd.Index(ids, dtype=object),
+        }
+        self._loaded[key] = entry
+        return dict(entry, cached=cached)
+
+    def union(self, entries):
+        """
+        Union of the ID sets of loaded lists as one pd.Index.
+        """
+        arrays = [entry["ids"].to_numpy() for entry in entries]
+        return pd.Index(pd.unique(np.concatenate(arrays)) if arrays else [], dtype=object)
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+
+def ffill_from(series, carry=None):
+    """
+    Forward fill series, continuing from carry (the last value of the
+    previous chunk) for the leading missing values.
+    """
+    series = series.ffill()
+    if carry is None or pd.isna(carry) or not series.isna().any():
+        return series
+    if isinstance(series.dtype, pd.CategoricalDtype) and carry not in series.cat.categories:
+        series = series.cat.add_categories([carry])
+    return series.fillna(carry)
+
+
+def last_value(series, previous=None):
+    """
+    Last non-missing value of series, or previous if there is none.
+    """
+    index = series.last_valid_index()
+    return previous if index is None else series.loc[index]
+
+
+def split_trailing_block(df, group_col):
+    """
+    Split df before the trailing run of rows that share the group value of
+    the last row. Returns (complete rows, trailing rows): the trailing
+    block may continue in the next chunk, so it is held back until then.
+    """
+    if df.empty:
+        return df, df
+    keys = df[group_col].to_numpy(dtype=object)
+    last = keys[-1]
+    same = pd.isna(keys) if pd.isna(last) else keys == last
+    different = np.flatnonzero(~same)
+    start = different[-1] + 1 if len(different) else 0
+    return df.iloc[:start], df.iloc[start:]
+
+
+# Key of the second row hash (hash_pandas_object takes 16 characters)
+SECOND_HASH_KEY = "nephro_seenrows2"
+
+
+def row_digests(df):
+    """
+    128-bit digest per row as two arrays of 64-bit hash_pandas_object
+    hashes with different keys. pandas hashes only text with the key, so
+    the second hash runs over the text form of the other columns (built
+    from their distinct values). Categorical and object columns with the
+    same values give the same digest.
+    """
+    first = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    as_text = {}
+    for column in df.columns:
+        values = df[column]
+        if values.dtype != object and not isinstance(values.dtype, pd.CategoricalDtype):
+            codes, uniques = pd.factorize(values)
+            values = pd.Categorical.from_codes(codes, categories=np.asarray(uniques).astype(str))
+        as_text[column] = values
+    second = pd.util.hash_pandas_object(pd.DataFrame(as_text, index=df.index), index=False,
+                                        hash_key=SECOND_HASH_KEY).to_numpy()
+    return first, second
+
+
+class SeenRows:
+    """
+    Row digests of everything written so far, to drop duplicates across
+    chunks. Keeps 16 bytes per distinct row (see row_digests) instead of
+    the rows themselves, and keeps the first occurrence like
+    drop_duplicates(). Two different rows are only taken for the same if
+    both 64-bit hashes collide, a chance of about 2**-128 per pair.
+    """
+
+    def __init__(self):
+        # Sorted first hashes, and the second hashes in the same order
+        self._first = np.array([], dtype=np.uint64)
+        self._second = np.array([], dtype=np.uint64)
+
+    def __len__(self):
+        return len(self._first)
+
+    def _seen(self, first, second):
+        left = np.searchsorted(self._first, first, side='left')
+        right = np.searchsorted(self._first, first, side='right')
+        seen = np.zeros(len(first), dtype=bool)
+        single = right - left == 1
+        seen[single] = self._second[left[single]] == second[single]
+        # Stored rows sharing a first hash (a 64-bit collision) are compared one by one
+        for row in np.flatnonzero(right - left > 1):
+            seen[row] = (self._second[left[row]:right[row]] == second[row]).any()
+        return seen
+
+    def new_rows(self, df):
+        """
+        Rows of df not seen before (and not repeated within df); their
+        digests are remembered.
+        """
+        if df.empty:
+            return df
+        first, second = row_digests(df)
+        keep = ~pd.DataFrame({'first': first, 'second': second}).duplicated().to_numpy()
+        if len(self._first):
+            keep &= ~self._seen(first, second)
+        first = np.concatenate([self._first, first[keep]])
+        second = np.concatenate([self._second, second[keep]])
+        order = np.argsort(first, kind='stable')
+        self._first, self._second = first[order], second[order]
+        return df[keep]
@@ -0,0 +1,327 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+COMPLETED_STATUSES = ("copied", "skipped")
+
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    """
+    SHA-256 of the file contents, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_path):
+    """
+    Read the transfer manifest (one JSON object per line) and return the
+    latest entry per source path. Incomplete trailing lines from an
+    interrupted run are ignored.
+    """
+    entries = {}
+    if not manifest_path or not os.path.exists(manifest_path):
+        return entries
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[entry["source"]] = entry
+    return entries
+
+
+def _compact_manifest(manifest_path, entries):
+    with open(manifest_path + ".tmp", 'w', encoding='utf-8') as f:
+        for entry in entries.values():
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def copy_via_partial(source, dest):
+    """
+    Copy source with its metadata to a temporary file next to dest and
+    rename it to dest. The temporary name is unique per call, so concurrent
+    or retried copies to the same destination never write the same file,
+    and an interrupted copy never leaves a partial file under the final
+    name.
+    """
+    partial = f"{dest}.{uuid.uuid4().hex}.part"
+    try:
+        shutil.copy2(source, partial)
+        os.replace(partial, dest)
+    except BaseException:
+        try:
+            os.remove(partial)
+        except OSError:
+            pass
+        raise
+
+
+def destination_names(sources, previous=None):
+    """
+    Candidate file names in the destination folder for every source, unique
+    case-insensitively (as on the Windows destination share). Reports of
+    different cases are often all called "Befund.pdf", so:
+
+    - a source keeps the name the manifest (previous, see load_manifest)
+      records for its last completed transfer,
+    - a source whose file name no other source of this run has and no other
+      source has in the manifest gets it, with the prefixed name below as
+      a second candidate in case a different file already has that name,
+    - all other sources get the name of their folder (the case folder) in
+      front of their file name, with " (2)", " (3)", ... added if that is
+      taken as well.
+
+    Returns a dict source -> list of file names (see copy_one).
+    """
+    previous = previous or {}
+    names = {}
+    taken = set()
+    claimed = {}
+    for source, entry in previous.items():
+        if entry.get("status") in COMPLETED_STATUSES and entry.get("dest"):
+            taken.add(os.path.basename(entry["dest"]).lower())
+            claimed.setdefault(os.path.basename(entry["dest"]).lower(), source)
+    for source in sources:
+        entry = previous.get(source)
+        # Manifests of older runs may record one name for several sources
+        if (entry is not None and entry.get("status") in COMPLETED_STATUSES and entry.get("dest")
+                and claimed[os.path.basename(entry["dest"]).lower()] == source):
+            names[source] = [os.path.basename(entry["dest"])]
+
+    def prefixed_name(source):
+        folder = os.path.basename(os.path.dirname(source))
+        stem, extension = os.path.splitext(os.path.basename(source))
+        name = f"{folder}_{stem}{extension}"
+        number = 1
+        while name.lower() in taken:
+            number += 1
+            name = f"{folder}_{stem} ({number}){extension}"
+        taken.add(name.lower())
+        return name
+
+    new_sources = [source for source in sources if source not in names]
+    name_counts = {}
+    for source in new_sources:
+        name = os.path.basename(source).lower()
+        name_counts[name] = name_counts.get(name, 0) + 1
+    for source in new_sources:
+        name = os.path.basename(source)
+        if name_counts[name.lower()] == 1 and name.lower() not in taken:
+            taken.add(name.lower())
+            names[source] = [name]
+    for source in new_sources:
+        names.setdefault(source, []).append(prefixed_name(source))
+    return names
+
+
+def _is_identical(source, dest, source_stat):
+    """
+    Destination counts as identical if size and mtime match, or if the size
+    matches and the checksums are equal. In the latter case the destination
+    mtime is aligned, so the next run can skip the checksum.
+    """
+    try:
+        dest_stat = os.stat(dest)
+    except FileNotFoundError:
+        return False
+    if dest_stat.st_size != source_stat.st_size:
+        return False
+    if dest_stat.st_mtime_ns == source_stat.st_mtime_ns:
+        return True
+    if file_checksum(source) != file_checksum(dest):
+        return False
+    os.utime(dest, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+    return True
+
+
+def copy_one(source, dest_dir, previous=None, dest_names=None):
+    """
+    Copy source into dest_dir unless an identical file is already there.
+    dest_names are the candidate file names (default: the source file name,
+    see destination_names): a candidate that holds a different file is
+    passed over for the next one, the last one is always used. The copy is
+    written to a temporary name and renamed, so an interrupted copy never
+    leaves a partial file under the final name.
+
+    Returns an outcome dict with status ("copied", "skipped" or "failed"),
+    size, bytes_copied and reason.
+    """
+    dest_names = dest_names or [os.path.basename(source)]
+    outcome = {"source": source, "dest": os.path.join(dest_dir, dest_names[0]), "status": "failed", "size": 0,
+               "bytes_copied": 0, "reason": ""}
+    try:
+        source_stat = os.stat(source)
+        outcome.update(size=source_stat.st_size, mtime_ns=source_stat.st_mtime_ns)
+
+        for number, name in enumerate(dest_names, start=1):
+            dest = outcome["dest"] = os.path.join(dest_dir, name)
+            if (previous is not None and previous["status"] in COMPLETED_STATUSES
+                    and previous.get("mtime_ns") == source_stat.st_mtime_ns
+                    and previous.get("size") == source_stat.st_size
+                    and os.path.exists(dest) and os.path.getsize(dest) == source_stat.st_size):
+                outcome.update(status="skipped", reason="already transferred")
+            elif _is_identical(source, dest, source_stat):
+                outcome.update(status="skipped", reason="identical file exists")
+            elif number < len(dest_names) and os.path.exists(dest):
+                continue
+            else:
+                copy_via_partial(source, dest)
+                outcome.update(status="copied", bytes_copied=source_stat.st_size)
+            break
+    except Exception as e:
+        outcome["reason"] = f"{type(e).__name__}: {e}"
+    return outcome
+
+
+def transfer_files(sources, dest_dir, manifest_path=None, max_workers=8):
+    """
+    Copy files into dest_dir with a bounded thread pool.
+
+    Every source gets its own destination file name (see
+    destination_names), so reports with the same file name from different
+    case folders do not overwrite each other. Every outcome is appended
+    to the manifest as soon as it is known, so an interrupted run resumes
+    where it stopped: files the manifest records as transferred (with
+    unchanged size and mtime) are not compared again.
+    Returns a dict source -> outcome dict (see copy_one).
+    """
+    previous = load_manifest(manifest_path)
+    if manifest_path:
+        os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+        _compact_manifest(manifest_path, previous)
+
+    outcomes = {}
+    lock = threading.Lock()
+    manifest = open(manifest_path, 'a', encoding='utf-8') if manifest_path else None
+
+    def record(outcome):
+        outcome["time"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with lock:
+            outcomes[outcome["source"]] = outcome
+            if manifest is not None:
+                manifest.write(json.dumps(outcome, ensure_ascii=False) + "\n")
+                manifest.flush()
+                os.fsync(manifest.fileno())
+
+    sources = list(dict.fromkeys(sources))
+    names = destination_names(sources, previous)
+
+    def run(source):
+        record(copy_one(source, dest_dir, previous.get(source), names[source]))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(run, sources))
+    finally:
+        if manifest is not None:
+            manifest.close()
+    return outcomes
+
+
+async def copy_one_async(source, dest_dir, file_io, previous=None, dest_names=None):
+    """
+    copy_one with the operations of an nephro_async_io.AsyncFileIO, so the
+    round trips of many files overlap. Same decisions and outcome dict.
+    """
+    dest_names = dest_names or [os.path.basename(source)]
+    outcome = {"source": source, "dest": os.path.join(dest_dir, dest_names[0]), "status": "failed", "size": 0,
+               "bytes_copied": 0, "reason": ""}
+    try:
+        source_stat = await file_io.stat(source)
+        outcome.update(size=source_stat.st_size, mtime_ns=source_stat.st_mtime_ns)
+        for number, name in enumerate(dest_names, start=1):
+            dest = outcome["dest"] = os.path.join(dest_dir, name)
+            try:
+                dest_stat = await file_io.stat(dest)
+            except FileNotFoundError:
+                dest_stat = None
+
+            if dest_stat is None or dest_stat.st_size != source_stat.st_size:
+                identical = False
+            elif (previous is not None and previous["status"] in COMPLETED_STATUSES
+                    and previous.get("mtime_ns") == source_stat.st_mtime_ns
+                    and previous.get("size") == source_stat.st_size):
+                outcome.update(status="skipped", reason="already transferred")
+                return outcome
+            elif dest_stat.st_mtime_ns == source_stat.st_mtime_ns:
+                identical = True
+            else:
+                source_checksum, dest_checksum = await asyncio.gather(file_io.checksum(source),
+                                                                      file_io.checksum(dest))
+                identical = source_checksum == dest_checksum
+                if identical:
+                    await file_io.set_mtime(dest, source_stat.st_atime_ns, source_stat.st_mtime_ns)
+
+            if identical:
+                outcome.update(status="skipped", reason="identical file exists")
+            elif number < len(dest_names) and dest_stat is not None:
+                continue
+            else:
+                await file_io.copy(source, dest)
+                outcome.update(status="copied", bytes_copied=source_stat.st_size)
+            break
+    except Exception as e:
+        outcome["reason"] = f"{type(e).__name__}: {e}"
+    return outcome
+
+
+async def transfer_files_async(sources, dest_dir, file_io, manifest_path=None):
+    """
+    transfer_files on an nephro_async_io.AsyncFileIO: all files are started
+    at once and the I/O layer limits how many operations are in flight, with
+    timeouts and retries. Destination file names are chosen like in
+    transfer_files (see destination_names). Outcomes are appended to the
+    same manifest as soon as they are known. Returns a dict source ->
+    outcome dict.
+    """
+    previous = load_manifest(manifest_path)
+    if manifest_path:
+        os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+        _compact_manifest(manifest_path, previous)
+
+    outcomes = {}
+    manifest = open(manifest_path, 'a', encoding='utf-8') if manifest_path else None
+
+    def record(outcome):
+        outcome["time"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        outcomes[outcome["source"]] = outcome
+        if manifest is not None:
+            manifest.write(json.dumps(outcome, ensure_ascii=False) + "\n")
+            manifest.flush()
+            os.fsync(manifest.fileno())
+
+    sources = list(dict.fromkeys(sources))
+    names = destination_names(sources, previous)
+
+    async def run(source):
+        record(await copy_one_async(source, dest_dir, file_io, previous.get(source), names[source]))
+
+    try:
+        await asyncio.gather(*(run(source) for source in sources))
+    finally:
+        if manifest is not None:
+            manifest.close()
+    return outcomes
+
+
+def format_outcome(outcome):
+    """
+    One-line description of a transfer outcome for the result tables.
+    """
+    if outcome["status"] == "copied":
+        return f"copied ({outcome['bytes_copied']} bytes)"
+    if outcome["status"] == "skipped":
+        return f"skipped, {outcome['reason']} ({outcome['size']} bytes)"
+    return f"failed: {outcome['reason']}"
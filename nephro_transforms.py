@@ -0,0 +1,345 @@
+import re
+
+import pandas as pd
+import numpy as np
+
+
+def _is_text_column(series):
+    """
+    Return True if the column can hold strings (object, string or categorical
+    with string categories).
+    """
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def _result_dtype(dtype):
+    """
+    dtype for a column rebuilt from new values: a categorical column stays
+    categorical, but with the categories of the new values.
+    """
+    return "category" if isinstance(dtype, pd.CategoricalDtype) else dtype
+
+
+def to_categorical(df, columns):
+    """
+    Convert the given text columns of df to pandas Categorical in place.
+    Low-cardinality columns (panel, gene, classification, ...) then store
+    one small integer code per row, and comparisons, ffill, groupby and
+    drop_duplicates work on the codes. Missing columns are skipped.
+    Returns the converted column names.
+    """
+    converted = []
+    for col in columns:
+        if col in df.columns and pd.api.types.is_object_dtype(df[col]):
+            df[col] = df[col].astype("category")
+            converted.append(col)
+    return converted
+
+
+def _normalize_values(series, null_values):
+    """
+    Strip whitespace from an object/string Series and turn null sentinels
+    into NaN. Non-string values are converted with str() first.
+    """
+    stripped = series.str.strip()
+    non_text = stripped.isna() & series.notna()
+    if non_text.any():
+        stripped[non_text] = series[non_text].astype(str).str.strip()
+    return stripped.mask(stripped.isin(null_values))
+
+
+def normalize_text(series, null_values=('nan',)):
+    """
+    Strip leading/trailing whitespace and map the null_values sentinels to
+    NaN in one pass, without the astype(str) round trip that turns real NaN
+    into 'nan' and back.
+
+    Categorical columns are normalized on their categories only; the codes
+    are remapped, so the cost does not depend on the number of rows.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = pd.Series(series.cat.categories, dtype=object)
+        new_codes, new_categories = pd.factorize(_normalize_values(categories, null_values), sort=True)
+        # Code -1 (missing) picks the appended -1
+        codes = np.append(new_codes, -1)[series.cat.codes.to_numpy()]
+        return pd.Series(pd.Categorical.from_codes(codes, categories=new_categories),
+                         index=series.index, name=series.name)
+    if not _is_text_column(series):
+        return series
+    return _normalize_values(series, null_values)
+
+
+def expand_semicolon_rows(df, separator=';'):
+    """
+    Expand rows where cells contain semicolon-separated values.
+    Creates new rows for each combination, matching values by position.
+
+    Works column by column instead of row by row: every cell containing the
+    separator is split with str.split + explode, empty tokens are dropped and
+    the output rows are built with index arithmetic. When the lists in one row
+    differ in length, the shorter lists repeat their last value.
+    """
+    frame = df.reset_index(drop=True)
+    n_rows = len(frame)
+    if n_rows == 0:
+        return frame
+
+    repeats = np.ones(n_rows, dtype=np.int64)
+    split_columns = {}
+
+    for col in frame.columns:
+        column = frame[col]
+        if not _is_text_column(column):
+            continue
+
+        has_separator = column.str.contains(separator, regex=False, na=False).to_numpy(dtype=bool)
+        if not has_separator.any():
+            continue
+
+        # One entry per token, indexed by the position of its source row
+        tokens = column[has_separator].str.split(separator, regex=False).explode().str.strip()
+        tokens = tokens[tokens.str.len() > 0]
+        if tokens.empty:
+            continue
+
+        counts = np.bincount(tokens.index.to_numpy(dtype=np.int64), minlength=n_rows)
+        starts = np.cumsum(counts) - counts
+        split_columns[col] = (tokens.to_numpy(dtype=object), counts, starts)
+        repeats = np.maximum(repeats, counts)
+
+    if not split_columns:
+        return frame
+
+    # Source row and split position for every output row
+    row_index = np.repeat(np.arange(n_rows), repeats)
+    position = np.arange(len(row_index)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+
+    expanded = frame.take(row_index).reset_index(drop=True)
+    for col, (token_values, counts, starts) in split_columns.items():
+        row_counts = counts[row_index]
+        was_split = row_counts > 0
+        # Use the i-th value if available, otherwise the last available value
+        token_index = starts[row_index] + np.minimum(position, row_counts - 1)
+
+        values = expanded[col].to_numpy(dtype=object, copy=True)
+        values[was_split] = token_values[token_index[was_split]]
+        expanded[col] = pd.Series(values, index=expanded.index, dtype=_result_dtype(frame[col].dtype))
+
+    return expanded
+
+
+def compile_value_map(mapping):
+    """
+    Flatten mapping groups in the klassifizierung_mapping layout
+    ({name: {"input_values": [...], "output_value": ...}}) into one
+    input value -> output value dict. The first group listing a value wins.
+    """
+    value_map = {}
+    for group in mapping.values():
+        for input_value in group["input_values"]:
+            value_map.setdefault(input_value, group["output_value"])
+    return value_map
+
+
+def recode_values(series, value_map, default=None):
+    """
+    Replace the values listed in value_map with one Series.map lookup.
+    Other values, including missing ones, are kept unchanged, or set to
+    default if one is given.
+    """
+    values = series.to_numpy(dtype=object)
+    recoded = series.map(value_map).to_numpy(dtype=object)
+    unmapped = pd.isna(recoded)
+    recoded[unmapped] = values[unmapped] if default is None else default
+    dtype = "category" if isinstance(series.dtype, pd.CategoricalDtype) else object
+    return pd.Series(recoded, index=series.index, name=series.name, dtype=dtype)
+
+
+# Special variant rules: condition name -> (column, config key, key holds a list)
+SPECIAL_RULE_CONDITIONS = {
+    "missing_klassifizierung_and_cdna_equals": ("cDNA", "cdna_value", False),
+    "missing_klassifizierung_and_cdna_in": ("cDNA", "cdna_values", True),
+    "missing_klassifizierung_and_gen_equals": ("Gen", "gen_value", False),
+}
+
+
+def compile_klassifizierung_rules(config):
+    """
+    Compile klassifizierung_mapping and special_variant_rules from the config
+    into lookup tables that can be applied to a whole DataFrame at once.
+
+    Returns a dict with a flat input value -> output value mapping (the first
+    class listing a value wins, as in the original linear scan) and the special
+    rules as (column, values, output_value) tuples in config order.
+    """
+    value_map = compile_value_map(config["klassifizierung_mapping"])
+
+    special_rules = []
+    for rule in config.get("special_variant_rules", []):
+        if rule["condition"] not in SPECIAL_RULE_CONDITIONS:
+            continue
+        column, key, is_list = SPECIAL_RULE_CONDITIONS[rule["condition"]]
+        values = rule[key] if is_list else [rule[key]]
+        special_rules.append((column, list(values), rule["output_value"]))
+
+    return {"value_map": value_map, "special_rules": special_rules}
+
+
+def recode_klassifizierung(df, rules):
+    """
+    Recode the Klassifizierung column with compiled rules.
+    Known classifications are looked up with Series.map; rows with a missing
+    classification are matched against the cDNA/Gen rules with np.select.
+    Values matched by no rule are returned unchanged.
+    """
+    klassifizierung = df['Klassifizierung']
+    mapped = klassifizierung.map(rules["value_map"])
+    is_missing = klassifizierung.isna().to_numpy()
+
+    conditions = [mapped.notna().to_numpy()]
+    choices = [mapped.to_numpy(dtype=object)]
+    for column, values, output_value in rules["special_rules"]:
+        if column not in df.columns:
+            continue
+        conditions.append(is_missing & df[column].isin(values).to_numpy())
+        # A 0-d object array is broadcast by np.select; np.full would
+        # create a separate string object for every row
+        choices.append(np.array(output_value, dtype=object))
+
+    recoded = np.select(conditions, choices, default=klassifizierung.to_numpy(dtype=object))
+    return pd.Series(recoded, index=df.index, name='Klassifizierung', dtype=_result_dtype(klassifizierung.dtype))
+
+
+def compile_outcome_rules(config):
+    """
+    Compile outcome_rules (see cerkid_recoding in config.json): the
+    Bemerkung patterns become precompiled regexes, checked in config order.
+    """
+    return {
+        "missing_with_gen": config["missing_bemerkung_with_gen"],
+        "missing_without_gen": config["missing_bemerkung_without_gen"],
+        "patterns": [(re.compile(rule["pattern"]), rule["output_value"]) for rule in config["bemerkung_patterns"]],
+    }
+
+
+def recode_outcome(df, rules):
+    """
+    Derive the case outcome from Bemerkung and Gen for all rows at once.
+    Without a Bemerkung the outcome depends on whether a gene is listed;
+    otherwise the first pattern found in Bemerkung (re.search semantics)
+    decides, and Bemerkung is kept when no pattern matches.
+    """
+    bemerkung = df['Bemerkung'].astype(object)
+    missing = bemerkung.isna().to_numpy()
+    has_gen = df['Gen'].notna().to_numpy()
+
+    conditions = [missing & has_gen, missing & ~has_gen]
+    choices = [np.array(rules["missing_with_gen"], dtype=object), np.array(rules["missing_without_gen"], dtype=object)]
+    for pattern, output_value in rules["patterns"]:
+        # Non-string cells give NaN, i.e. no match
+        conditions.append(bemerkung.str.contains(pattern, na=False).to_numpy(dtype=bool))
+        choices.append(np.array(output_value, dtype=object))
+
+    outcome = np.select(conditions, choices, default=bemerkung.to_numpy())
+    return pd.Series(outcome, index=df.index, name='Outcome', dtype=object)
+
+
+def compile_cerkid_recoding(config):
+    """
+    Compile the cerkid_recoding section of config.json (the recoding of
+    the CeRKiD transfer script) into lookup tables, once per run.
+    """
+    return {
+        "datatransfer_map": compile_value_map(config["datatransfer_mapping"]),
+        "datatransfer_default": config.get("datatransfer_default"),
+        "befunder_map": compile_value_map(config["befunder_mapping"]),
+        "einsender_map": compile_value_map(config["einsender_mapping"]),
+        "gen_map": compile_value_map(config["gen_mapping"]),
+        "outcome_rules": compile_outcome_rules(config["outcome_rules"]),
+        "klassifizierung_rules": compile_klassifizierung_rules(config),
+    }
+
+
+def join_unique_per_group(df, group_cols, columns, separator=" | "):
+    """
+    Distinct values of each column per group, in first-seen order, joined
+    with separator: groupby(group_cols).agg(lambda x: separator.join(x.unique()))
+    for all columns at once, without a Python call per group and column.
+
+    The columns are stacked into (column, group, value) rows, duplicates
+    are dropped (keeping the first occurrence, so row order is kept) and
+    a stable sort makes every group's values contiguous; only the final
+    join runs per group. Missing values are skipped and a group without
+    any value gets NaN. Groups are sorted and groups with a missing key
+    are dropped, as in groupby().
+    """
+    grouped = df.groupby(group_cols, sort=True, observed=True)
+    # ngroup() is NaN for rows with a missing key
+    group_ids = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    groups = grouped.size().index
+    n_groups = len(groups)
+
+    stacked = pd.DataFrame({
+        "cell": np.concatenate([position * n_groups + group_ids for position in range(len(columns))]),
+        "value": np.concatenate([df[col].to_numpy(dtype=object) for col in columns]),
+    })
+    keep = np.tile(group_ids >= 0, len(columns)) & stacked["value"].notna().to_numpy()
+    stacked = stacked[keep].drop_duplicates().sort_values("cell", kind="stable")
+
+    cells = stacked["cell"].to_numpy()
+    values = stacked["value"].to_numpy()
+    starts = np.flatnonzero(np.diff(cells, prepend=-1))
+    ends = np.r_[starts[1:], len(values)]
+    joined = np.full(len(columns) * n_groups, np.nan, dtype=object)
+    # Most cells hold a single value and need no join; slicing a list is
+    # much cheaper than joining over a slice of an object array
+    single = ends - starts == 1
+    joined[cells[starts[single]]] = values[starts[single]]
+    value_list = values.tolist()
+    joined[cells[starts[~single]]] = [separator.join(value_list[start:end])
+                                      for start, end in zip(starts[~single].tolist(), ends[~single].tolist())]
+    return pd.DataFrame(joined.reshape(len(columns), n_groups).T, index=groups, columns=list(columns))
+
+
+def max_per_group(df, group_cols, columns):
+    """
+    groupby(group_cols)[columns].max() for string columns, which pandas
+    aggregates with a Python call per group: each column is sorted once
+    and the last non-missing value of every group is taken instead.
+    """
+    return pd.concat([
+        df[list(group_cols) + [col]].sort_values(col, kind="stable").groupby(group_cols, sort=True)[col].last()
+        for col in columns
+    ], axis=1)
+
+
+def fill_missing_per_group(df, group_col, columns):
+    """
+    Fill missing values with the first non-null value of the same group.
+    All columns are handled with a single groupby().first() pass, and the
+    same result is reused for the per-group coverage statistics.
+
+    Fills df in place and returns a dict of statistics per filled column.
+    Columns not present in df are skipped.
+    """
+    columns = [col for col in columns if col in df.columns and col != group_col]
+    if not columns:
+        return {}
+
+    first_values = df.groupby(group_col)[columns].first()
+    groups_total = len(first_values)
+
+    stats = {}
+    for col in columns:
+        mask = df[col].isna()
+        missing_before = int(mask.sum())
+        if missing_before:
+            df.loc[mask, col] = df.loc[mask, group_col].map(first_values[col])
+        stats[col] = {
+            "missing_before": missing_before,
+            "missing_after": int(df[col].isna().sum()) if missing_before else 0,
+            # A group has a value after filling exactly when first() found one
+            "groups_with_value": int(first_values[col].notna().sum()),
+            "groups_total": groups_total,
+        }
+    return stats
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import python_calamine  # noqa: F401  (enables pd.read_excel(engine="calamine"))
+except ImportError:
+    python_calamine = None
+
+# Strings pd.read_excel turns into NaN by default
+DEFAULT_NA_STRINGS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+
+
+def column_candidates(config):
+    """
+    All header names the pipeline can use: the column_mapping keys and their
+    alternative names.
+    """
+    candidates = []
+    for target_col in config["column_mapping"]:
+        candidates.append(target_col)
+        candidates.extend(config["alternative_column_names"].get(target_col, []))
+    return candidates
+
+
+def _open_sheet(path, sheet_name=0):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    sheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+    return workbook, sheet
+
+
+def _header_names(header_row):
+    # Same naming as pd.read_excel for empty header cells
+    return [f"Unnamed: {i}" if value is None else value for i, value in enumerate(header_row)]
+
+
+def read_header(path, sheet_name=0):
+    """
+    Column names of the first sheet row, read without parsing the data rows.
+    """
+    workbook, sheet = _open_sheet(path, sheet_name)
+    try:
+        header_row = next(sheet.iter_rows(max_row=1, values_only=True), ())
+        return _header_names(header_row)
+    finally:
+        workbook.close()
+
+
+def _cell_text(value):
+    """
+    A cell value as the string pd.read_excel(..., dtype=str) produces, or
+    NaN for empty cells and default NA strings. Dates and times read as
+    "2024-03-05 00:00:00" and "13:04:05" like in pandas; booleans read as
+    "True"/"False" unless an equal number comes first in the column (see
+    _ColumnText).
+    """
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        return np.nan if value in DEFAULT_NA_STRINGS else value
+    if isinstance(value, float) and value.is_integer():
+        # pandas reads whole-number floats as int
+        return str(int(value))
+    return str(value)
+
+
+class _ColumnText(dict):
+    """
+    Text of the non-string values of one column. pandas converts the
+    distinct values of a column, and values that compare equal (1, 1.0 and
+    True, 0 and False) are one value there, so they all read as the text of
+    the first of them in the column. A dict keys them the same way.
+    """
+
+    def __call__(self, value):
+        if value is None or isinstance(value, str):
+            return _cell_text(value)
+        text = self.get(value)
+        if text is None:
+            text = self[value] = _cell_text(value)
+        return text
+
+
+def iter_column_chunks(path, columns, sheet_name=0, chunk_size=10_000):
+    """
+    Stream the given columns of a sheet in openpyxl read-only mode and yield
+    DataFrames of at most chunk_size rows with string values.
+
+    Only the first occurrence of each requested header is read, names not in
+    the header are skipped. Trailing empty rows are dropped and values are
+    converted the way pd.read_excel(dtype=str) does, so the concatenated
+    chunks equal pd.read_excel(path, dtype=str) restricted to these columns.
+    A chunk can exceed chunk_size by the blank rows preceding its last row.
+    """
+    workbook, sheet = _open_sheet(path, sheet_name)
+    try:
+        rows = sheet.iter_rows(values_only=True)
+        header = _header_names(next(rows, ()))
+        positions = {}
+        for position, name in enumerate(header):
+            if name in columns and name not in positions:
+                positions[name] = position
+        names = list(positions)
+        indices = list(positions.values())
+        # The texts stay valid across chunks: pandas converts the whole column
+        converters = [(i, _ColumnText()) for i in indices]
+
+        def make_frame(chunk):
+            return pd.DataFrame(chunk, columns=names, dtype=object) if chunk else pd.DataFrame(columns=names, dtype=object)
+
+        chunk = []
+        yielded = False
+        blank_rows = 0
+        for row in rows:
+            if all(value is None or value == '' for value in row):
+                # pandas keeps blank rows between data rows but drops trailing ones
+                blank_rows += 1
+                continue
+            row_length = len(row)
+            chunk.extend([np.nan] * len(indices) for _ in range(blank_rows))
+            blank_rows = 0
+            chunk.append([text(row[i]) if i < row_length else np.nan for i, text in converters])
+            if len(chunk) >= chunk_size:
+                yield make_frame(chunk)
+                yielded = True
+                chunk = []
+        if chunk or not yielded:
+            yield make_frame(chunk)
+    finally:
+        workbook.close()
+
+
+def read_excel_columns(path, columns, dtype=str, sheet_name=0, chunk_size=10_000):
+    """
+    Read only the given columns of a workbook sheet as strings.
+
+    Uses the calamine engine when python-calamine is installed, otherwise
+    streams the sheet with openpyxl in read-only mode. Memory use depends on
+    the number of requested columns, not on the width of the sheet.
+    """
+    if dtype not in (str, "str", object, "object"):
+        header = read_header(path, sheet_name)
+        return pd.read_excel(path, sheet_name=sheet_name, dtype=dtype,
+                             usecols=[name for name in header if name in columns])
+    if python_calamine is not None:
+        wanted = set(columns)
+        return pd.read_excel(path, sheet_name=sheet_name, engine="calamine", dtype=str,
+                             usecols=lambda name: name in wanted)
+    chunks = list(iter_column_chunks(path, columns, sheet_name=sheet_name, chunk_size=chunk_size))
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
@@ -0,0 +1,61 @@
+"""
+Parity of the vectorized CeRKiD recoding (nephro_transforms with the
+cerkid_recoding tables of config.json) with the original Series.apply and
+DataFrame.apply recoders of nephro_reports_processor.py
+(benchmarks/bench_cerkid_recoding.py).
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_cerkid_recoding import (
+    LEGACY_KLASSIFIZIERUNG_RULES,
+    recode_apply,
+    recode_vectorized,
+    synthetic_cases,
+)
+from nephro_transforms import compile_cerkid_recoding, compile_klassifizierung_rules
+
+
+@pytest.fixture(scope="module")
+def recoding_config():
+    with open("config.json", 'r', encoding='utf-8') as f:
+        return json.load(f)["cerkid_recoding"]
+
+
+@pytest.fixture(scope="module")
+def recoding(recoding_config):
+    return compile_cerkid_recoding(recoding_config)
+
+
+def assert_same_recoding(df, recoding):
+    pd.testing.assert_frame_equal(recode_vectorized(df, recoding), recode_apply(df), check_dtype=False)
+
+
+def test_klassifizierung_rules_match_the_script(recoding):
+    assert recoding["klassifizierung_rules"] == compile_klassifizierung_rules(LEGACY_KLASSIFIZIERUNG_RULES)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_synthetic_cases(recoding_config, recoding, seed):
+    assert_same_recoding(synthetic_cases(2_000, recoding_config, seed=seed), recoding)
+
+
+def test_edge_cases(recoding):
+    df = pd.DataFrame({
+        'Datatransfer': ['', np.nan, 'X', 'x', ' x', 'ja'],
+        'Befunder': ['', np.nan, 'Johannes', 'Angela', 'Müller', 'Grünhangen'],
+        'Einsender': ['', np.nan, 'Weber', 'Sima Charité', 'extern', 'Bachmann'],
+        'Gen': ['', np.nan, 'negativ', 'CFHR1 und CFHR3', 'PKD1', np.nan],
+        # missing and empty remarks with and without a Gen, unmatched text
+        'Bemerkung': [np.nan, np.nan, '', 'Befund neagiv', 'in Arbeit', 'Deletion COL4A4'],
+        'cDNA': ['', np.nan, 'c.4523-1G>A', 'c.9661dup', 'c.1A>G', np.nan],
+        'Klassifizierung': ['', np.nan, np.nan, 'Klasse I', 'Klasse V', 'unklar'],
+    })
+    assert_same_recoding(df, recoding)
+
+
+def test_empty_table(recoding_config, recoding):
+    assert_same_recoding(synthetic_cases(0, recoding_config), recoding)
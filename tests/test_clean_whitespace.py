@@ -0,0 +1,51 @@
+"""
+Parity of the single-pass whitespace and null normalization
+(nephro_pipeline.clean_whitespace) with the original astype(str) loop
+(benchmarks/bench_clean_whitespace.py).
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_clean_whitespace import clean_whitespace_astype, noisy_selection
+from nephro_pipeline import DEFAULT_GENETIC_NULL_VALUES, DEFAULT_NULL_VALUES, clean_whitespace
+from nephro_transforms import to_categorical
+
+
+@pytest.fixture(scope="module")
+def config():
+    with open("config.json", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def clean(df, genetic_cols):
+    return clean_whitespace(df.copy(), DEFAULT_NULL_VALUES, {col: DEFAULT_GENETIC_NULL_VALUES for col in genetic_cols})
+
+
+def test_noisy_sheet(config):
+    df = noisy_selection(2_000, config)
+    genetic_cols = [col for col in config["genetic_columns"] if col in df.columns]
+    expected = clean_whitespace_astype(df.copy(), genetic_cols)
+    pd.testing.assert_frame_equal(clean(df, genetic_cols), expected)
+
+
+def test_categorical_columns(config):
+    df = noisy_selection(2_000, config, seed=1)
+    genetic_cols = [col for col in config["genetic_columns"] if col in df.columns]
+    expected = clean_whitespace_astype(df.copy(), genetic_cols)
+    categorical = df.copy()
+    to_categorical(categorical, config.get("data_processing", {}).get("categorical_columns", []))
+    pd.testing.assert_frame_equal(clean(categorical, genetic_cols).astype(object), expected)
+
+
+def test_edge_cases():
+    df = pd.DataFrame({
+        'Gen': ['', ' ', 'nan', 'NaN', 'null', 'NULL', ' PKD1 ', np.nan, ';;', 'PKD1;'],
+        'Einsender': ['', ' ', 'nan', 'NaN', 'null', 'NULL', ' Weber ', np.nan, ';;', 'x;'],
+        # Sheets are read as text; numbers only appear in object columns
+        'Alter': pd.Series([1, 2.5, np.nan, 4, 5, 6, 7, 8, 9, ' 10 '], dtype=object),
+    })
+    expected = clean_whitespace_astype(df.copy(), ['Gen'])
+    pd.testing.assert_frame_equal(clean(df, ['Gen']), expected)
@@ -0,0 +1,54 @@
+"""
+Parity of the vectorized semicolon expansion (nephro_transforms) with the
+original iterrows loop (benchmarks/bench_expand_semicolon.py).
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_expand_semicolon import edge_case_table, expand_semicolon_rows_iterrows, synthetic_long_table
+from nephro_transforms import expand_semicolon_rows
+
+
+def assert_same_expansion(df):
+    pd.testing.assert_frame_equal(expand_semicolon_rows(df), expand_semicolon_rows_iterrows(df), check_dtype=False)
+
+
+def test_edge_cases():
+    assert_same_expansion(edge_case_table())
+
+
+@pytest.mark.parametrize("cell", ["", " ", ";", ";;", " ; ; ", "PKD1;", "PKD1;;", ";PKD1", "PKD1;;PKD2", "PKD1; PKD2;"])
+def test_separator_cells(cell):
+    df = pd.DataFrame({
+        'Blutbuch_nummer': ['LB21-1', 'LB21-2'],
+        'Gen': [cell, 'COL4A3; COL4A4'],
+        'cDNA': ['c.1A>G; c.2C>T', np.nan],
+        'Klassifizierung': [np.nan, 'VUS'],
+    })
+    assert_same_expansion(df)
+
+
+def test_missing_values_only():
+    df = pd.DataFrame({'Gen': [np.nan, np.nan, np.nan], 'cDNA': [np.nan, np.nan, 'c.1A>G; c.2C>T']},
+                      dtype=object)
+    assert_same_expansion(df)
+
+
+def test_categorical_columns():
+    df = edge_case_table()
+    # Categories that no row uses, and a packed value that is one category
+    df['Klassifizierung'] = pd.Categorical(df['Klassifizierung'],
+                                           categories=['VUS; Pathogenic', 'VUS', 'Likely pathogenic', 'Benign'])
+    expected = expand_semicolon_rows_iterrows(df.astype(object))
+    pd.testing.assert_frame_equal(expand_semicolon_rows(df).astype(object), expected, check_dtype=False)
+
+
+def test_empty_table():
+    df = edge_case_table().iloc[:0]
+    assert expand_semicolon_rows(df).empty
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_synthetic_tables(seed):
+    assert_same_expansion(synthetic_long_table(2_000, seed=seed))
@@ -0,0 +1,73 @@
+"""
+An incremental run after changes to the sheet gives the same long table,
+in the same row order, as a full run (nephro_incremental).
+"""
+import copy
+import json
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_data import generate_uebersicht
+from nephro_pipeline import LongTablePipeline
+
+GENETIC_HEADERS = ('Gen', 'cDNA', 'Protein', 'Klassifizierung')
+
+
+@pytest.fixture
+def config(tmp_path):
+    with open("config.json", 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    config["file_paths"]["state_directory"] = str(tmp_path / "state")
+    config["sample_lists"] = dict(config.get("sample_lists", {}), lists=[])
+    return config
+
+
+def combinations(config, sheet, incremental):
+    pipeline = LongTablePipeline(copy.deepcopy(config), verbose=False, workbook_cache={"enabled": False})
+    return pipeline.build_combinations(sheet.copy(), incremental=incremental)["long_table"]
+
+
+def assert_same_table(actual, expected):
+    # Cached and new rows can carry different categories, the values must match
+    pd.testing.assert_frame_equal(actual.astype(object), expected.astype(object))
+    assert actual.to_csv(index=False) == expected.to_csv(index=False)
+
+
+def changed_sheet(sheet, config, seed=1):
+    """
+    The sheet with edited rows, a removed patient, a patient that lost its
+    genetic information and new patients at the end.
+    """
+    rng = np.random.default_rng(seed)
+    sheet = sheet.copy()
+    genetic = [col for col in sheet.columns if col.split('...')[0] in GENETIC_HEADERS]
+    cdna = [col for col in genetic if col.startswith('cDNA')][0]
+    sheet.loc[rng.choice(len(sheet), 20, replace=False), cdna] = 'c.100A>T'
+    starts = np.flatnonzero(sheet['Blutbuch-Nummer'].notna().to_numpy())
+    sheet.loc[starts[5]:starts[6] - 1, genetic] = np.nan
+    sheet = sheet.drop(index=range(starts[10], starts[11])).reset_index(drop=True)
+    added = generate_uebersicht(50, config, seed=seed)
+    added['Blutbuch-Nummer'] = added['Blutbuch-Nummer'] + 'N'
+    return pd.concat([sheet, added], ignore_index=True)
+
+
+def test_incremental_equals_full_run(config):
+    first = generate_uebersicht(1_000, config, seed=0)
+    # Rows above the first Blutbuch-Nummer are never cached
+    first.loc[0, 'Blutbuch-Nummer'] = np.nan
+    # A Blutbuch-Nummer that reappears further down the sheet
+    starts = np.flatnonzero(first['Blutbuch-Nummer'].notna().to_numpy())
+    first.loc[starts[300], 'Blutbuch-Nummer'] = first.loc[starts[3], 'Blutbuch-Nummer']
+    second = changed_sheet(first, config)
+
+    assert_same_table(combinations(config, first, True), combinations(config, first, False))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FutureWarning)
+        changed = combinations(config, second, True)
+        unchanged = combinations(config, second, True)
+    full = combinations(config, second, False)
+    assert_same_table(changed, full)
+    assert_same_table(unchanged, full)
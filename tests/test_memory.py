@@ -0,0 +1,23 @@
+"""
+Peak memory of a pipeline run on a small synthetic workbook
+(benchmarks/check_memory.py).
+"""
+import json
+
+import pytest
+
+from benchmarks.check_memory import DEFAULT_MAX_RATIO, measure_memory
+
+
+@pytest.fixture(scope="module")
+def config():
+    with open("config.json", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("pre_recode_summary", [False, True])
+def test_peak_within_limit(config, tmp_path, pre_recode_summary):
+    measured = measure_memory(config, 5_000, str(tmp_path), pre_recode_summary)
+    assert measured["output_rows"] > 0
+    assert measured["ratio"] <= DEFAULT_MAX_RATIO, \
+        f"peak in {measured['peak_stage']} is {measured['ratio']:.2f}x the loaded sheet"
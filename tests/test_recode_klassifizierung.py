@@ -0,0 +1,57 @@
+"""
+Parity of the compiled Klassifizierung recoder (nephro_transforms) with the
+original DataFrame.apply implementation
+(benchmarks/bench_recode_klassifizierung.py).
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_recode_klassifizierung import recode_klassifizierung_apply, synthetic_variants
+from nephro_transforms import compile_klassifizierung_rules, recode_klassifizierung
+
+
+@pytest.fixture(scope="module")
+def config():
+    with open("config.json", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def assert_same_recoding(df, config):
+    expected = recode_klassifizierung_apply(df, config)
+    actual = recode_klassifizierung(df, compile_klassifizierung_rules(config))
+    pd.testing.assert_series_equal(actual.astype(object), expected.astype(object), check_dtype=False,
+                                   check_names=False)
+
+
+def test_synthetic_variants(config):
+    assert_same_recoding(synthetic_variants(3_000, config), config)
+
+
+def test_edge_cases(config):
+    rule_cdna = config["special_variant_rules"][0].get("cdna_value") or config["special_variant_rules"][0]["cdna_values"][0]
+    df = pd.DataFrame({
+        'Gen': ['PKD1', 'PKD1', 'PKD1', 'PKD1', 'PKD1', np.nan, 'PKD1'],
+        'cDNA': ['c.1A>G', rule_cdna, rule_cdna, '', np.nan, np.nan, rule_cdna],
+        # unmatched spelling, missing with a rule cDNA, empty string with a rule cDNA
+        'Klassifizierung': ['Klasse I', np.nan, '', '', np.nan, np.nan, 'Klasse V'],
+    })
+    assert_same_recoding(df, config)
+
+
+def test_categorical_klassifizierung(config):
+    df = synthetic_variants(1_000, config, seed=3)
+    expected = recode_klassifizierung_apply(df, config)
+    # Categories that no row uses and that no rule maps
+    df['Klassifizierung'] = pd.Categorical(df['Klassifizierung'],
+                                           categories=list(df['Klassifizierung'].dropna().unique()) + ['Klasse 0'])
+    actual = recode_klassifizierung(df, compile_klassifizierung_rules(config))
+    pd.testing.assert_series_equal(actual.astype(object), expected.astype(object), check_dtype=False,
+                                   check_names=False)
+
+
+def test_empty_table(config):
+    df = synthetic_variants(10, config).iloc[:0]
+    assert len(recode_klassifizierung(df, compile_klassifizierung_rules(config))) == 0
@@ -0,0 +1,56 @@
+"""
+Parity of the streamed openpyxl loader (nephro_workbook.iter_column_chunks)
+with pd.read_excel(dtype=str).
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from nephro_workbook import iter_column_chunks
+
+CELL_VALUES = [
+    True, False, 3.0, 2.5, 7, 0, -0.0, 1e20, 0.1,
+    datetime.datetime(2024, 3, 5), datetime.datetime(2024, 3, 5, 13, 4, 5), datetime.date(2024, 3, 5),
+    datetime.time(13, 4, 5), datetime.timedelta(hours=30),
+    'NA', 'nan', 'NULL', '#N/A', 'None', ' x ', 'PKD1;', None,
+]
+
+
+def write_workbook(path, columns):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(list(columns))
+    for row in zip(*columns.values()):
+        sheet.append(list(row))
+    workbook.save(path)
+
+
+def assert_same_as_read_excel(path, columns, chunk_size=10_000):
+    expected = pd.read_excel(path, dtype=str)
+    actual = pd.concat(list(iter_column_chunks(path, list(columns), chunk_size=chunk_size)), ignore_index=True)
+    pd.testing.assert_frame_equal(actual, expected[list(columns)], check_dtype=False)
+
+
+def test_cell_types(tmp_path):
+    path = str(tmp_path / "cells.xlsx")
+    columns = {
+        'mixed': CELL_VALUES,
+        'bool_only': [True, False] * (len(CELL_VALUES) // 2),
+        # booleans read as the number that equals them when that comes first
+        'numbers_first': [1, 0, True, False, 1.0, 2] + [None] * (len(CELL_VALUES) - 6),
+        'bools_first': [False, True, 0, 1.0, 1, 'x'] + [None] * (len(CELL_VALUES) - 6),
+    }
+    write_workbook(path, columns)
+    assert_same_as_read_excel(path, columns)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_random_columns_across_chunks(tmp_path, seed):
+    rng = np.random.default_rng(seed)
+    path = str(tmp_path / "random.xlsx")
+    columns = {name: [CELL_VALUES[i] for i in rng.integers(0, len(CELL_VALUES), 300)] for name in ('a', 'b', 'c')}
+    write_workbook(path, columns)
+    assert_same_as_read_excel(path, columns, chunk_size=37)